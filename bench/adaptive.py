@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check of the --adaptive -rl/-c controller against bench/fake_nuclei.py.
+
+    python -m bench.adaptive --shards 12 --parallel 3 --rate-limit 300
+
+Runs a sharded scan twice through nuclei_list_sharded: once against targets
+that take any rate (clean shards: -rl/-c must go up) and once against
+targets that fail every request above --tolerated rps (-rl/-c must go
+down). Both runs also check that the -rl of the shards running at once
+never summed to more than --rate-limit. Exits 1 if a check fails.
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.run_bench import _fake_nuclei_dir  # noqa: E402
+from bench.synth import generate  # noqa: E402
+from proc.adaptive import AdaptiveController, parse_bounds  # noqa: E402
+from proc.config import ADAPTIVE_C_BOUNDS, ADAPTIVE_RL_BOUNDS  # noqa: E402
+from proc.nuclei_runner import nuclei_list_sharded  # noqa: E402
+
+
+class _PeakController(AdaptiveController):
+    """Records the largest sum of -rl handed to shards running at once."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.running = 0
+        self.peak = 0
+        self._guard = threading.Lock()
+
+    def next_params(self):
+        rl, c = super().next_params()
+        with self._guard:
+            self.running += rl
+            self.peak = max(self.peak, self.running)
+        return rl, c
+
+    def release(self, rate_limit: int) -> None:
+        with self._guard:
+            self.running -= rate_limit
+        super().release(rate_limit)
+
+
+def _scan(a, work: str, targets: str, tolerated) -> dict:
+    parallel = min(a.parallel, a.shards)
+    controller = _PeakController(
+        parse_bounds(a.adaptive_rl),
+        parse_bounds(a.adaptive_c),
+        rate_limit=a.rate_limit // parallel,
+        concurrency=a.concurrency,
+        budget=a.rate_limit,
+    )
+    start = controller.next_params()
+    controller.release(start[0])
+    if tolerated:
+        os.environ["BENCH_NUCLEI_MAX_RPS"] = str(tolerated)
+    else:
+        os.environ.pop("BENCH_NUCLEI_MAX_RPS", None)
+    export = os.path.join(work, "merged.jsonl")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        nuclei_list_sharded(
+            targets,
+            a.shards,
+            json_export_path=export,
+            rate_limit=a.rate_limit,
+            parallel=parallel,
+            controller=controller,
+        )
+    os.remove(export)
+    return dict(start=start, end=controller.next_params(), peak=controller.peak)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="Adaptive -rl/-c check with the fake nuclei.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    p.add_argument("--shards", type=int, default=12)
+    p.add_argument("--parallel", type=int, default=3)
+    p.add_argument("--rate-limit", type=int, default=300, help="global -rl budget")
+    p.add_argument("--concurrency", type=int, default=25)
+    p.add_argument(
+        "--tolerated", type=int, default=40, help="rps the erroring targets take"
+    )
+    p.add_argument("--adaptive-rl", default=ADAPTIVE_RL_BOUNDS)
+    p.add_argument("--adaptive-c", default=ADAPTIVE_C_BOUNDS)
+    a = p.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="n2d-adaptive-")
+    try:
+        os.environ["BENCH_EXPORT"] = generate(
+            os.path.join(work, "export.jsonl"), 200, a.shards, 64, "jsonl"
+        )
+        os.environ["PATH"] = _fake_nuclei_dir(work) + os.pathsep + os.environ["PATH"]
+        targets = os.path.join(work, "targets.txt")
+        with open(targets, "w", encoding="utf-8") as f:
+            f.writelines(f"host{i}.bench.example\n" for i in range(a.shards))
+
+        print(
+            f"== {a.shards} shards, {a.parallel} at a time, "
+            f"--rate-limit {a.rate_limit}"
+        )
+        print(f"{'targets':<22}{'start':>12}{'end':>12}{'peak -rl':>10}")
+        failed = []
+        for name, tolerated, want in (
+            ("clean", None, "up"),
+            (f"errors above {a.tolerated} rps", a.tolerated, "down"),
+        ):
+            r = _scan(a, work, targets, tolerated)
+            (rl0, c0), (rl1, c1) = r["start"], r["end"]
+            bad = []
+            if want == "up" and not (rl1 > rl0 and c1 > c0):
+                bad.append("-rl/-c did not go up")
+            if want == "down" and not (rl1 < rl0 and c1 < c0):
+                bad.append("-rl/-c did not go down")
+            if r["peak"] > a.rate_limit:
+                bad.append("shards exceeded --rate-limit")
+            failed += bad
+            print(
+                f"{name:<22}{f'{rl0}/{c0}':>12}{f'{rl1}/{c1}':>12}{r['peak']:>10}"
+                + (f"  FAILED: {', '.join(bad)}" if bad else "")
+            )
+        if failed:
+            raise SystemExit(1)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check and timing of proc.dojo_async.AsyncDojoClient against bench.stub_dojo.
+
+    python -m bench.async_client --hosts 200 --concurrency 1,10,50 --latency 0.02
+
+Imports one host file per host (every other one gzip-compressed) through one
+client per --concurrency value, all hosts at once, and checks that:
+every import counted the host's findings (gzip files are sent decompressed),
+no more than `concurrency` requests were in flight, a product id cached for
+a product the server does not have is probed and resolved again, and no
+per-product lock outlives the run. Needs httpx. Exits 1 if a check fails.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import gzip
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.stub_dojo import serve  # noqa: E402
+from bench.synth import make_record  # noqa: E402
+from proc import dojo_async  # noqa: E402
+from proc.id_cache import IdCache  # noqa: E402
+
+STALE = "stale.bench.example"
+
+
+def _host_files(work: str, hosts: int, records: int) -> dict:
+    rng = random.Random(1)
+    files = {}
+    for h in range(hosts):
+        host = f"host{h}.bench.example"
+        recs = [make_record(rng, i, 1, 64) for i in range(records)]
+        data = json.dumps(recs).encode("utf-8")
+        path = os.path.join(work, f"{host}.json")
+        if h % 2:
+            path += ".gz"
+            data = gzip.compress(data)
+        with open(path, "wb") as f:
+            f.write(data)
+        files[host] = path
+    files[STALE] = files["host0.bench.example"]
+    return files
+
+
+async def _run(base: str, files: dict, concurrency: int, id_cache: IdCache):
+    peak = running = 0
+    async with dojo_async.AsyncDojoClient(
+        base, "x", concurrency=concurrency, id_cache=id_cache
+    ) as dd:
+        request = dd.client.request
+
+        async def counting(*args, **kwargs):
+            nonlocal peak, running
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await request(*args, **kwargs)
+            finally:
+                running -= 1
+
+        dd.client.request = counting
+        t = time.perf_counter()
+        counts = await asyncio.gather(
+            *(dd.import_host_file(h, p, "bench") for h, p in files.items())
+        )
+        secs = time.perf_counter() - t
+        gc.collect()
+        locks = len(dd._product_locks)
+    return dict(zip(files, counts)), secs, peak, locks
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="AsyncDojoClient check against the DefectDojo stub.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    p.add_argument("--hosts", type=int, default=200)
+    p.add_argument("--records", type=int, default=20, help="findings per host")
+    p.add_argument("--concurrency", default="10,50", help="comma-separated")
+    p.add_argument("--latency", type=float, default=0.02, help="stub s/request")
+    a = p.parse_args(argv)
+    if dojo_async.httpx is None:
+        raise SystemExit("[!] bench.async_client needs httpx (pip install httpx).")
+
+    work = tempfile.mkdtemp(prefix="n2d-async-")
+    failed = False
+    try:
+        files = _host_files(work, a.hosts, a.records)
+        print(f"== {len(files)} host imports, stub latency {a.latency * 1000:.0f} ms")
+        print(f"{'concurrency':<12}{'seconds':>9}{'peak':>7}{'locks':>7}")
+        for n, c in enumerate(int(x) for x in a.concurrency.split(",")):
+            server = serve(0, a.latency)  # fresh DefectDojo per run
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base = f"http://127.0.0.1:{server.server_address[1]}/api/v2"
+            id_cache = IdCache(os.path.join(work, f"ids{n}.sqlite"))
+            id_cache.set_product(base, STALE, 999, None)  # not on this server
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                counts, secs, peak, locks = asyncio.run(_run(base, files, c, id_cache))
+            server.shutdown()
+            server.server_close()
+            bad = [h for h, got in counts.items() if got != a.records]
+            problems = []
+            if bad:
+                problems.append(f"{len(bad)} wrong findings counts")
+            if peak > c:
+                problems.append(f"{peak} requests in flight")
+            if id_cache.get_product(base, STALE) in (None, 999):
+                problems.append("stale product id kept")
+            if locks:
+                problems.append("product locks left")
+            failed = failed or bool(problems)
+            print(
+                f"{c:<12}{secs:>9.2f}{peak:>7}{locks:>7}"
+                + (f"  FAILED: {', '.join(problems)}" if problems else "")
+            )
+            id_cache.close()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
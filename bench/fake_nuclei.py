@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stand-in for the nuclei binary used by the end-to-end benchmark: copies the
+export named by BENCH_EXPORT to -json-export, or prints its records as
+-jsonl. bench.run_bench puts a "nuclei" wrapper for it first on PATH.
+
+With -stats-json it also prints a stats line to stderr, as if the run had
+sent 10 seconds of requests at its -rl; requests above BENCH_NUCLEI_MAX_RPS
+(the rate the targets tolerate, unlimited if unset) count as errors.
+"""
+
+import json
+import os
+import shutil
+import sys
+
+
+def _iter_records(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        data = f.read().strip()
+    if data.startswith("["):
+        yield from json.loads(data)
+        return
+    for line in data.splitlines():
+        if line.strip():
+            yield json.loads(line)
+
+
+def _stats_line(argv) -> str:
+    rl = int(argv[argv.index("-rl") + 1]) if "-rl" in argv else 150
+    tolerated = float(os.environ.get("BENCH_NUCLEI_MAX_RPS") or "inf")
+    requests = rl * 10
+    errors = int(requests * max(0.0, rl - tolerated) / rl)
+    # nuclei prints every -stats-json value as a string
+    stats = {
+        "duration": "0:00:10",
+        "errors": errors,
+        "hosts": 1,
+        "percent": 100,
+        "requests": requests,
+        "rps": rl,
+        "total": requests,
+    }
+    return json.dumps({k: str(v) for k, v in stats.items()})
+
+
+def main(argv) -> int:
+    export = os.environ["BENCH_EXPORT"]
+    if "-ut" in argv:
+        return 0
+    if "-json-export" in argv:
+        shutil.copyfile(export, argv[argv.index("-json-export") + 1])
+    elif "-jsonl" in argv:
+        out = sys.stdout
+        for rec in _iter_records(export):
+            out.write(json.dumps(rec) + "\n")
+        out.flush()
+    if "-stats-json" in argv:
+        print(_stats_line(argv), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
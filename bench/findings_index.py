@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Indexing throughput and query latency of proc.findings_index.
+
+    python -m bench.findings_index --records 200000 --runs 5 --hosts 5000
+
+Indexes --runs synthetic runs of --records findings each into a fresh index
+(rows/s per run, generating the records included), then times the
+--mode query shapes: one template across hosts in the last week, one
+host's history, severity counts, per-host counts of a template prefix and
+a diff of the last two runs. Best of --repeat runs per query.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.synth import make_record  # noqa: E402
+from proc.findings_index import FindingsIndex, parse_when  # noqa: E402
+
+
+def _records(seed: int, n: int, hosts: int):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield make_record(rng, i, hosts, 0)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="Findings index insert and query timings.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    p.add_argument("--records", type=int, default=100000, help="findings per run")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--hosts", type=int, default=2000)
+    p.add_argument("--repeat", type=int, default=5, help="best of N per query")
+    a = p.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="n2d-index-")
+    try:
+        index = FindingsIndex(os.path.join(work, "index.sqlite"))
+        print(f"== indexing {a.runs} runs x {a.records} findings, {a.hosts} hosts")
+        runs = []
+        for r in range(a.runs):
+            run_id = f"bench-run-{r}"
+            t = time.perf_counter()
+            index.add_run(run_id, _records(r + 1, a.records, a.hosts), "bench")
+            secs = time.perf_counter() - t
+            runs.append(run_id)
+            print(f"{run_id:<14}{secs:>8.2f}s{a.records / secs:>12.0f} rows/s")
+        mb = os.path.getsize(index.path) / 2**20
+        print(f"index size {mb:.1f} MB")
+
+        week = parse_when("7d")
+        queries = {
+            "template, 7d": lambda: index.query(
+                template="bench-template-7", since=week
+            ),
+            "host history": lambda: index.query(host="host42.bench.example"),
+            "severity counts": lambda: index.counts("severity", severity="high,critical"),
+            "template* by host": lambda: index.counts(
+                "host", template="bench-template-1*", since=week
+            ),
+            "diff last two": lambda: index.diff(runs[-2], runs[-1], limit=1000),
+        }
+        print(f"\n== queries ({a.runs * a.records} findings)")
+        for name, fn in queries.items():
+            best = float("inf")
+            for _ in range(a.repeat):
+                t = time.perf_counter()
+                out = fn()
+                best = min(best, time.perf_counter() - t)
+            rows = sum(map(len, out)) if name.startswith("diff") else len(out)
+            print(f"{name:<20}{best * 1000:>10.1f} ms{rows:>10} rows")
+        index.close()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark: per-record cost of host extraction, alone and inside the
+split stage.
+
+    python -m bench.host_extract --records 200000 --hosts 2000
+
+Compares extract_host_from_record with canonicalization uncached (the
+memoized function's __wrapped__, bare-host fast path off), memoized, and
+memoized plus the fast path, once with nuclei's "host" as a URL and once as
+a bare host. The split section runs split_by_host_to_json_arrays (buffered)
+uncached and as shipped and reports microseconds per record.
+"""
+
+import argparse
+import contextlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.synth import generate  # noqa: E402
+from proc import utils  # noqa: E402
+
+_NEVER_RE = re.compile(r"(?!)")
+
+
+@contextlib.contextmanager
+def _variant(memo: bool, fast_path: bool):
+    canon, fast_re = utils._canonical_host, utils._CANONICAL_HOST_RE
+    if not memo:
+        utils._canonical_host = canon.__wrapped__
+    if not fast_path:
+        utils._CANONICAL_HOST_RE = _NEVER_RE
+    canon.cache_clear()
+    try:
+        yield
+    finally:
+        utils._canonical_host, utils._CANONICAL_HOST_RE = canon, fast_re
+
+
+VARIANTS = (
+    ("uncached", False, False),
+    ("memoized", True, False),
+    ("memoized+fast-path", True, True),
+)
+
+
+def _per_record_us(fn: Callable[[], None], n: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best / max(1, n) * 1e6
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="Per-record cost of host extraction.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    p.add_argument("--records", type=int, default=100000)
+    p.add_argument("--hosts", type=int, default=1000)
+    p.add_argument("--body-bytes", type=int, default=256)
+    p.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    a = p.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="n2d-hosts-")
+    try:
+        export = generate(
+            os.path.join(work, "export.json"), a.records, a.hosts, a.body_bytes
+        )
+        records = list(utils.iter_nuclei_records(export))
+        bare = [dict(r, host=utils.canonical_host_from_any(r["host"])) for r in records]
+
+        print(f"== extract_host_from_record ({a.records} records, {a.hosts} hosts)")
+        print(f"{'':<22}{'host=URL us/rec':>18}{'host=bare us/rec':>18}")
+        for name, memo, fast in VARIANTS:
+            row = []
+            for recs in (records, bare):
+                with _variant(memo, fast):
+                    us = _per_record_us(
+                        lambda recs=recs: [
+                            utils.extract_host_from_record(r) for r in recs
+                        ],
+                        len(recs),
+                        a.repeat,
+                    )
+                row.append(us)
+            print(f"{name:<22}{row[0]:>18.3f}{row[1]:>18.3f}")
+
+        print("\n== split_by_host_to_json_arrays (buffered)")
+        out = os.path.join(work, "split")
+
+        def split():
+            shutil.rmtree(out, ignore_errors=True)
+            utils.split_by_host_to_json_arrays(export, out)
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            rows = []
+            for name, memo, fast in (VARIANTS[0], VARIANTS[-1]):
+                with _variant(memo, fast):
+                    rows.append((name, _per_record_us(split, a.records, a.repeat)))
+        for name, us in rows:
+            print(f"{name:<22}{us:>18.3f} us/rec")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
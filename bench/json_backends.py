@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parse + split time per proc.jsoncodec backend.
+
+    python -m bench.json_backends --records 200000 --body-bytes 2048
+
+Generates one export per format, then for every installed backend (stdlib
+json, orjson, msgspec) runs iter_nuclei_records and both
+split_by_host_to_json_arrays paths in a fresh process with
+N2D_JSON_BACKEND set, since the backend is picked at import. Best of
+--repeat runs; the last column is the speedup over stdlib json.
+
+Before timing, every backend reads a set of small edge-case exports (JSONL
+with a truncated last line, a multi-line record or garbage between lines,
+a BOM, concatenated objects, gzip, full and truncated arrays) and must
+yield exactly their complete records; any mismatch exits with status 1.
+--check-only stops after that.
+"""
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import importlib.util
+import json
+import random
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.synth import generate, make_record  # noqa: E402
+
+BACKENDS = ("json", "orjson", "msgspec")
+
+
+def _digest(records) -> str:
+    blob = json.dumps(list(records), sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _edge_exports(work: str) -> dict:
+    """name -> (path, digest of the records a reader must yield)."""
+    rng = random.Random(7)
+    recs = [make_record(rng, i, 5, 64) for i in range(20)]
+    lines = [json.dumps(r) for r in recs]
+    multi = lines[:5] + [json.dumps(recs[5], indent=2)] + lines[6:]
+    cases = {
+        "jsonl": ("\n".join(lines) + "\n", recs),
+        "jsonl-truncated": ("\n".join(lines)[:-10], recs[:-1]),
+        "jsonl-multiline": ("\n".join(multi) + "\n", recs),
+        "jsonl-garbage": ("\n".join(lines[:3] + ["junk"] + lines[3:]), recs),
+        "jsonl-bom": ("\ufeff" + "\n".join(lines), recs),
+        "concatenated": ("".join(lines), recs),
+        "array": (json.dumps(recs), recs),
+        "array-indented": (json.dumps(recs, indent=2), recs),
+        "array-truncated": (json.dumps(recs)[:-10], recs[:-1]),
+    }
+    out = {}
+    for name, (text, expected) in cases.items():
+        path = os.path.join(work, f"edge-{name}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        out[name] = (path, _digest(expected))
+    path = os.path.join(work, "edge-jsonl.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    out["jsonl-gzip"] = (path, _digest(recs))
+    return out
+
+
+def _check_child(paths) -> None:
+    from proc import jsoncodec
+    from proc.utils import iter_nuclei_records, iter_nuclei_records_stream
+
+    res = {"backend": jsoncodec.BACKEND, "digests": {}}
+    for path in paths:
+        try:
+            res["digests"][path] = [
+                _digest(iter_nuclei_records(path)),
+                _digest(iter_nuclei_records_stream(path)),
+            ]
+        except Exception as e:
+            res["digests"][path] = [f"{type(e).__name__}: {e}"] * 2
+    print(json.dumps(res))
+
+
+def _run_child(backend: str, args) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "bench.json_backends", *args],
+        cwd=ROOT,
+        env=dict(os.environ, N2D_JSON_BACKEND=backend),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def check_readers(backends, work: str) -> bool:
+    """Parse the edge-case exports under each backend; True if all match."""
+    edges = _edge_exports(work)
+    ok = True
+    print(f"== reader check ({len(edges)} edge-case exports)")
+    for backend in backends:
+        res = _run_child(backend, ["--check", *(p for p, _ in edges.values())])
+        bad = [
+            f"{name} ({res['digests'][path][0][:60]})"
+            for name, (path, want) in edges.items()
+            if res["digests"][path] != [want, want]
+        ]
+        ok = ok and not bad
+        print(
+            f"{backend:<10}{len(edges) - len(bad)}/{len(edges)} match"
+            + (f"  MISMATCH: {', '.join(bad)}" if bad else "")
+        )
+    return ok
+
+
+def _child(export: str, work: str, repeat: int) -> None:
+    from proc import jsoncodec
+    from proc.utils import iter_nuclei_records, split_by_host_to_json_arrays
+
+    def best(fn) -> float:
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t)
+        return min(times)
+
+    def split(stream: bool):
+        out = os.path.join(work, f"split-{jsoncodec.BACKEND}-{int(stream)}")
+        shutil.rmtree(out, ignore_errors=True)
+        split_by_host_to_json_arrays(export, out, stream=stream)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        res = {
+            "backend": jsoncodec.BACKEND,
+            "parse": best(lambda: sum(1 for _ in iter_nuclei_records(export))),
+            "split_buffered": best(lambda: split(False)),
+            "split_stream": best(lambda: split(True)),
+        }
+    print(json.dumps(res))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="Compare JSON backends on parse + split.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    p.add_argument("--records", type=int, default=50000)
+    p.add_argument("--hosts", type=int, default=500)
+    p.add_argument("--body-bytes", type=int, default=1024)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument(
+        "--check-only", action="store_true", help="Only run the reader check."
+    )
+    p.add_argument(
+        "--child", nargs=2, metavar=("EXPORT", "WORK"), help=argparse.SUPPRESS
+    )
+    p.add_argument("--check", nargs="+", metavar="EXPORT", help=argparse.SUPPRESS)
+    a = p.parse_args(argv)
+    if a.child:
+        _child(a.child[0], a.child[1], a.repeat)
+        return
+    if a.check:
+        _check_child(a.check)
+        return
+
+    installed = [
+        b for b in BACKENDS if b == "json" or importlib.util.find_spec(b) is not None
+    ]
+    work = tempfile.mkdtemp(prefix="n2d-json-")
+    try:
+        if not check_readers(installed, work):
+            raise SystemExit(1)
+        if a.check_only:
+            return
+        for fmt in ("json", "jsonl"):
+            export = generate(
+                os.path.join(work, f"export.{fmt}"),
+                a.records,
+                a.hosts,
+                a.body_bytes,
+                fmt,
+            )
+            mb = os.path.getsize(export) / 2**20
+            print(f"\n== {fmt}: {a.records} records, {mb:.1f} MB")
+            cols = ("parse", "split_buffered", "split_stream")
+            head = "".join(f"{c + ' s':>18}" for c in cols)
+            print(f"{'':<10}{head}{'vs json':>10}")
+            base = None
+            for backend in installed:
+                res = _run_child(
+                    backend, ["--repeat", str(a.repeat), "--child", export, work]
+                )
+                total = sum(res[c] for c in cols)
+                base = base or total
+                print(
+                    f"{backend:<10}"
+                    + "".join(f"{res[c]:>18.3f}" for c in cols)
+                    + f"{base / total:>9.2f}x"
+                )
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
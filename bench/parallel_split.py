@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scaling of the parallel JSONL split (split_by_host_to_json_arrays workers=N).
+
+    python -m bench.parallel_split --records 500000 --hosts 5000 --workers 1,2,4,8
+
+Times the serial --stream-split path and each worker count on one JSONL
+export, and checks that every parallel run wrote byte-identical host files
+(same hosts, order, contents) to the serial one, also for a copy of the
+export with a UTF-8 BOM. Throughput only scales with the cores actually
+available (os.cpu_count() is printed).
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+# benchmark any size, not just exports above the production threshold
+os.environ.setdefault("N2D_SPLIT_PARALLEL_MIN_MB", "0")
+
+from bench.synth import generate  # noqa: E402
+from proc.utils import split_by_host_to_json_arrays  # noqa: E402
+
+
+def _run(export: str, out: str, workers: int):
+    shutil.rmtree(out, ignore_errors=True)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        t = time.perf_counter()
+        files = split_by_host_to_json_arrays(export, out, stream=True, workers=workers)
+        return time.perf_counter() - t, files
+
+
+def _contents(files: dict) -> list:
+    out = []
+    for host, path in files.items():
+        with open(path, "rb") as f:
+            out.append((host, f.read()))
+    return out
+
+
+def _check_bom(export: str, work: str, workers: int) -> bool:
+    bom = os.path.join(work, "export-bom.jsonl")
+    with open(export, "rb") as src, open(bom, "wb") as dst:
+        dst.write(b"\xef\xbb\xbf")
+        shutil.copyfileobj(src, dst)
+    _, serial = _run(bom, os.path.join(work, "bom-serial"), 1)
+    _, parallel = _run(bom, os.path.join(work, "bom-parallel"), workers)
+    return _contents(parallel) == _contents(serial)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="Parallel JSONL split scaling.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    p.add_argument("--records", type=int, default=200000)
+    p.add_argument("--hosts", type=int, default=2000)
+    p.add_argument("--body-bytes", type=int, default=1024)
+    p.add_argument("--workers", default="2,4", help="comma-separated worker counts")
+    a = p.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="n2d-psplit-")
+    try:
+        export = generate(
+            os.path.join(work, "export.jsonl"),
+            a.records,
+            a.hosts,
+            a.body_bytes,
+            "jsonl",
+        )
+        mb = os.path.getsize(export) / 2**20
+        print(
+            f"== {a.records} records, {a.hosts} hosts, {mb:.0f} MB, "
+            f"{os.cpu_count()} CPUs"
+        )
+        base, files = _run(export, os.path.join(work, "serial"), 1)
+        expected = _contents(files)
+        print(f"{'serial':<12}{base:>8.2f}s{mb / base:>10.1f} MB/s")
+        for n in (int(x) for x in a.workers.split(",")):
+            secs, files = _run(export, os.path.join(work, f"w{n}"), n)
+            same = _contents(files) == expected
+            print(
+                f"{f'{n} workers':<12}{secs:>8.2f}s{mb / secs:>10.1f} MB/s"
+                f"{base / secs:>8.2f}x  {'identical' if same else 'DIFFERENT'}"
+            )
+        same = _check_bom(export, work, max(2, n))
+        print(f"{'BOM export':<12}{'identical' if same else 'DIFFERENT':>36}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
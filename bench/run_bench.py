@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the parse / split / upload path on synthetic nuclei exports.
+
+    python -m bench.run_bench                       # both sections, defaults
+    python -m bench.run_bench --records 200000 --hosts 2000 --body-bytes 4096
+    python -m bench.run_bench --section e2e --latency 0.05 --json out.json
+
+"parse" times iter_nuclei_records, count_findings_from_file,
+extract_host_from_record and split_by_host_to_json_arrays (buffered and
+--stream-split) on a JSON-array and a JSONL export; each is run once for
+wall time and once under tracemalloc for peak Python heap.
+
+"e2e" runs main.py --mode list against bench.stub_dojo (with --latency
+seconds per API call) and a fake nuclei that replays the export, once per
+variant: serial upload, --upload-workers, a warm rerun of the latter that
+reuses its ID cache and upload state, --stream-split and --pipeline.
+Every variant is a fresh process with its own state directory and stub, so
+runs do not share caches unless meant to; stage times, request counts and
+peak RSS come from the --metrics-json report.
+
+Run from the repository root. Nothing outside a temp directory is written
+unless --json is given.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.synth import generate  # noqa: E402
+
+# name, extra CLI args, reuse state of the previous variant
+E2E_VARIANTS: List[Tuple[str, List[str], bool]] = [
+    ("serial", ["--upload-workers", "1"], False),
+    ("workers", ["--upload-workers", "{workers}"], False),
+    ("warm-cache", ["--upload-workers", "{workers}"], True),
+    ("stream-split", ["--upload-workers", "{workers}", "--stream-split"], False),
+    ("pipeline", ["--upload-workers", "{workers}", "--pipeline"], False),
+]
+
+
+def _measure(fn: Callable[[], object]) -> Dict[str, float]:
+    t = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - t
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": round(seconds, 4),
+        "peak_mb": round(peak / 2**20, 2),
+        "result": result,
+    }
+
+
+def bench_parse(export: str, work: str, verbose: bool = False) -> Dict[str, dict]:
+    from proc.utils import (
+        count_findings_from_file,
+        extract_host_from_record,
+        iter_nuclei_records,
+        split_by_host_to_json_arrays,
+    )
+
+    records = list(iter_nuclei_records(export))
+    runs = {
+        "iter_nuclei_records": lambda: sum(1 for _ in iter_nuclei_records(export)),
+        "count_findings_from_file": lambda: count_findings_from_file(export),
+        "extract_host_from_record": lambda: len(
+            {extract_host_from_record(r) for r in records}
+        ),
+    }
+    for name, stream in (("split_buffered", False), ("split_stream", True)):
+        out = os.path.join(work, name)
+
+        def split(out=out, stream=stream):
+            shutil.rmtree(out, ignore_errors=True)
+            return len(split_by_host_to_json_arrays(export, out, stream=stream))
+
+        runs[name] = split
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+            return {name: _measure(fn) for name, fn in runs.items()}
+
+
+def _start_stub(latency: float) -> Tuple[subprocess.Popen, str]:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "bench.stub_dojo", "--latency", str(latency)],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    port = proc.stdout.readline().split()[1]
+    return proc, f"http://127.0.0.1:{port}"
+
+
+def _stub_stats(base: str) -> dict:
+    import requests
+
+    return requests.get(f"{base}/stats", timeout=10).json()
+
+
+def _fake_nuclei_dir(work: str) -> str:
+    bin_dir = os.path.join(work, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    shim = os.path.join(bin_dir, "nuclei")
+    script = os.path.join(ROOT, "bench", "fake_nuclei.py")
+    with open(shim, "w", encoding="utf-8") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+    os.chmod(shim, 0o755)
+    return bin_dir
+
+
+def bench_e2e(
+    export: str, hosts: int, work: str, latency: float, workers: int, verbose: bool
+) -> Dict[str, dict]:
+    targets = os.path.join(work, "targets.txt")
+    with open(targets, "w", encoding="utf-8") as f:
+        f.writelines(f"host{i}.bench.example\n" for i in range(hosts))
+    bin_dir = _fake_nuclei_dir(work)
+
+    results, stub, state = {}, None, None
+    try:
+        for n, (name, extra, reuse) in enumerate(E2E_VARIANTS):
+            if not reuse:
+                if stub:
+                    stub.terminate()
+                    stub.wait()
+                stub, base = _start_stub(latency)
+                state = os.path.join(work, f"state{n}")
+                os.makedirs(state)
+            env = dict(
+                os.environ,
+                PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""),
+                BENCH_EXPORT=export,
+                DD_TOKEN="bench",
+                DD_ID_CACHE=os.path.join(state, "ids.sqlite"),
+                N2D_UPLOAD_STATE=os.path.join(state, "upload_state.json"),
+                N2D_SCAN_LEDGER=os.path.join(state, "ledger.sqlite"),
+                N2D_RUN_DIR=os.path.join(state, "runs"),
+                N2D_SPOOL=os.path.join(state, "spool"),
+                N2D_TEMPLATES_STAMP=os.path.join(state, "templates.stamp"),
+            )
+            report = os.path.join(work, f"{name}.metrics.json")
+            cmd = [
+                sys.executable,
+                os.path.join(ROOT, "main.py"),
+                "--mode",
+                "list",
+                "--targets",
+                targets,
+                "--dd-url",
+                f"{base}/api/v2",
+                "--out-dir",
+                os.path.join(work, f"out-{name}"),
+                "--metrics-json",
+                report,
+            ] + [a.format(workers=workers) for a in extra]
+            before = _stub_stats(base)
+            t = time.perf_counter()
+            rc = subprocess.run(
+                cmd,
+                cwd=ROOT,
+                env=env,
+                stdout=None if verbose else subprocess.DEVNULL,
+                stderr=None if verbose else subprocess.STDOUT,
+            ).returncode
+            seconds = time.perf_counter() - t
+            after = _stub_stats(base)
+            calls = {
+                k: v - before["calls"].get(k, 0)
+                for k, v in after["calls"].items()
+                if v - before["calls"].get(k, 0)
+            }
+            with open(report, "r", encoding="utf-8") as f:
+                metrics = json.load(f)
+            results[name] = {
+                "rc": rc,
+                "seconds": round(seconds, 3),
+                "dd_calls": sum(calls.values()),
+                "calls": calls,
+                "uploaded_mb": round(
+                    (after["upload_bytes"] - before["upload_bytes"]) / 2**20, 2
+                ),
+                "stages": {k: v["seconds"] for k, v in metrics["stages"].items()},
+                "counters": metrics["counters"],
+                "peak_rss_mb": round(
+                    metrics["peak_rss_bytes"].get("self", 0) / 2**20, 1
+                ),
+            }
+    finally:
+        if stub:
+            stub.terminate()
+            stub.wait()
+    return results
+
+
+def _print_table(title: str, rows: Dict[str, dict], cols: List[str]) -> None:
+    print(f"\n== {title}")
+    print(f"{'':<26}" + "".join(f"{c:>14}" for c in cols))
+    for name, row in rows.items():
+        print(f"{name:<26}" + "".join(f"{row.get(c, ''):>14}" for c in cols))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(
+        description="Benchmark the parse/split/upload path on synthetic exports.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    p.add_argument("--section", choices=["all", "parse", "e2e"], default="all")
+    p.add_argument("--records", type=int, default=20000)
+    p.add_argument("--hosts", type=int, default=200)
+    p.add_argument("--body-bytes", type=int, default=1024)
+    p.add_argument(
+        "--format",
+        choices=["both", "json", "jsonl"],
+        default="both",
+        help="Export formats for the parse section (e2e uses the first).",
+    )
+    p.add_argument(
+        "--latency", type=float, default=0.02, help="Stub DefectDojo seconds per call."
+    )
+    p.add_argument("--workers", type=int, default=8, help="--upload-workers for e2e.")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--json", help="Also write all results to this file.")
+    p.add_argument("--keep", action="store_true", help="Keep the work directory.")
+    p.add_argument("--verbose", action="store_true", help="Show main.py output.")
+    a = p.parse_args(argv)
+
+    formats = ["json", "jsonl"] if a.format == "both" else [a.format]
+    work = tempfile.mkdtemp(prefix="n2d-bench-")
+    # keep proc's state files (imported by the parse section) out of outputs/
+    os.environ.setdefault("DD_ID_CACHE", os.path.join(work, "ids.sqlite"))
+    os.environ.setdefault("N2D_UPLOAD_STATE", os.path.join(work, "upload_state.json"))
+    results = {
+        "params": {
+            k: getattr(a, k)
+            for k in ("records", "hosts", "body_bytes", "latency", "workers", "seed")
+        }
+    }
+    try:
+        exports = {}
+        for fmt in formats:
+            path = os.path.join(work, f"export.{fmt}")
+            t = time.perf_counter()
+            generate(path, a.records, a.hosts, a.body_bytes, fmt, a.seed)
+            exports[fmt] = path
+            print(
+                f"[INF] {fmt}: {a.records} records, {a.hosts} hosts, "
+                f"{os.path.getsize(path) / 2**20:.1f} MB "
+                f"(generated in {time.perf_counter() - t:.1f}s)"
+            )
+
+        if a.section in ("all", "parse"):
+            for fmt, path in exports.items():
+                rows = bench_parse(path, work, a.verbose)
+                results[f"parse_{fmt}"] = rows
+                _print_table(f"parse ({fmt})", rows, ["seconds", "peak_mb", "result"])
+
+        if a.section in ("all", "e2e"):
+            rows = bench_e2e(
+                exports[formats[0]], a.hosts, work, a.latency, a.workers, a.verbose
+            )
+            results["e2e"] = rows
+            _print_table(
+                f"e2e ({formats[0]}, {a.latency * 1000:.0f} ms/call)",
+                rows,
+                ["rc", "seconds", "dd_calls", "uploaded_mb", "peak_rss_mb"],
+            )
+    finally:
+        if a.keep:
+            print(f"\n[INF] Work directory kept: {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    if a.json:
+        with open(a.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[+] Results written: {a.json}")
+
+
+if __name__ == "__main__":
+    main()
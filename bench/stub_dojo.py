@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Minimal in-memory DefectDojo API v2 stub for benchmarks.
+
+    python -m bench.stub_dojo --port 8081 --latency 0.05
+
+Serves the endpoints proc.dojo_client uses (product_types, products,
+engagements, tests, import-scan, reimport-scan) under /api/v2, with a fixed
+per-request latency. Like DefectDojo, it rejects (400) a product or
+engagement whose product type or product does not exist. GET /stats
+returns request counts. With --port 0 a free
+port is picked; the first stdout line is always "PORT <n>".
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+COLLECTIONS = ("product_types", "products", "engagements", "tests")
+# reference field checked on create -> collection it must exist in
+REFERENCES = {
+    "products": ("prod_type", "product_types"),
+    "engagements": ("product", "products"),
+}
+
+
+class _State:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.db = {c: [] for c in COLLECTIONS}
+        self.calls = {}
+        self.upload_bytes = 0
+
+    def add(self, coll: str, obj: dict) -> dict:
+        with self.lock:
+            obj["id"] = len(self.db[coll]) + 1
+            self.db[coll].append(obj)
+        return obj
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: _State = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code: int, obj) -> None:
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, path: str) -> None:
+        key = f"{self.command} {re.sub(r'/[0-9]+/', '/{id}/', path)}"
+        with self.state.lock:
+            self.state.calls[key] = self.state.calls.get(key, 0) + 1
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            out = bytearray()
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return bytes(out)
+                out += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self):
+        u = urlparse(self.path)
+        if u.path == "/stats":
+            with self.state.lock:
+                return self._send(
+                    200,
+                    {
+                        "calls": dict(self.state.calls),
+                        "objects": {k: len(v) for k, v in self.state.db.items()},
+                        "upload_bytes": self.state.upload_bytes,
+                    },
+                )
+        time.sleep(self.state.latency)
+        self._count(u.path)
+        parts = [p for p in u.path.split("/") if p]
+        coll = parts[2] if len(parts) > 2 else ""
+        if coll not in COLLECTIONS:
+            return self._send(404, {"detail": "Not found."})
+        with self.state.lock:
+            items = list(self.state.db[coll])
+        if len(parts) > 3:
+            for it in items:
+                if str(it["id"]) == parts[3]:
+                    return self._send(200, it)
+            return self._send(404, {"detail": "Not found."})
+        q = parse_qs(u.query)
+        for key, vals in q.items():
+            if key not in ("limit", "offset"):
+                items = [i for i in items if str(i.get(key)) == vals[0]]
+        offset = int(q.get("offset", ["0"])[0])
+        limit = int(q.get("limit", ["100"])[0])
+        page = items[offset : offset + limit]
+        nxt = "next" if offset + limit < len(items) else None
+        self._send(200, {"count": len(items), "next": nxt, "results": page})
+
+    def do_POST(self):
+        u = urlparse(self.path)
+        body = self._read_body()
+        time.sleep(self.state.latency)
+        self._count(u.path)
+        parts = [p for p in u.path.split("/") if p]
+        coll = parts[2] if len(parts) > 2 else ""
+        if coll in ("product_types", "products", "engagements"):
+            obj = json.loads(body or b"{}")
+            with self.state.lock:
+                names = {i.get("name") for i in self.state.db[coll]}
+            if coll != "engagements" and obj.get("name") in names:
+                return self._send(400, {"name": ["already exists"]})
+            if coll in REFERENCES:
+                field, ref = REFERENCES[coll]
+                with self.state.lock:
+                    ids = {i["id"] for i in self.state.db[ref]}
+                if obj.get(field) not in ids:
+                    return self._send(
+                        400, {field: ["Invalid pk - object does not exist."]}
+                    )
+            return self._send(201, self.state.add(coll, obj))
+        if coll in ("import-scan", "reimport-scan"):
+            with self.state.lock:
+                self.state.upload_bytes += len(body)
+            findings = body.count(b'"template-id"')
+            m = re.search(rb'name="test"\r\n\r\n(\d+)', body)
+            if coll == "reimport-scan" and m:
+                test_id = int(m.group(1))
+            else:
+                m = re.search(rb'name="engagement"\r\n\r\n(\d+)', body)
+                eng = int(m.group(1)) if m else None
+                test_id = self.state.add(
+                    "tests", {"engagement": eng, "scan_type": "Nuclei Scan"}
+                )["id"]
+            return self._send(
+                201, {"test": test_id, "statistics": {}, "findings_count": findings}
+            )
+        self._send(404, {"detail": "Not found."})
+
+
+def serve(port: int = 0, latency: float = 0.0) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"state": _State(latency)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    p = argparse.ArgumentParser(description="DefectDojo API stub for benchmarks.")
+    p.add_argument("--port", type=int, default=0)
+    p.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    a = p.parse_args()
+    server = serve(a.port, a.latency)
+    print(f"PORT {server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
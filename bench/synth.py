@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic nuclei export generator.
+
+    python -m bench.synth out.json --records 50000 --hosts 500 --body-bytes 2048
+    python -m bench.synth out.jsonl --format jsonl
+
+Records look like nuclei -json-export output (host / matched-at / info /
+request / response ...). Output is deterministic for a given --seed.
+"""
+
+import argparse
+import json
+import random
+import string
+
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+TAGS = ("tech", "panel", "exposure", "misconfig", "cve", "takeover")
+
+
+def _body(rng: random.Random, size: int) -> str:
+    if size <= 0:
+        return ""
+    head = "HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n"
+    filler = "".join(rng.choices(string.ascii_letters + string.digits + " \n", k=64))
+    reps = max(0, size - len(head)) // len(filler) + 1
+    return (head + filler * reps)[:size]
+
+
+def make_record(rng: random.Random, i: int, hosts: int, body_bytes: int) -> dict:
+    h = rng.randrange(hosts)
+    scheme = "https" if h % 3 else "http"
+    host = f"host{h}.bench.example"
+    template = f"bench-template-{rng.randrange(400)}"
+    path = f"/{rng.choice(('', 'admin', 'login', 'api/v1', '.git/config'))}"
+    return {
+        "template-id": template,
+        "template-path": f"/templates/http/{template}.yaml",
+        "info": {
+            "name": f"Synthetic finding {template}",
+            "author": ["bench"],
+            "tags": rng.sample(TAGS, 2),
+            "severity": rng.choice(SEVERITIES),
+        },
+        "type": "http",
+        "host": f"{scheme}://{host}",
+        "port": "443" if scheme == "https" else "80",
+        "scheme": scheme,
+        "url": f"{scheme}://{host}",
+        "matched-at": f"{scheme}://{host}{path}",
+        "ip": f"10.{h >> 16 & 255}.{h >> 8 & 255}.{h & 255}",
+        "timestamp": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}Z",
+        "matcher-status": True,
+        "request": _body(rng, body_bytes // 4),
+        "response": _body(rng, body_bytes),
+    }
+
+
+def generate(
+    out_path: str,
+    records: int,
+    hosts: int,
+    body_bytes: int = 1024,
+    fmt: str = "json",
+    seed: int = 1,
+) -> str:
+    """Write a synthetic export (json = one array like -json-export, jsonl = one record per line)."""
+    rng = random.Random(seed)
+    hosts = max(1, hosts)
+    with open(out_path, "w", encoding="utf-8") as f:
+        if fmt == "jsonl":
+            for i in range(records):
+                f.write(json.dumps(make_record(rng, i, hosts, body_bytes)) + "\n")
+        else:
+            f.write("[")
+            for i in range(records):
+                if i:
+                    f.write(",\n")
+                f.write(json.dumps(make_record(rng, i, hosts, body_bytes)))
+            f.write("]\n")
+    return out_path
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generate a synthetic nuclei export.")
+    p.add_argument("out")
+    p.add_argument("--records", type=int, default=10000)
+    p.add_argument("--hosts", type=int, default=100)
+    p.add_argument("--body-bytes", type=int, default=1024)
+    p.add_argument("--format", choices=["json", "jsonl"], default="json")
+    p.add_argument("--seed", type=int, default=1)
+    a = p.parse_args()
+    generate(a.out, a.records, a.hosts, a.body_bytes, a.format, a.seed)
+    print(f"[+] Wrote {a.records} records / {a.hosts} hosts to {a.out}")
+
+
+if __name__ == "__main__":
+    main()
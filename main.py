@@ -3,18 +3,26 @@
 
 from proc.cli import build_parser
 from proc.pipeline import run_mode_list, run_mode_single
+from proc.worker import run_mode_worker
+from proc.findings_index import run_mode_query
+from proc.metrics import write_reports
 from proc.utils import show_banner
 
-show_banner(title_line="Nuclei2Dojo", ascii_only=False)
-
 
 def main():
     args = build_parser().parse_args()
+    if args.mode != "query":
+        # query output is meant to be piped (--jsonl); keep stdout clean
+        show_banner(title_line="Nuclei2Dojo", ascii_only=False)
     try:
         if args.mode == "list":
-            if not args.targets:
+            if not args.targets and not args.resume:
                 raise SystemExit("[!] Mode list requires --targets <file.txt>.")
             run_mode_list(args)
+        elif args.mode == "worker":
+            run_mode_worker(args)
+        elif args.mode == "query":
+            run_mode_query(args)
         else:
             if not args.target:
                 raise SystemExit("[!] Mode single requires --target <url>.")
@@ -24,6 +32,8 @@ def main():
     except Exception as e:
         print(f"[!] ERROR: {e}")
         raise SystemExit(1)
+    finally:
+        write_reports(args.metrics_json, args.metrics_prom)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from typing import Dict, Optional, Tuple
+
+from .config import (
+    ADAPTIVE_ERROR_HIGH,
+    ADAPTIVE_ERROR_LOW,
+    ADAPTIVE_MIN_REQUESTS,
+    NUCLEI_DEFAULT_RL,
+    NUCLEI_DEFAULT_C,
+)
+
+
+def parse_bounds(value: str) -> Tuple[int, int]:
+    """'MIN,MAX' -> (min, max) for the --adaptive-rl / --adaptive-c options."""
+    try:
+        lo, hi = (int(v) for v in value.split(","))
+    except ValueError:
+        raise ValueError(f"expected MIN,MAX, got {value!r}")
+    if lo < 1 or hi < lo:
+        raise ValueError(f"invalid bounds {value!r}")
+    return lo, hi
+
+
+class AdaptiveController:
+    """
+    Picks nuclei -rl / -c for the next shard from what finished shards observed
+    (nuclei -stats-json), TCP-style: a shard whose error ratio exceeds
+    error_high halves both; a clean shard that actually used its rate limit
+    (throughput near -rl) raises them by half, or by a tenth once a back-off
+    has shown where errors start; anything else keeps them. Values stay
+    within the configured bounds. With a budget (the global --rate-limit) the
+    -rl of the shards running at once never sums to more than it: a shard
+    gets at most what the others left, and release()s it when done.
+    Thread-safe: shards start and finish concurrently.
+    """
+
+    def __init__(
+        self,
+        rl_bounds: Tuple[int, int],
+        c_bounds: Tuple[int, int],
+        rate_limit: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        error_high: float = ADAPTIVE_ERROR_HIGH,
+        error_low: float = ADAPTIVE_ERROR_LOW,
+        min_requests: int = ADAPTIVE_MIN_REQUESTS,
+        budget: Optional[int] = None,
+    ):
+        self.rl_min, self.rl_max = rl_bounds
+        self.c_min, self.c_max = c_bounds
+        self.rate_limit = self._clamp(rate_limit or NUCLEI_DEFAULT_RL, *rl_bounds)
+        self.concurrency = self._clamp(concurrency or NUCLEI_DEFAULT_C, *c_bounds)
+        self.error_high = error_high
+        self.error_low = error_low
+        self.min_requests = min_requests
+        self.budget = budget
+        self._in_flight = 0  # -rl handed to shards that are still running
+        # -rl of the last back-off; growth turns cautious above it
+        self._threshold: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clamp(value: int, lo: int, hi: int) -> int:
+        return max(lo, min(hi, int(value)))
+
+    def next_params(self) -> Tuple[int, int]:
+        """(-rl, -c) for a shard about to start; release() the -rl when it ends."""
+        with self._lock:
+            rl = self.rate_limit
+            if self.budget:
+                rl = max(1, min(rl, self.budget - self._in_flight))
+            self._in_flight += rl
+            return rl, self.concurrency
+
+    def release(self, rate_limit: int) -> None:
+        with self._lock:
+            self._in_flight -= rate_limit
+
+    def observe(
+        self, label: str, rate_limit: int, concurrency: int, stats: Dict[str, float]
+    ) -> None:
+        """Feed the last -stats-json record of a finished shard run with (rl, c)."""
+        requests = stats.get("requests") or 0
+        if requests < self.min_requests:
+            return  # too little traffic to judge
+        errors = stats.get("errors") or 0
+        ratio = errors / requests
+        rps = stats.get("rps") or 0
+        with self._lock:
+            if ratio > self.error_high:
+                rl, c, verdict = rate_limit // 2, concurrency // 2, "backing off"
+                self._threshold = rl
+            elif ratio <= self.error_low and rps >= 0.8 * rate_limit:
+                cautious = self._threshold is not None and rate_limit >= self._threshold
+                step = 10 if cautious else 2
+                rl = rate_limit + max(1, rate_limit // step)
+                c = concurrency + max(1, concurrency // step)
+                verdict = "speeding up"
+            else:
+                rl, c, verdict = rate_limit, concurrency, "holding"
+            self.rate_limit = self._clamp(rl, self.rl_min, self.rl_max)
+            self.concurrency = self._clamp(c, self.c_min, self.c_max)
+            print(
+                f"[INF] Adaptive: {label} ran at {rps:.0f} rps with {ratio:.1%} errors; "
+                f"{verdict} -> -rl {self.rate_limit} -c {self.concurrency}"
+            )
@@ -3,19 +3,34 @@
 
 import os
 import argparse
-from .config import DEFAULT_OUT_DIR
+from .config import (
+    DEFAULT_OUT_DIR,
+    DD_POOL_SIZE,
+    DD_RETRIES,
+    CHUNK_MAX_MB,
+    CHUNK_MAX_RECORDS,
+    WORKER_SPOOL_DIR,
+    TEMPLATES_MAX_AGE_HOURS,
+    ADAPTIVE_RL_BOUNDS,
+    ADAPTIVE_C_BOUNDS,
+    PIPELINE_FLUSH_IDLE,
+    PIPELINE_FLUSH_RECORDS,
+    SPLIT_MAX_OPEN_FILES,
+    SPLIT_MEMORY_MB,
+    SPLIT_WORKERS,
+)
 
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
-        description="Nuclei → DefectDojo Automator (modes: list, single)",
+        description="Nuclei → DefectDojo Automator (modes: list, single, worker, query)",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
     p.add_argument(
         "--mode",
-        choices=["list", "single"],
+        choices=["list", "single", "worker", "query"],
         required=True,
-        help="Mode: 'list' for nuclei -list; 'single' for single target scan.",
+        help="Mode: 'list' for nuclei -list; 'single' for single target scan; 'worker' to serve scan jobs from a spool directory; 'query' to search the local findings index.",
     )
     p.add_argument("--targets", help="Path to .txt file of targets (for mode=list).")
     p.add_argument("--target", help="Single target URL (for mode=single).")
@@ -32,13 +47,13 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument(
         "--out-dir",
         default=str(DEFAULT_OUT_DIR),
-        help="Output directory to save JSON (if --save-json).",
+        help="Output directory to save JSON (if --save-json); mode worker uses a jobs/<job id> subdirectory per job.",
     )
     p.add_argument("--save-json", action="store_true", help="Keep JSON scan files.")
     p.add_argument(
         "-s",
         "--severity",
-        help="Nuclei severity filter (e.g. 'info' or 'low,medium,high,critical').",
+        help="Nuclei severity filter (e.g. 'info' or 'low,medium,high,critical'); also filters --mode query.",
     )
     p.add_argument(
         "--scan-profile",
@@ -64,4 +79,264 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Run ‘nuclei -ut’ before the scan begins.",
     )
+    p.add_argument(
+        "--templates-max-age",
+        type=float,
+        default=TEMPLATES_MAX_AGE_HOURS,
+        metavar="HOURS",
+        help="With -ut: skip the update if the last one finished less than HOURS ago (0 = update every run). Concurrent runs share one update.",
+    )
+    p.add_argument(
+        "--update-templates-background",
+        action="store_true",
+        help="With -ut: update templates while targets are preprocessed; the scan waits for it before starting.",
+    )
+    p.add_argument(
+        "--spool",
+        default=str(WORKER_SPOOL_DIR),
+        help="Mode worker: spool directory; jobs are JSON files dropped into <spool>/incoming "
+        '(e.g. {"target": "https://a.example"} or {"targets": [...], "severity": "high"}).',
+    )
+    p.add_argument(
+        "--worker-jobs",
+        type=int,
+        default=2,
+        help="Mode worker: max jobs run at once (--rate-limit is split between them).",
+    )
+    p.add_argument(
+        "--poll-interval",
+        type=float,
+        default=2.0,
+        help="Mode worker: seconds between spool checks.",
+    )
+    p.add_argument(
+        "--exit-when-idle",
+        action="store_true",
+        help="Mode worker: exit once the spool is empty and no job is running.",
+    )
+    p.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help="Write a JSON run report (stage timings, DefectDojo latency histograms, bytes, peak RSS) here at the end of the run. Mode worker rewrites it after every job, with totals since the worker started.",
+    )
+    p.add_argument(
+        "--metrics-prom",
+        metavar="PATH",
+        help="Also write the run report in Prometheus text format (e.g. into node_exporter's textfile collector directory).",
+    )
+    p.add_argument(
+        "--upload-workers",
+        type=int,
+        default=1,
+        help="Number of host files uploaded to DefectDojo concurrently (mode=list).",
+    )
+    p.add_argument(
+        "--dd-rate-limit",
+        type=float,
+        help="Max DefectDojo API requests per second across all upload workers.",
+    )
+    p.add_argument(
+        "--dd-pool-size",
+        type=int,
+        default=DD_POOL_SIZE,
+        help="Keep-alive HTTP connections pooled for DefectDojo (or ENV DD_POOL_SIZE).",
+    )
+    p.add_argument(
+        "--dd-retries",
+        type=int,
+        default=DD_RETRIES,
+        help="Retries with exponential backoff for failed DefectDojo lookups and 429s (or ENV DD_RETRIES).",
+    )
+    p.add_argument(
+        "--reimport",
+        action="store_true",
+        help="Reuse one stable engagement/test per product and upload via /reimport-scan/ instead of a new engagement per run.",
+    )
+    p.add_argument(
+        "--force-upload",
+        action="store_true",
+        help="Upload every host even if its findings fingerprint matches the last successful upload.",
+    )
+    p.add_argument(
+        "--chunk-max-mb",
+        type=int,
+        default=CHUNK_MAX_MB,
+        help="Import hosts whose upload file exceeds this size in chunks of at most this size (0 = never chunk).",
+    )
+    p.add_argument(
+        "--chunk-max-records",
+        type=int,
+        default=CHUNK_MAX_RECORDS,
+        help="Max findings per chunk when a host is imported in chunks.",
+    )
+    p.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Forget persisted DefectDojo product/product-type IDs for this --dd-url before running.",
+    )
+    p.add_argument(
+        "--dedupe-targets",
+        action="store_true",
+        help="Mode list: drop duplicate targets (same canonical host + scheme + port) before scanning.",
+    )
+    p.add_argument(
+        "--skip-scanned-within",
+        type=float,
+        metavar="HOURS",
+        help="Mode list: skip hosts scanned successfully within the last HOURS (local scan ledger).",
+    )
+    p.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Mode list: split targets into N shards scanned by N concurrent nuclei processes (--rate-limit is divided between them).",
+    )
+    p.add_argument(
+        "--shard-by-host",
+        action="store_true",
+        help="Assign targets to shards by a stable hash of their canonical host instead of round-robin.",
+    )
+    p.add_argument(
+        "--shard-timeout",
+        type=int,
+        default=3600,
+        help="Per-shard nuclei timeout in seconds; failed shards are reported and skipped.",
+    )
+    p.add_argument(
+        "--shard-parallel",
+        type=int,
+        help="Max shards scanned at once (default: all); the rest start as earlier ones finish.",
+    )
+    p.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="With --shards: run nuclei with -stats-json and tune -rl/-c of later shards from the observed throughput and error rate.",
+    )
+    p.add_argument(
+        "--adaptive-rl",
+        default=ADAPTIVE_RL_BOUNDS,
+        metavar="MIN,MAX",
+        help="With --adaptive: bounds for the per-shard -rl; with --rate-limit, the shards running at once never exceed that in total.",
+    )
+    p.add_argument(
+        "--adaptive-c",
+        default=ADAPTIVE_C_BOUNDS,
+        metavar="MIN,MAX",
+        help="With --adaptive: bounds for the per-shard -c.",
+    )
+    p.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Mode list: skip the scan and upload the hosts of an earlier run that failed or never got uploaded.",
+    )
+    p.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Mode list: stream nuclei -jsonl output and upload hosts while the scan is still running.",
+    )
+    p.add_argument(
+        "--flush-records",
+        type=int,
+        default=PIPELINE_FLUSH_RECORDS,
+        help="With --pipeline: upload a host once this many findings are pending.",
+    )
+    p.add_argument(
+        "--flush-idle",
+        type=float,
+        default=PIPELINE_FLUSH_IDLE,
+        help="With --pipeline: upload a host after this many seconds without new findings.",
+    )
+    p.add_argument(
+        "--compact-json",
+        action="store_true",
+        help="Write per-host upload files without indentation/whitespace.",
+    )
+    p.add_argument(
+        "--max-raw-bytes",
+        type=int,
+        help="Truncate raw request/response fields above this size in upload files (a sha256 of the full value is kept).",
+    )
+    p.add_argument(
+        "--drop-raw",
+        action="store_true",
+        help="Drop raw request/response fields from upload files (a sha256 of each is kept).",
+    )
+    p.add_argument(
+        "--gzip-host-files",
+        action="store_true",
+        help="Store per-host files gzip-compressed on disk (uploaded decompressed).",
+    )
+    p.add_argument(
+        "--stream-split",
+        action="store_true",
+        help="Parse the nuclei export incrementally and write per-host files as records arrive (bounded memory).",
+    )
+    p.add_argument(
+        "--split-max-open-files",
+        type=int,
+        default=SPLIT_MAX_OPEN_FILES,
+        help="Max per-host files kept open at once by --stream-split.",
+    )
+    p.add_argument(
+        "--split-memory-mb",
+        type=int,
+        default=SPLIT_MEMORY_MB,
+        help="Memory ceiling (MB) for records buffered by --stream-split before flushing to disk.",
+    )
+    p.add_argument(
+        "--split-workers",
+        type=int,
+        default=SPLIT_WORKERS,
+        help="Processes that split a JSONL export (e.g. merged --shards output) in parallel byte ranges; 0 = one per CPU. Output is the same as --stream-split.",
+    )
+    p.add_argument(
+        "--index",
+        action="store_true",
+        help="Record this run's findings (host, template-id, severity, matched-at) in the local findings index searched by --mode query (or ENV N2D_FINDINGS_INDEX for its path).",
+    )
+    p.add_argument(
+        "--host",
+        help="Mode query: only this host (a URL is reduced to its host; '*' and '?' are wildcards).",
+    )
+    p.add_argument(
+        "--template",
+        help="Mode query: only this template-id ('*' and '?' are wildcards, e.g. 'CVE-2024-*').",
+    )
+    p.add_argument(
+        "--since",
+        metavar="WHEN",
+        help="Mode query: only runs indexed since WHEN: an age (30m, 12h, 7d, 2w) or a date (2024-05-01[T12:00]).",
+    )
+    p.add_argument(
+        "--until",
+        metavar="WHEN",
+        help="Mode query: only runs indexed before WHEN (same format as --since).",
+    )
+    p.add_argument(
+        "--run",
+        metavar="RUN_ID",
+        help="Mode query: only this run ('latest' and 'previous' work too).",
+    )
+    p.add_argument(
+        "--group-by",
+        choices=["host", "template", "severity", "run"],
+        help="Mode query: print finding counts per host/template/severity/run instead of the findings.",
+    )
+    p.add_argument(
+        "--diff",
+        nargs="*",
+        metavar="RUN_ID",
+        help="Mode query: findings new in and gone from the second run versus the first (default: previous latest).",
+    )
+    p.add_argument(
+        "--limit",
+        type=int,
+        default=1000,
+        help="Mode query: max rows printed (0 = all).",
+    )
+    p.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="Mode query: print results as JSON lines.",
+    )
     return p
@@ -14,6 +14,77 @@ API_KEY = os.environ.get("DD_TOKEN", "")
 PROD_TYPE_NAME = os.environ.get("DD_PROD_TYPE_NAME", "Research and Development")
 PROD_TYPE_ID_ENV = os.environ.get("DD_PROD_TYPE_ID")
 
+DD_POOL_SIZE = int(os.environ.get("DD_POOL_SIZE", "10"))
+DD_RETRIES = int(os.environ.get("DD_RETRIES", "3"))
+DD_BACKOFF_BASE = 0.5  # seconds, doubled per attempt
+DD_BACKOFF_MAX = 30.0
+# in-flight request cap of the asyncio client (proc.dojo_async)
+DD_ASYNC_CONCURRENCY = int(os.environ.get("DD_ASYNC_CONCURRENCY", "50"))
+
+DD_CACHE_TTL = int(os.environ.get("DD_CACHE_TTL", "3600"))  # seconds
+DD_CACHE_SIZE = int(os.environ.get("DD_CACHE_SIZE", "100000"))
+DD_PREFETCH_PAGE_SIZE = 250
+DD_PREFETCH_MIN_HOSTS = 20  # below this, per-host lookups are cheaper than a sweep
+
+# local state kept across runs
+DD_ID_CACHE_PATH = Path(
+    os.environ.get("DD_ID_CACHE", str(DEFAULT_OUT_DIR / "dojo_id_cache.sqlite"))
+)
+SCAN_LEDGER_PATH = Path(
+    os.environ.get("N2D_SCAN_LEDGER", str(DEFAULT_OUT_DIR / "scan_ledger.sqlite"))
+)
+UPLOAD_STATE_PATH = Path(
+    os.environ.get(
+        "N2D_UPLOAD_STATE", str(DEFAULT_OUT_DIR / "upload_fingerprints.json")
+    )
+)
+WORKER_SPOOL_DIR = Path(os.environ.get("N2D_SPOOL", str(DEFAULT_OUT_DIR / "spool")))
+# a running job whose file was not touched for this long lost its worker
+WORKER_LEASE_SEC = int(os.environ.get("N2D_WORKER_LEASE", "60"))
+TEMPLATES_STAMP_PATH = Path(
+    os.environ.get(
+        "N2D_TEMPLATES_STAMP", str(DEFAULT_OUT_DIR / "templates_updated.stamp")
+    )
+)
+RUN_JOURNAL_DIR = Path(os.environ.get("N2D_RUN_DIR", str(DEFAULT_OUT_DIR / "runs")))
+FINDINGS_INDEX_PATH = Path(
+    os.environ.get("N2D_FINDINGS_INDEX", str(DEFAULT_OUT_DIR / "findings_index.sqlite"))
+)
+FINDINGS_INDEX_BATCH = 20000  # rows per insert transaction while indexing
+
+REIMPORT_ENGAGEMENT_NAME = os.environ.get("DD_REIMPORT_ENGAGEMENT", "Nuclei (reimport)")
+REIMPORT_ENGAGEMENT_DAYS = 365
+
+# hosts whose upload file exceeds this are imported in chunks (0 MB = never)
+CHUNK_MAX_MB = int(os.environ.get("N2D_CHUNK_MAX_MB", "32"))
+CHUNK_MAX_BYTES = CHUNK_MAX_MB * 1024 * 1024
+CHUNK_MAX_RECORDS = int(os.environ.get("N2D_CHUNK_MAX_RECORDS", "2000"))
+
+PIPELINE_FLUSH_RECORDS = 500
+PIPELINE_FLUSH_IDLE = 120  # seconds without new findings before a host is flushed
+
+SPLIT_MAX_OPEN_FILES = int(os.environ.get("N2D_SPLIT_MAX_OPEN_FILES", "64"))
+SPLIT_MEMORY_MB = int(os.environ.get("N2D_SPLIT_MEMORY_MB", "64"))
+SPLIT_WORKERS = int(os.environ.get("N2D_SPLIT_WORKERS", "1"))
+# smaller JSONL exports are split serially: process start-up would dominate
+SPLIT_PARALLEL_MIN_MB = int(os.environ.get("N2D_SPLIT_PARALLEL_MIN_MB", "64"))
+# distinct URL/host strings whose canonical host is memoized during a split
+HOST_CACHE_SIZE = int(os.environ.get("N2D_HOST_CACHE_SIZE", "65536"))
+# auto = orjson, else msgspec, else stdlib json (see proc/jsoncodec.py)
+JSON_BACKEND = os.environ.get("N2D_JSON_BACKEND", "auto").strip().lower()
+
+TEMPLATES_MAX_AGE_HOURS = float(os.environ.get("N2D_TEMPLATES_MAX_AGE", "6"))
+
+# nuclei's own -rl/-c defaults, the adaptive controller's starting point
+NUCLEI_DEFAULT_RL = 150
+NUCLEI_DEFAULT_C = 25
+NUCLEI_STATS_INTERVAL = 5  # seconds between -stats-json records
+ADAPTIVE_ERROR_HIGH = 0.05  # error ratio above which a shard backs off
+ADAPTIVE_ERROR_LOW = 0.01  # at or below this a saturated shard speeds up
+ADAPTIVE_MIN_REQUESTS = 50  # shards with fewer requests are not judged
+ADAPTIVE_RL_BOUNDS = os.environ.get("N2D_ADAPTIVE_RL", "10,500")
+ADAPTIVE_C_BOUNDS = os.environ.get("N2D_ADAPTIVE_C", "5,100")
+
 ASM_INCLUDE_TAGS = (
     "exposure,misconfig,panel,default-login,tech,fingerprint,cve,takeover,web"
 )
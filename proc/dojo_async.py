@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+asyncio DefectDojo client for long-running services (an outside async worker)
+that keep many imports in flight at once. Needs the optional httpx package
+(pip install httpx); the CLI itself uses the synchronous client in
+proc.dojo_client and runs without it.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+from .config import (
+    PROD_TYPE_ID_ENV,
+    PROD_TYPE_NAME,
+    HEADERS_JSON,
+    HEADERS_AUTH,
+    DD_RETRIES,
+    DD_BACKOFF_BASE,
+    DD_BACKOFF_MAX,
+    DD_CACHE_SIZE,
+    DD_CACHE_TTL,
+    DD_ASYNC_CONCURRENCY,
+)
+from .cache import TTLCache
+from .id_cache import IdCache
+from .multipart import MultipartFileBody
+from .utils import is_gzip_file, utc_today
+from .dojo_client import (
+    RETRY_STATUSES,
+    _json_or_none,
+    _results_from_data,
+    _retry_after_seconds,
+    extract_findings_count,
+    extract_test_id,
+)
+
+UPLOAD_BLOCK_SIZE = 64 * 1024
+
+__all__ = ["AsyncDojoClient", "extract_findings_count", "extract_test_id"]
+
+
+async def _aiter_body(body: MultipartFileBody):
+    # file reads go to a thread so a slow disk never stalls the event loop
+    while True:
+        chunk = await asyncio.to_thread(body.read, UPLOAD_BLOCK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+class AsyncDojoClient:
+    """
+    asyncio counterpart of DojoClient (same retry, caching and product-type
+    rules) for one base URL + token. At most `concurrency` requests are in
+    flight at once, however many coroutines call it; `rate_limit` optionally
+    caps requests started per second. Host files are streamed from disk as
+    multipart bodies. Use as `async with AsyncDojoClient(...) as dd:`.
+    """
+
+    def __init__(
+        self,
+        dd_url: str,
+        token: str,
+        concurrency: int = DD_ASYNC_CONCURRENCY,
+        retries: int = DD_RETRIES,
+        backoff_base: float = DD_BACKOFF_BASE,
+        backoff_max: float = DD_BACKOFF_MAX,
+        rate_limit: Optional[float] = None,
+        id_cache: Optional[IdCache] = None,
+    ):
+        if httpx is None:
+            raise RuntimeError(
+                "AsyncDojoClient needs httpx. Install it with 'pip install httpx'."
+            )
+        self.dd_url = dd_url.rstrip("/")
+        self.retries = max(0, retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.headers_json = HEADERS_JSON(token)
+        self.headers_auth = HEADERS_AUTH(token)
+        concurrency = max(1, concurrency)
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            timeout=30,
+        )
+        self._sem = asyncio.Semaphore(concurrency)
+        self._interval = 1.0 / rate_limit if rate_limit and rate_limit > 0 else 0.0
+        self._next_slot = 0.0
+        self.id_cache = id_cache
+        self._pt_lock = asyncio.Lock()
+        # one create per product name, however many jobs hit a new host at once;
+        # a name's lock lives only while a coroutine holds or waits for it
+        self._product_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        self.product_types = TTLCache(DD_CACHE_SIZE, DD_CACHE_TTL)
+        self.products = TTLCache(DD_CACHE_SIZE, DD_CACHE_TTL)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _backoff(self, attempt: int) -> float:
+        cap = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return random.uniform(cap / 2, cap)
+
+    async def _throttle(self) -> None:
+        if not self._interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[MultipartFileBody] = None,
+        **kw,
+    ):
+        url = f"{self.dd_url}{path}"
+        idempotent = method in ("GET", "HEAD", "OPTIONS")
+        attempt = 0
+        while True:
+            if body is not None:
+                # re-send multipart bodies from the start
+                body.seek(0)
+                kw["content"] = _aiter_body(body)
+            await self._throttle()
+            try:
+                async with self._sem:
+                    r = await self.client.request(method, url, **kw)
+            except httpx.TransportError as e:
+                if not idempotent or attempt >= self.retries:
+                    raise
+                delay = self._backoff(attempt)
+                reason = type(e).__name__
+            else:
+                retryable = r.status_code == 429 or (
+                    idempotent and r.status_code in RETRY_STATUSES
+                )
+                if not retryable or attempt >= self.retries:
+                    return r
+                delay = self._backoff(attempt)
+                retry_after = _retry_after_seconds(r)
+                if r.status_code == 429 and retry_after is not None:
+                    delay = min(retry_after, self.backoff_max)
+                reason = f"HTTP {r.status_code}"
+            attempt += 1
+            print(
+                f"[WRN] {method} {path}: {reason}; retry {attempt}/{self.retries} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def _get(self, path: str, **kw):
+        return await self._request("GET", path, headers=self.headers_auth, **kw)
+
+    async def _post_json(self, path: str, payload: dict):
+        return await self._request(
+            "POST", path, headers=self.headers_json, content=json.dumps(payload)
+        )
+
+    async def _exists(self, path: str) -> bool:
+        """Existence probe used to validate cached IDs after a failed write."""
+        r = await self._get(path)
+        if r.status_code == 404:
+            return False
+        r.raise_for_status()
+        return True
+
+    async def _find_by_name(self, path: str, name: str):
+        r = await self._get(path, params={"name": name})
+        r.raise_for_status()
+        for item in _results_from_data(_json_or_none(r)):
+            if isinstance(item, dict) and item.get("name") == name:
+                return item
+        return None
+
+    async def ensure_product_type(self) -> dict:
+        if PROD_TYPE_ID_ENV:
+            try:
+                return {"id": int(PROD_TYPE_ID_ENV), "name": f"ENV:{PROD_TYPE_ID_ENV}"}
+            except ValueError:
+                print("[WRN] DD_PROD_TYPE_ID is not an integer; ignored.")
+        pt = self.product_types.get(PROD_TYPE_NAME)
+        if pt:
+            return pt
+        async with self._pt_lock:
+            pt = self.product_types.get(PROD_TYPE_NAME)
+            if pt:
+                return pt
+            if self.id_cache:
+                pt_id = self.id_cache.get_product_type(self.dd_url, PROD_TYPE_NAME)
+                if pt_id is not None:
+                    pt = {"id": pt_id, "name": PROD_TYPE_NAME}
+                    self.product_types.set(PROD_TYPE_NAME, pt)
+                    return pt
+            pt = await self._find_by_name("/product_types/", PROD_TYPE_NAME)
+            if not pt:
+                print(f"[INF] Creating Product Type: {PROD_TYPE_NAME}")
+                r = await self._post_json(
+                    "/product_types/",
+                    {
+                        "name": PROD_TYPE_NAME,
+                        "description": f"Auto-created {datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                    },
+                )
+                r.raise_for_status()
+                pt = _json_or_none(r)
+                if not isinstance(pt, dict) or pt.get("id") is None:
+                    raise RuntimeError("No available Product Type.")
+            self.product_types.set(PROD_TYPE_NAME, pt)
+            if self.id_cache:
+                self.id_cache.set_product_type(self.dd_url, PROD_TYPE_NAME, pt["id"])
+            return pt
+
+    async def ensure_product(self, name: str) -> dict:
+        prod = self.products.get(name)
+        if prod:
+            return prod
+        lock = self._product_locks.get(name)
+        if lock is None:
+            lock = self._product_locks[name] = asyncio.Lock()
+        async with lock:
+            return await self._ensure_product(name)
+
+    def forget_product(self, name: str) -> None:
+        self.products.pop(name)
+        if self.id_cache:
+            self.id_cache.drop_product(self.dd_url, name)
+
+    async def _ensure_product(self, name: str) -> dict:
+        prod = self.products.get(name)
+        if not prod and self.id_cache:
+            pid = self.id_cache.get_product(self.dd_url, name)
+            if pid is not None:
+                prod = {"id": pid, "name": name}
+        if not prod:
+            prod = await self._find_by_name("/products/", name)
+        if not prod:
+            pt = await self.ensure_product_type()
+            print(f"[INF] Creating product: {name}")
+            payload = {
+                "name": name,
+                "description": f"Product auto-created {datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                "prod_type": pt.get("id"),
+            }
+            r = await self._post_json("/products/", payload)
+            if r.status_code == 400:
+                # created meanwhile by a concurrent job
+                prod = await self._find_by_name("/products/", name)
+            if (
+                not prod
+                and r.status_code in (400, 404)
+                and pt.get("id") is not None
+                and not PROD_TYPE_ID_ENV
+                and not await self._exists(f"/product_types/{pt['id']}/")
+            ):
+                print(
+                    f"[WRN] Cached Product Type id={pt['id']} is gone; resolving again"
+                )
+                self.product_types.pop(PROD_TYPE_NAME)
+                if self.id_cache:
+                    self.id_cache.drop_product_type(self.dd_url, PROD_TYPE_NAME)
+                payload["prod_type"] = (await self.ensure_product_type()).get("id")
+                r = await self._post_json("/products/", payload)
+            if not prod:
+                r.raise_for_status()
+                prod = _json_or_none(r)
+            if not isinstance(prod, dict) or prod.get("id") is None:
+                raise RuntimeError(f"Product '{name}' was not created.")
+            if self.id_cache:
+                self.id_cache.set_product(
+                    self.dd_url, name, prod["id"], prod.get("prod_type")
+                )
+        prod = {"id": prod["id"], "name": name}
+        self.products.set(name, prod)
+        return prod
+
+    async def create_engagement(
+        self, product_id: int, name: str, days: int = 1
+    ) -> dict:
+        start = datetime.now(timezone.utc).date()
+        r = await self._post_json(
+            "/engagements/",
+            {
+                "name": name,
+                "product": product_id,
+                "target_start": start.isoformat(),
+                "target_end": (start + timedelta(days=days)).isoformat(),
+                "status": "In Progress",
+                "engagement_type": "CI/CD",
+                "deduplication_on_engagement": True,
+            },
+        )
+        r.raise_for_status()
+        data = _json_or_none(r)
+        return data if isinstance(data, dict) else {"id": None}
+
+    async def ensure_product_engagement(
+        self, name: str, engagement_name: str, days: int = 1
+    ):
+        """
+        ensure_product + create_engagement. As in DojoClient, a cached product
+        ID is only checked (GET /products/<id>/) when the engagement create is
+        rejected; if it is gone, the entry is dropped and the product resolved
+        again once.
+        """
+        prod = await self.ensure_product(name)
+        try:
+            eng = await self.create_engagement(prod["id"], engagement_name, days)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in (400, 404):
+                raise
+            if await self._exists(f"/products/{prod['id']}/"):
+                raise
+            print(
+                f"[WRN] Cached product '{name}' (id={prod['id']}) is gone; resolving again"
+            )
+            self.forget_product(name)
+            prod = await self.ensure_product(name)
+            eng = await self.create_engagement(prod["id"], engagement_name, days)
+        return prod, eng
+
+    async def _upload_scan(self, path: str, file_path: str, data_form: dict):
+        name = os.path.basename(file_path)
+        gz = is_gzip_file(file_path)
+        if gz and name.endswith(".gz"):
+            name = name[:-3]
+        with MultipartFileBody(
+            data_form, "file", file_path, name, decompress=gz
+        ) as body:
+            headers = {**self.headers_auth, "Content-Type": body.content_type}
+            if body.length is not None:
+                headers["Content-Length"] = str(body.length)
+            r = await self._request(
+                "POST", path, body=body, headers=headers, timeout=120
+            )
+        r.raise_for_status()
+        data = _json_or_none(r)
+        if data is None:
+            print(
+                f"[WRN] {path} not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
+            )
+        return data
+
+    async def import_scan(
+        self, file_path: str, engagement_id: int, scan_date: str = None
+    ):
+        data_form = {
+            "engagement": str(engagement_id),
+            "scan_type": "Nuclei Scan",
+            "active": "true",
+            "verified": "false",
+            "scan_date": scan_date or utc_today(),
+            "minimum_severity": "Info",
+            "close_old_findings": "false",
+            "push_to_jira": "false",
+        }
+        return await self._upload_scan("/import-scan/", file_path, data_form)
+
+    async def reimport_scan(self, file_path: str, test_id: int, scan_date: str = None):
+        data_form = {
+            "test": str(test_id),
+            "scan_type": "Nuclei Scan",
+            "active": "true",
+            "verified": "false",
+            "scan_date": scan_date or utc_today(),
+            "minimum_severity": "Info",
+            "close_old_findings": "false",
+            "push_to_jira": "false",
+        }
+        return await self._upload_scan("/reimport-scan/", file_path, data_form)
+
+    async def import_host_file(self, host: str, file_path: str, engagement_name: str):
+        """ensure product + engagement, import the file; returns the findings count."""
+        _, eng = await self.ensure_product_engagement(host, engagement_name)
+        res = await self.import_scan(file_path, eng.get("id"))
+        return extract_findings_count(res)
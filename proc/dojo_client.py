@@ -1,19 +1,71 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import gzip
+import random
 import requests
 import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from .config import PROD_TYPE_ID_ENV, PROD_TYPE_NAME, HEADERS_JSON, HEADERS_AUTH
-from .utils import utc_today
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    PROD_TYPE_ID_ENV,
+    PROD_TYPE_NAME,
+    HEADERS_JSON,
+    HEADERS_AUTH,
+    DD_POOL_SIZE,
+    DD_RETRIES,
+    DD_BACKOFF_BASE,
+    DD_BACKOFF_MAX,
+    DD_CACHE_SIZE,
+    DD_CACHE_TTL,
+    DD_PREFETCH_PAGE_SIZE,
+    REIMPORT_ENGAGEMENT_NAME,
+    REIMPORT_ENGAGEMENT_DAYS,
+)
+from . import jsoncodec
+from .cache import TTLCache
+from .id_cache import IdCache
+from .metrics import METRICS
+from .multipart import MultipartFileBody
+from .utils import is_gzip_file, utc_today
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class RateLimiter:
+    """Spaces calls evenly so that at most `per_second` start each second (thread-safe)."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_RATE_LIMITER: Optional[RateLimiter] = None
+
+
+def _throttle() -> None:
+    limiter = _RATE_LIMITER
+    if limiter is not None:
+        limiter.wait()
 
 
 def _json_or_none(r: requests.Response) -> Any:
     try:
-        return r.json()
+        return jsoncodec.loads(r.content)
     except ValueError:
         return None
 
@@ -29,168 +81,659 @@ def _results_from_data(data: Any) -> List[Any]:
     return []
 
 
-def dd_list_product_types(dd_url: str, token: str):
-    url = f"{dd_url}/product_types/"
-    r = requests.get(url, headers=HEADERS_AUTH(token), timeout=30)
-    r.raise_for_status()
-    data = _json_or_none(r)
-    if data is None:
-        print(
-            f"[WRN] /product_types/ not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
+def _retry_after_seconds(r: requests.Response) -> Optional[float]:
+    val = r.headers.get("Retry-After")
+    if not val:
+        return None
+    try:
+        return max(0.0, float(val))
+    except ValueError:
+        return None  # HTTP-date form: fall back to our own backoff
+
+
+class DojoClient:
+    """
+    DefectDojo API v2 client bound to one base URL + token.
+    Holds a pooled keep-alive session; GETs are retried on connection errors and
+    429/5xx with exponential backoff + jitter, any call is retried on 429
+    (the server did not process it) honoring Retry-After.
+    Product-type and product lookups are cached by name (TTL + LRU) and, when an
+    IdCache is given, persisted across runs.
+    """
+
+    def __init__(
+        self,
+        dd_url: str,
+        token: str,
+        pool_size: int = DD_POOL_SIZE,
+        retries: int = DD_RETRIES,
+        backoff_base: float = DD_BACKOFF_BASE,
+        backoff_max: float = DD_BACKOFF_MAX,
+        id_cache: Optional[IdCache] = None,
+    ):
+        self.dd_url = dd_url.rstrip("/")
+        self.retries = max(0, retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.headers_json = HEADERS_JSON(token)
+        self.headers_auth = HEADERS_AUTH(token)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True
         )
-        return []
-    return _results_from_data(data)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.id_cache = id_cache
+        self._pt_lock = threading.Lock()
+        self.product_types = TTLCache(DD_CACHE_SIZE, DD_CACHE_TTL)
+        self.products = TTLCache(DD_CACHE_SIZE, DD_CACHE_TTL)
+        self.reimport_targets = TTLCache(DD_CACHE_SIZE, DD_CACHE_TTL)
+        # while set and in the future, a product cache miss means "does not exist"
+        self._products_complete_until = 0.0
 
+    def close(self) -> None:
+        self.session.close()
 
-def dd_get_product_type_by_name(dd_url: str, token: str, name: str):
-    url = f"{dd_url}/product_types/?name={name}"
-    r = requests.get(url, headers=HEADERS_AUTH(token), timeout=30)
-    r.raise_for_status()
-    data = _json_or_none(r)
-    if data is None:
-        print(
-            f"[WRN] /product_types/?name= not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
+    def _backoff(self, attempt: int) -> float:
+        cap = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return random.uniform(cap / 2, cap)
+
+    def _request(self, method: str, path: str, **kw) -> requests.Response:
+        url = f"{self.dd_url}{path}"
+        idempotent = method in ("GET", "HEAD", "OPTIONS")
+        attempt = 0
+        while True:
+            if attempt:
+                # re-send multipart bodies from the start
+                for v in (kw.get("files") or {}).values():
+                    if isinstance(v, tuple) and hasattr(v[1], "seek"):
+                        v[1].seek(0)
+                if hasattr(kw.get("data"), "seek"):
+                    kw["data"].seek(0)
+            _throttle()
+            started = time.perf_counter()
+            try:
+                r = self.session.request(method, url, **kw)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                METRICS.observe_request(method, path, time.perf_counter() - started)
+                if not idempotent or attempt >= self.retries:
+                    raise
+                delay = self._backoff(attempt)
+                reason = type(e).__name__
+            else:
+                METRICS.observe_request(
+                    method, path, time.perf_counter() - started, r.status_code
+                )
+                retryable = r.status_code == 429 or (
+                    idempotent and r.status_code in RETRY_STATUSES
+                )
+                if not retryable or attempt >= self.retries:
+                    return r
+                delay = self._backoff(attempt)
+                retry_after = _retry_after_seconds(r)
+                if r.status_code == 429 and retry_after is not None:
+                    # honored, but a huge value must not park the thread for hours
+                    delay = min(retry_after, self.backoff_max)
+                reason = f"HTTP {r.status_code}"
+                r.close()
+            attempt += 1
+            METRICS.incr("dd_retries")
+            print(
+                f"[WRN] {method} {path}: {reason}; retry {attempt}/{self.retries} in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+    def _get(self, path: str, **kw) -> requests.Response:
+        return self._request("GET", path, headers=self.headers_auth, timeout=30, **kw)
+
+    def _post_json(self, path: str, payload: dict) -> requests.Response:
+        return self._request(
+            "POST",
+            path,
+            headers=self.headers_json,
+            data=jsoncodec.dumpb(payload),
+            timeout=30,
         )
+
+    def list_product_types(self):
+        r = self._get("/product_types/")
+        r.raise_for_status()
+        data = _json_or_none(r)
+        if data is None:
+            print(
+                f"[WRN] /product_types/ not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
+            )
+            return []
+        return _results_from_data(data)
+
+    def get_product_type_by_name(self, name: str):
+        r = self._get("/product_types/", params={"name": name})
+        r.raise_for_status()
+        data = _json_or_none(r)
+        if data is None:
+            print(
+                f"[WRN] /product_types/?name= not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
+            )
+            return None
+        for item in _results_from_data(data):
+            if isinstance(item, dict) and item.get("name") == name:
+                return item
         return None
-    for item in _results_from_data(data):
-        if isinstance(item, dict) and item.get("name") == name:
-            return item
-    return None
 
+    def create_product_type(self, name: str, description: str = ""):
+        payload = {
+            "name": name,
+            "description": description
+            or f"Auto-created {datetime.now().strftime('%Y%m%d_%H%M%S')}",
+        }
+        r = self._post_json("/product_types/", payload)
+        r.raise_for_status()
+        data = _json_or_none(r)
+        return data if isinstance(data, dict) else {"id": None, "name": name}
 
-def dd_create_product_type(dd_url: str, token: str, name: str, description: str = ""):
-    url = f"{dd_url}/product_types/"
-    payload = {
-        "name": name,
-        "description": description
-        or f"Auto-created {datetime.now().strftime('%Y%m%d_%H%M%S')}",
-    }
-    r = requests.post(
-        url, headers=HEADERS_JSON(token), data=json.dumps(payload), timeout=30
-    )
-    r.raise_for_status()
-    data = _json_or_none(r)
-    return data if isinstance(data, dict) else {"id": None, "name": name}
+    def ensure_product_type(self) -> dict:
+        if PROD_TYPE_ID_ENV:
+            try:
+                return {"id": int(PROD_TYPE_ID_ENV), "name": f"ENV:{PROD_TYPE_ID_ENV}"}
+            except ValueError:
+                print("[WRN] DD_PROD_TYPE_ID is not an integer; ignored.")
+        pt = self.product_types.get(PROD_TYPE_NAME)
+        if pt:
+            return pt
+        # serialized so concurrent uploads don't each create the product type
+        with self._pt_lock:
+            pt = self.product_types.get(PROD_TYPE_NAME)
+            if pt:
+                return pt
+            if self.id_cache:
+                pt_id = self.id_cache.get_product_type(self.dd_url, PROD_TYPE_NAME)
+                if pt_id is not None:
+                    pt = {"id": pt_id, "name": PROD_TYPE_NAME}
+                    self.product_types.set(PROD_TYPE_NAME, pt)
+                    return pt
+            pt = self.get_product_type_by_name(PROD_TYPE_NAME)
+            if pt:
+                self._remember_product_type(pt)
+                return pt
+            try:
+                print(f"[INF] Creating Product Type: {PROD_TYPE_NAME}")
+                pt = self.create_product_type(PROD_TYPE_NAME)
+                self._remember_product_type(pt)
+                return pt
+            except Exception as e:
+                print(f"[WRN] Failed to create Product Type: {e}")
+                pts = self.list_product_types()
+                if pts and isinstance(pts, list) and isinstance(pts[0], dict):
+                    print(
+                        f"[INF] Using first Product Type: {pts[0].get('name')} (id={pts[0].get('id')})"
+                    )
+                    return pts[0]
+                raise RuntimeError("No available Product Type.")
 
+    def _remember_product_type(self, pt: dict) -> None:
+        if pt.get("id") is None:
+            return
+        self.product_types.set(PROD_TYPE_NAME, pt)
+        if self.id_cache:
+            self.id_cache.set_product_type(self.dd_url, PROD_TYPE_NAME, pt["id"])
 
-def dd_ensure_product_type(dd_url: str, token: str) -> dict:
-    if PROD_TYPE_ID_ENV:
+    def _exists(self, path: str) -> bool:
+        """Cheap existence probe used to validate cached IDs after a failed write."""
+        r = self._get(path)
+        if r.status_code == 404:
+            return False
+        r.raise_for_status()
+        return True
+
+    def get_product_by_name(self, name: str):
+        r = self._get("/products/", params={"name": name})
+        r.raise_for_status()
+        data = _json_or_none(r)
+        if data is None:
+            print(
+                f"[WRN] /products/?name= not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
+            )
+            return None
+        for item in _results_from_data(data):
+            if isinstance(item, dict) and item.get("name") == name:
+                return item
+        return None
+
+    def create_product(self, name: str, description: str = "") -> dict:
+        pt = self.ensure_product_type()
+        payload = {
+            "name": name,
+            "description": description
+            or f"Product auto-created {datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            "prod_type": pt.get("id"),
+        }
+        r = self._post_json("/products/", payload)
+        if (
+            r.status_code in (400, 404)
+            and pt.get("id") is not None
+            and not PROD_TYPE_ID_ENV
+            and not self._exists(f"/product_types/{pt['id']}/")
+        ):
+            print(f"[WRN] Cached Product Type id={pt['id']} is gone; resolving again")
+            self.product_types.pop(PROD_TYPE_NAME)
+            if self.id_cache:
+                self.id_cache.drop_product_type(self.dd_url, PROD_TYPE_NAME)
+            payload["prod_type"] = self.ensure_product_type().get("id")
+            r = self._post_json("/products/", payload)
+        r.raise_for_status()
+        data = _json_or_none(r)
+        return data if isinstance(data, dict) else {"id": None, "name": name}
+
+    def _remember_product(self, prod: dict, persist: bool = True) -> None:
+        if isinstance(prod, dict) and prod.get("id") is not None and prod.get("name"):
+            self.products.set(prod["name"], {"id": prod["id"], "name": prod["name"]})
+            if persist and self.id_cache:
+                self.id_cache.set_product(
+                    self.dd_url, prod["name"], prod["id"], prod.get("prod_type")
+                )
+
+    def forget_product(self, name: str) -> None:
+        self.products.pop(name)
+        if self.id_cache:
+            self.id_cache.drop_product(self.dd_url, name)
+
+    def uncached_products(self, names: List[str]) -> List[str]:
+        """Names that would need an API lookup (neither in memory nor on disk)."""
+        out = []
+        for name in names:
+            if self.products.get(name):
+                continue
+            if self.id_cache:
+                pid = self.id_cache.get_product(self.dd_url, name)
+                if pid is not None:
+                    self.products.set(name, {"id": pid, "name": name})
+                    continue
+            out.append(name)
+        return out
+
+    def prefetch_products(self, page_size: int = DD_PREFETCH_PAGE_SIZE) -> int:
+        """
+        Page through /products/ once and index every product by name, so later
+        ensure_product calls cost no lookups (and misses go straight to create).
+        """
+        started = time.monotonic()
+        offset, seen = 0, 0
+        while True:
+            r = self._get("/products/", params={"limit": page_size, "offset": offset})
+            r.raise_for_status()
+            data = _json_or_none(r)
+            page = _results_from_data(data)
+            for item in page:
+                self._remember_product(item, persist=False)
+            if self.id_cache:
+                rows = [
+                    (i["name"], i["id"], i.get("prod_type"))
+                    for i in page
+                    if isinstance(i, dict) and i.get("id") is not None and i.get("name")
+                ]
+                self.id_cache.set_products(self.dd_url, rows)
+            seen += len(page)
+            offset += len(page)
+            if not page or not (isinstance(data, dict) and data.get("next")):
+                break
+        if seen <= self.products.maxsize:
+            self._products_complete_until = started + self.products.ttl
+        return seen
+
+    def ensure_product(self, name: str) -> dict:
+        with METRICS.stage("dd_product"):
+            return self._ensure_product(name)
+
+    def _ensure_product(self, name: str) -> dict:
+        prod = self.products.get(name)
+        if not prod and self.id_cache:
+            pid = self.id_cache.get_product(self.dd_url, name)
+            if pid is not None:
+                prod = {"id": pid, "name": name}
+                self.products.set(name, prod)
+        if prod:
+            print(f"[INF] Product exists: {name} (id={prod.get('id')})")
+            return prod
+        if self._products_complete_until < time.monotonic():
+            prod = self.get_product_by_name(name)
+            if prod:
+                self._remember_product(prod)
+                print(f"[INF] Product exists: {name} (id={prod.get('id')})")
+                return prod
+        print(f"[INF] Creating product: {name}")
         try:
-            return {"id": int(PROD_TYPE_ID_ENV), "name": f"ENV:{PROD_TYPE_ID_ENV}"}
-        except ValueError:
-            print("[WRN] DD_PROD_TYPE_ID is not an integer; ignored.")
-    pt = dd_get_product_type_by_name(dd_url, token, PROD_TYPE_NAME)
-    if pt:
-        return pt
-    try:
-        print(f"[INF] Creating Product Type: {PROD_TYPE_NAME}")
-        return dd_create_product_type(dd_url, token, PROD_TYPE_NAME)
-    except Exception as e:
-        print(f"[WRN] Failed to create Product Type: {e}")
-        pts = dd_list_product_types(dd_url, token)
-        if pts and isinstance(pts, list) and isinstance(pts[0], dict):
+            prod = self.create_product(name)
+        except requests.HTTPError as e:
+            # created meanwhile by someone else (index only knew the sweep's state)
+            if e.response is None or e.response.status_code != 400:
+                raise
+            prod = self.get_product_by_name(name)
+            if not prod:
+                raise
+        self._remember_product(prod)
+        return prod
+
+    def create_engagement(self, product_id: int, name: str, days: int = 1) -> dict:
+        with METRICS.stage("dd_engagement"):
+            return self._create_engagement(product_id, name, days)
+
+    def _create_engagement(self, product_id: int, name: str, days: int) -> dict:
+        start = datetime.now(timezone.utc).date().isoformat()
+        end = (datetime.now(timezone.utc).date() + timedelta(days=days)).isoformat()
+        payload = {
+            "name": name,
+            "product": product_id,
+            "target_start": start,
+            "target_end": end,
+            "status": "In Progress",
+            "engagement_type": "CI/CD",
+            "deduplication_on_engagement": True,
+        }
+        r = self._post_json("/engagements/", payload)
+        r.raise_for_status()
+        data = _json_or_none(r)
+        return data if isinstance(data, dict) else {"id": None}
+
+    def ensure_product_engagement(
+        self, name: str, engagement_name: str, days: int = 1
+    ):
+        """
+        ensure_product + create_engagement. A cached product ID is only checked
+        (GET /products/<id>/) when the engagement create is rejected; if it is
+        gone, the entry is dropped and the product resolved again once.
+        """
+        prod = self.ensure_product(name)
+        try:
+            return prod, self.create_engagement(prod.get("id"), engagement_name, days)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in (400, 404):
+                raise
+            if prod.get("id") is None or self._exists(f"/products/{prod['id']}/"):
+                raise
             print(
-                f"[INF] Using first Product Type: {pts[0].get('name')} (id={pts[0].get('id')})"
+                f"[WRN] Cached product '{name}' (id={prod['id']}) is gone; resolving again"
             )
-            return pts[0]
-        raise RuntimeError("No available Product Type.")
+            self.forget_product(name)
+            prod = self.ensure_product(name)
+            return prod, self.create_engagement(prod.get("id"), engagement_name, days)
 
+    def find_engagement(self, product_id: int, name: str):
+        r = self._get("/engagements/", params={"product": product_id, "name": name})
+        r.raise_for_status()
+        for item in _results_from_data(_json_or_none(r)):
+            if isinstance(item, dict) and item.get("name") == name:
+                return item
+        return None
 
-def dd_get_product_by_name(dd_url: str, token: str, name: str):
-    url = f"{dd_url}/products/?name={name}"
-    r = requests.get(url, headers=HEADERS_AUTH(token), timeout=30)
-    r.raise_for_status()
-    data = _json_or_none(r)
-    if data is None:
-        print(
-            f"[WRN] /products/?name= not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
-        )
+    def find_test(self, engagement_id: int):
+        r = self._get("/tests/", params={"engagement": engagement_id})
+        r.raise_for_status()
+        for item in _results_from_data(_json_or_none(r)):
+            if not isinstance(item, dict):
+                continue
+            if item.get("scan_type") in (None, "Nuclei Scan"):
+                return item
         return None
-    for item in _results_from_data(data):
-        if isinstance(item, dict) and item.get("name") == name:
-            return item
-    return None
+
+    def _reimport_target(self, name: str) -> Tuple[int, Optional[int]]:
+        """(engagement_id, test_id or None) of the stable reimport engagement of a product."""
+        target = self.reimport_targets.get(name)
+        if target is None and self.id_cache:
+            target = self.id_cache.get_reimport_target(self.dd_url, name)
+        if target is not None:
+            self.reimport_targets.set(name, target)
+            return target
+        prod = self.ensure_product(name)
+        eng = self.find_engagement(prod.get("id"), REIMPORT_ENGAGEMENT_NAME)
+        test = None
+        if eng:
+            test = self.find_test(eng.get("id"))
+        else:
+            print(f"[INF] Creating engagement '{REIMPORT_ENGAGEMENT_NAME}' for {name}")
+            _, eng = self.ensure_product_engagement(
+                name, REIMPORT_ENGAGEMENT_NAME, days=REIMPORT_ENGAGEMENT_DAYS
+            )
+        target = (eng.get("id"), test.get("id") if test else None)
+        self._remember_reimport_target(name, target)
+        return target
+
+    def _remember_reimport_target(self, name: str, target: Tuple[int, Optional[int]]):
+        self.reimport_targets.set(name, target)
+        if self.id_cache and target[0] is not None:
+            self.id_cache.set_reimport_target(self.dd_url, name, *target)
+
+    def _forget_reimport_target(self, name: str) -> None:
+        self.reimport_targets.pop(name)
+        if self.id_cache:
+            self.id_cache.drop_reimport_target(self.dd_url, name)
+
+    def reimport_product_scan(self, name: str, file_path: str, scan_date: str = None):
+        """
+        Upload into the product's stable engagement/test: reimport-scan when the
+        test exists (unchanged findings are no-ops), import-scan the first time.
+        A cached engagement/test that turns out to be deleted is resolved again once.
+        Returns (api response, test_id).
+        """
+        for attempt in (1, 2):
+            eng_id, test_id = self._reimport_target(name)
+            try:
+                if test_id is not None:
+                    return self.reimport_scan(file_path, test_id, scan_date), test_id
+                res = self.import_scan(file_path, eng_id, scan_date)
+            except requests.HTTPError as e:
+                if attempt == 2 or e.response is None:
+                    raise
+                if e.response.status_code not in (400, 404):
+                    raise
+                probe = f"/tests/{test_id}/" if test_id else f"/engagements/{eng_id}/"
+                if self._exists(probe):
+                    raise
+                print(
+                    f"[WRN] Cached reimport target of '{name}' is gone; resolving again"
+                )
+                self._forget_reimport_target(name)
+                continue
+            test_id = extract_test_id(res)
+            self._remember_reimport_target(name, (eng_id, test_id))
+            return res, test_id
+
+    def _upload_scan(self, path: str, file_path: str, data_form: dict):
+        stage = "dd_reimport" if path.startswith("/reimport") else "dd_import"
+        with METRICS.stage(stage):
+            return self._send_scan(path, file_path, data_form)
+
+    def _send_scan(self, path: str, file_path: str, data_form: dict):
+        name = os.path.basename(file_path)
+        if is_gzip_file(file_path):
+            # gzip is only an on-disk format; DefectDojo gets the plain JSON
+            if name.endswith(".gz"):
+                name = name[:-3]
+            with gzip.open(file_path, "rb") as fh:
+                files = {"file": (name, fh, "application/json")}
+                r = self._request(
+                    "POST",
+                    path,
+                    headers=self.headers_auth,
+                    files=files,
+                    data=data_form,
+                    timeout=120,
+                )
+        else:
+            # streamed from disk, never held in memory
+            with MultipartFileBody(data_form, "file", file_path, name) as body:
+                METRICS.add_bytes("uploaded", len(body))
+                r = self._request(
+                    "POST",
+                    path,
+                    headers={**self.headers_auth, "Content-Type": body.content_type},
+                    data=body,
+                    timeout=120,
+                )
+        r.raise_for_status()
+        data = _json_or_none(r)
+        if data is None:
+            print(
+                f"[WRN] {path} not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
+            )
+        return data
+
+    def import_scan(self, file_path: str, engagement_id: int, scan_date: str = None):
+        if scan_date is None:
+            scan_date = utc_today()
+        data_form = {
+            "engagement": str(engagement_id),
+            "scan_type": "Nuclei Scan",
+            "active": "true",
+            "verified": "false",
+            "scan_date": scan_date,
+            "minimum_severity": "Info",
+            "close_old_findings": "false",
+            "push_to_jira": "false",
+        }
+        return self._upload_scan("/import-scan/", file_path, data_form)
+
+    def reimport_scan(self, file_path: str, test_id: int, scan_date: str = None):
+        """
+        Add findings to an existing test. Old findings are never closed here:
+        callers reimport partial batches of the same scan.
+        """
+        if scan_date is None:
+            scan_date = utc_today()
+        data_form = {
+            "test": str(test_id),
+            "scan_type": "Nuclei Scan",
+            "active": "true",
+            "verified": "false",
+            "scan_date": scan_date,
+            "minimum_severity": "Info",
+            "close_old_findings": "false",
+            "push_to_jira": "false",
+        }
+        return self._upload_scan("/reimport-scan/", file_path, data_form)
+
+
+_CLIENT_OPTS: Dict[str, Any] = {}
+_CLIENTS: Dict[Tuple[str, str], DojoClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def dd_configure(
+    pool_size: Optional[int] = None,
+    retries: Optional[int] = None,
+    rate_limit: Optional[float] = None,
+    id_cache: Optional[IdCache] = None,
+) -> None:
+    """
+    Process-wide client settings used by the dd_* wrappers.
+    rate_limit caps DefectDojo API calls per second across all threads
+    (None/0 = unlimited); id_cache enables the persistent name -> ID cache.
+    """
+    global _RATE_LIMITER
+    _RATE_LIMITER = RateLimiter(rate_limit) if rate_limit and rate_limit > 0 else None
+    opts = {}
+    if pool_size:
+        opts["pool_size"] = pool_size
+    if retries is not None:
+        opts["retries"] = retries
+    if id_cache is not None:
+        opts["id_cache"] = id_cache
+    with _CLIENTS_LOCK:
+        if opts != _CLIENT_OPTS:
+            _CLIENT_OPTS.clear()
+            _CLIENT_OPTS.update(opts)
+            for c in _CLIENTS.values():
+                c.close()
+            _CLIENTS.clear()
+
+
+def get_client(dd_url: str, token: str) -> DojoClient:
+    key = (dd_url.rstrip("/"), token)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = DojoClient(dd_url, token, **_CLIENT_OPTS)
+            _CLIENTS[key] = client
+        return client
+
+
+def dd_list_product_types(dd_url: str, token: str):
+    return get_client(dd_url, token).list_product_types()
+
+
+def dd_get_product_type_by_name(dd_url: str, token: str, name: str):
+    return get_client(dd_url, token).get_product_type_by_name(name)
+
+
+def dd_create_product_type(dd_url: str, token: str, name: str, description: str = ""):
+    return get_client(dd_url, token).create_product_type(name, description)
+
+
+def dd_ensure_product_type(dd_url: str, token: str) -> dict:
+    return get_client(dd_url, token).ensure_product_type()
+
+
+def dd_get_product_by_name(dd_url: str, token: str, name: str):
+    return get_client(dd_url, token).get_product_by_name(name)
 
 
 def dd_create_product(
     dd_url: str, token: str, name: str, description: str = ""
 ) -> dict:
-    pt = dd_ensure_product_type(dd_url, token)
-    url = f"{dd_url}/products/"
-    payload = {
-        "name": name,
-        "description": description
-        or f"Product auto-created {datetime.now().strftime('%Y%m%d_%H%M%S')}",
-        "prod_type": pt.get("id"),
-    }
-    r = requests.post(
-        url, headers=HEADERS_JSON(token), data=json.dumps(payload), timeout=30
-    )
-    r.raise_for_status()
-    data = _json_or_none(r)
-    return data if isinstance(data, dict) else {"id": None, "name": name}
+    return get_client(dd_url, token).create_product(name, description)
 
 
 def dd_ensure_product(dd_url: str, token: str, name: str) -> dict:
-    prod = dd_get_product_by_name(dd_url, token, name)
-    if prod:
-        print(f"[INF] Product exists: {name} (id={prod.get('id')})")
-        return prod
-    print(f"[INF] Creating product: {name}")
-    return dd_create_product(dd_url, token, name)
+    return get_client(dd_url, token).ensure_product(name)
+
+
+def dd_prefetch_products(dd_url: str, token: str) -> int:
+    return get_client(dd_url, token).prefetch_products()
+
+
+def dd_uncached_products(dd_url: str, token: str, names: List[str]) -> List[str]:
+    return get_client(dd_url, token).uncached_products(names)
+
+
+def dd_ensure_product_engagement(
+    dd_url: str, token: str, name: str, engagement_name: str
+):
+    return get_client(dd_url, token).ensure_product_engagement(name, engagement_name)
+
+
+def dd_reimport_product_scan(
+    dd_url: str, token: str, name: str, file_path: str, scan_date: str = None
+):
+    return get_client(dd_url, token).reimport_product_scan(name, file_path, scan_date)
 
 
 def dd_create_engagement(
     dd_url: str, token: str, product_id: int, name: str, days: int = 1
 ) -> dict:
-    url = f"{dd_url}/engagements/"
-    start = datetime.now(timezone.utc).date().isoformat()
-    end = (datetime.now(timezone.utc).date() + timedelta(days=days)).isoformat()
-    payload = {
-        "name": name,
-        "product": product_id,
-        "target_start": start,
-        "target_end": end,
-        "status": "In Progress",
-        "engagement_type": "CI/CD",
-        "deduplication_on_engagement": True,
-    }
-    r = requests.post(
-        url, headers=HEADERS_JSON(token), data=json.dumps(payload), timeout=30
-    )
-    r.raise_for_status()
-    data = _json_or_none(r)
-    return data if isinstance(data, dict) else {"id": None}
+    return get_client(dd_url, token).create_engagement(product_id, name, days)
 
 
 def dd_import_scan(
     dd_url: str, token: str, file_path: str, engagement_id: int, scan_date: str = None
 ):
-    url = f"{dd_url}/import-scan/"
-    if scan_date is None:
-        scan_date = utc_today()
-    data_form = {
-        "engagement": str(engagement_id),
-        "scan_type": "Nuclei Scan",
-        "active": "true",
-        "verified": "false",
-        "scan_date": scan_date,
-        "minimum_severity": "Info",
-        "close_old_findings": "false",
-        "push_to_jira": "false",
-    }
-    with open(file_path, "rb") as fh:
-        files = {"file": (os.path.basename(file_path), fh, "application/json")}
-        r = requests.post(
-            url, headers=HEADERS_AUTH(token), files=files, data=data_form, timeout=120
-        )
-    r.raise_for_status()
-    data = _json_or_none(r)
-    if data is None:
-        print(
-            f"[WRN] /import-scan/ not JSON. code={r.status_code} body[:200]={r.text[:200]!r}"
-        )
-    return data
+    return get_client(dd_url, token).import_scan(file_path, engagement_id, scan_date)
+
+
+def dd_reimport_scan(
+    dd_url: str, token: str, file_path: str, test_id: int, scan_date: str = None
+):
+    return get_client(dd_url, token).reimport_scan(file_path, test_id, scan_date)
+
+
+def extract_test_id(api_response: Union[dict, list, None]) -> Union[int, None]:
+    if not isinstance(api_response, dict):
+        return None
+    for key in ("test", "test_id"):
+        val = api_response.get(key)
+        if isinstance(val, int):
+            return val
+        if isinstance(val, dict) and isinstance(val.get("id"), int):
+            return val["id"]
+    return None
 
 
 def extract_findings_count(api_response: Union[dict, list, None]) -> Union[int, None]:
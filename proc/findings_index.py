@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import jsoncodec
+from .config import FINDINGS_INDEX_BATCH, FINDINGS_INDEX_PATH
+from .utils import canonical_host_from_any, extract_host_from_record
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    indexed_at REAL NOT NULL,
+    mode TEXT,
+    targets TEXT,
+    findings INTEGER NOT NULL,
+    hosts INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id TEXT NOT NULL,
+    host TEXT NOT NULL,
+    template_id TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    matcher TEXT NOT NULL,
+    matched TEXT NOT NULL,
+    name TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_time ON runs (indexed_at);
+CREATE INDEX IF NOT EXISTS findings_run ON findings (run_id, host, template_id);
+CREATE INDEX IF NOT EXISTS findings_host ON findings (host);
+CREATE INDEX IF NOT EXISTS findings_template ON findings (template_id);
+"""
+
+_GROUP_COLUMNS = {
+    "host": "f.host",
+    "template": "f.template_id",
+    "severity": "f.severity",
+    "run": "f.run_id",
+}
+_ROW_FIELDS = (
+    "run_id",
+    "indexed_at",
+    "severity",
+    "host",
+    "template_id",
+    "matcher",
+    "matched",
+    "name",
+)
+_AGE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([smhdw])")
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_when(value: str, now: Optional[float] = None) -> float:
+    """
+    Epoch seconds for an age ('30m', '12h', '7d', '2w' ago) or an ISO date /
+    date-time (local time unless it carries an offset).
+    """
+    v = value.strip().lower()
+    m = _AGE_RE.fullmatch(v)
+    if m:
+        return (now or time.time()) - float(m.group(1)) * _AGE_UNITS[m.group(2)]
+    try:
+        return datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        raise ValueError(
+            f"'{value}' is neither an age like 7d nor a date like 2024-05-01"
+        )
+
+
+def _match(column: str, value: str) -> Tuple[str, str]:
+    if any(c in value for c in "*?["):
+        return f"{column} GLOB ?", value
+    return f"{column} = ?", value
+
+
+class IndexWriter:
+    """
+    Adds one run's findings to a FindingsIndex in batches. Rows a crashed
+    earlier attempt of the same run left behind are replaced (replace=False
+    keeps them, for an IndexPart); the run only shows up in queries once
+    close() recorded it. A database error stops the writer and is raised by
+    close(), so add() never interrupts the caller's own work.
+    """
+
+    def __init__(
+        self,
+        index: "FindingsIndex",
+        run_id: str,
+        mode: Optional[str],
+        targets: Optional[str],
+        replace: bool = True,
+    ):
+        self.index = index
+        self.run_id = run_id
+        self.mode = mode
+        self.targets = targets
+        self.started = time.time()
+        self.findings = 0
+        self.error: Optional[Exception] = None
+        self._hosts = set()
+        self._rows: List[tuple] = []
+        if replace:
+            index._drop_run(run_id)
+
+    def add(self, rec: dict) -> None:
+        if self.error is not None:
+            return
+        info = rec.get("info")
+        info = info if isinstance(info, dict) else {}
+        host = extract_host_from_record(rec)
+        self._hosts.add(host)
+        self._rows.append(
+            (
+                self.run_id,
+                host,
+                str(rec.get("template-id") or rec.get("templateID") or ""),
+                str(info.get("severity") or "unknown").lower(),
+                str(rec.get("matcher-name") or ""),
+                str(rec.get("matched-at") or rec.get("matched") or ""),
+                info.get("name"),
+            )
+        )
+        self.findings += 1
+        if len(self._rows) >= FINDINGS_INDEX_BATCH:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._rows and self.error is None:
+            # host order keeps each batch's inserts into the host indexes local
+            self._rows.sort(key=lambda r: r[1])
+            try:
+                with self.index._lock, self.index._db:
+                    self.index._db.executemany(
+                        "INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        self._rows,
+                    )
+            except sqlite3.Error as e:
+                self.error = e
+        self._rows = []
+
+    def part(self) -> "IndexPart":
+        """A handle another process can add this run's rows through."""
+        return IndexPart(self.index.path, self.run_id)
+
+    def merge(self, findings: int, hosts: Iterable[str], error: Optional[str]) -> None:
+        """Count the rows an IndexPart added (IndexPart.close()'s result)."""
+        self.findings += findings
+        self._hosts.update(hosts)
+        if error and self.error is None:
+            self.error = sqlite3.Error(error)
+
+    def reset(self) -> None:
+        """Forget every row added so far, e.g. before the export is read again."""
+        self._rows = []
+        self.findings = 0
+        self._hosts = set()
+        self.error = None
+        self.index._drop_run(self.run_id)
+
+    def close(self) -> Tuple[int, int]:
+        """Flush and record the run; returns (findings, hosts)."""
+        self._flush()
+        if self.error is not None:
+            raise self.error
+        with self.index._lock, self.index._db:
+            self.index._db.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.run_id,
+                    self.started,
+                    self.mode,
+                    self.targets,
+                    self.findings,
+                    len(self._hosts),
+                ),
+            )
+        return self.findings, len(self._hosts)
+
+
+class IndexPart:
+    """
+    Picklable share of an IndexWriter's run for a split worker process: its
+    rows go straight into the index file, and close() returns the counts
+    for the parent's IndexWriter.merge().
+    """
+
+    def __init__(self, path: str, run_id: str):
+        self.path = path
+        self.run_id = run_id
+        self._writer: Optional[IndexWriter] = None
+
+    def add(self, rec: dict) -> None:
+        if self._writer is None:
+            index = FindingsIndex(self.path)
+            self._writer = IndexWriter(index, self.run_id, None, None, replace=False)
+        self._writer.add(rec)
+
+    def close(self) -> Tuple[int, set, Optional[str]]:
+        """Flush; returns (findings, hosts, error)."""
+        w, self._writer = self._writer, None
+        if w is None:
+            return 0, set(), None
+        w._flush()
+        w.index.close()
+        return w.findings, w._hosts, str(w.error) if w.error else None
+
+
+class FindingsIndex:
+    """
+    Local index of past runs' findings (SQLite): one row per finding with its
+    run, host, template-id, severity, matcher and matched-at, for --mode query
+    searches and run-to-run diffs. Time filters use the time the run was
+    indexed, not nuclei's per-finding timestamp.
+    """
+
+    def __init__(self, path: str = str(FINDINGS_INDEX_PATH)):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA cache_size=-65536")  # KiB
+        self._db.executescript(_SCHEMA)
+
+    def writer(
+        self, run_id: str, mode: str, targets: Optional[str] = None
+    ) -> IndexWriter:
+        return IndexWriter(self, run_id, mode, targets)
+
+    def add_run(
+        self,
+        run_id: str,
+        records: Iterable[dict],
+        mode: str,
+        targets: Optional[str] = None,
+    ) -> Tuple[int, int]:
+        """Index all records of a run; returns (findings, hosts)."""
+        w = self.writer(run_id, mode, targets)
+        for rec in records:
+            w.add(rec)
+        return w.close()
+
+    def _drop_run(self, run_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM findings WHERE run_id=?", (run_id,))
+            self._db.execute("DELETE FROM runs WHERE run_id=?", (run_id,))
+
+    def resolve_run(self, name: str) -> Optional[str]:
+        """Run id for an id or 'latest' / 'previous'; None if there is no such run."""
+        if name in ("latest", "previous"):
+            sql = "SELECT run_id FROM runs ORDER BY indexed_at DESC LIMIT 1 OFFSET ?"
+            params = (0 if name == "latest" else 1,)
+        else:
+            sql, params = "SELECT run_id FROM runs WHERE run_id=?", (name,)
+        with self._lock:
+            row = self._db.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def _where(
+        self,
+        host: Optional[str] = None,
+        template: Optional[str] = None,
+        severity: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        run_id: Optional[str] = None,
+    ) -> Tuple[str, list]:
+        clauses, params = [], []
+        if host:
+            wild = any(c in host for c in "*?[")
+            clause, value = _match(
+                "f.host", host.lower() if wild else canonical_host_from_any(host)
+            )
+            clauses.append(clause)
+            params.append(value)
+        if template:
+            clause, value = _match("f.template_id", template)
+            clauses.append(clause)
+            params.append(value)
+        sevs = [s.strip().lower() for s in (severity or "").split(",") if s.strip()]
+        if sevs:
+            clauses.append(f"f.severity IN ({','.join('?' * len(sevs))})")
+            params.extend(sevs)
+        if run_id:
+            clauses.append("f.run_id = ?")
+            params.append(run_id)
+        if since is not None or until is not None:
+            cond, tparams = [], []
+            if since is not None:
+                cond.append("indexed_at >= ?")
+                tparams.append(since)
+            if until is not None:
+                cond.append("indexed_at < ?")
+                tparams.append(until)
+            clauses.append(
+                f"f.run_id IN (SELECT run_id FROM runs WHERE {' AND '.join(cond)})"
+            )
+            params.extend(tparams)
+        return " AND ".join(clauses) or "1", params
+
+    def query(self, limit: Optional[int] = None, **filters) -> List[dict]:
+        """Matching findings, newest run first."""
+        where, params = self._where(**filters)
+        sql = (
+            "SELECT f.run_id, r.indexed_at, f.severity, f.host, f.template_id,"
+            " f.matcher, f.matched, f.name"
+            f" FROM findings f JOIN runs r ON r.run_id = f.run_id WHERE {where}"
+            " ORDER BY r.indexed_at DESC, f.host, f.template_id, f.matched LIMIT ?"
+        )
+        with self._lock:
+            rows = self._db.execute(sql, [*params, limit or -1]).fetchall()
+        return [dict(zip(_ROW_FIELDS, r)) for r in rows]
+
+    def counts(self, group_by: str, **filters) -> List[Tuple[str, int]]:
+        """(value, findings) per host/template/severity/run, most findings first."""
+        col = _GROUP_COLUMNS[group_by]
+        where, params = self._where(**filters)
+        sql = (
+            f"SELECT {col}, COUNT(*) FROM findings f JOIN runs r ON r.run_id = f.run_id"
+            f" WHERE {where} GROUP BY {col} ORDER BY COUNT(*) DESC, {col}"
+        )
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def diff(
+        self, old_run: str, new_run: str, limit: Optional[int] = None, **filters
+    ) -> Tuple[List[dict], List[dict]]:
+        """
+        (new, gone): findings of new_run missing from old_run and vice versa.
+        A finding is the same across runs when host, template-id, matcher
+        and matched-at are.
+        """
+        where, params = self._where(**filters)
+        sql = (
+            "SELECT DISTINCT f.run_id, r.indexed_at, f.severity, f.host, f.template_id,"
+            " f.matcher, f.matched, f.name"
+            f" FROM findings f JOIN runs r ON r.run_id = f.run_id"
+            f" WHERE f.run_id = ? AND {where} AND NOT EXISTS ("
+            " SELECT 1 FROM findings o WHERE o.run_id = ? AND o.host = f.host"
+            " AND o.template_id = f.template_id AND o.matcher = f.matcher"
+            " AND o.matched = f.matched)"
+            " ORDER BY f.host, f.template_id, f.matched LIMIT ?"
+        )
+        out = []
+        with self._lock:
+            for a, b in ((new_run, old_run), (old_run, new_run)):
+                rows = self._db.execute(sql, [a, *params, b, limit or -1]).fetchall()
+                out.append([dict(zip(_ROW_FIELDS, r)) for r in rows])
+        return out[0], out[1]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _print_rows(
+    rows: List[dict], jsonl: bool, mark: str = "", change: str = ""
+) -> None:
+    for row in rows:
+        if jsonl:
+            row = dict(row, change=change) if change else row
+            print(jsoncodec.dumps(row))
+            continue
+        when = datetime.fromtimestamp(row["indexed_at"]).strftime("%Y-%m-%d %H:%M")
+        matcher = f" [{row['matcher']}]" if row["matcher"] else ""
+        print(
+            f"{mark}{when}  {row['severity']:<8} {row['host']}  "
+            f"{row['template_id']}{matcher}  {row['matched']}"
+        )
+
+
+def _truncated(n: int, limit: int) -> str:
+    return f" (first {limit}; --limit 0 for all)" if limit and n > limit else ""
+
+
+def run_mode_query(args: argparse.Namespace):
+    path = str(FINDINGS_INDEX_PATH)
+    if not os.path.exists(path):
+        raise SystemExit(f"[!] No findings index at {path}; scan with --index first.")
+    try:
+        since = parse_when(args.since) if args.since else None
+        until = parse_when(args.until) if args.until else None
+    except ValueError as e:
+        raise SystemExit(f"[!] --since/--until: {e}")
+    limit = max(0, args.limit or 0)
+    fetch = limit + 1 if limit else None  # one extra row tells whether we cut
+
+    index = FindingsIndex(path)
+    try:
+        filters: Dict[str, object] = dict(
+            host=args.host, template=args.template, severity=args.severity
+        )
+        t = time.perf_counter()
+        if args.diff is not None:
+            if len(args.diff) not in (0, 2):
+                raise SystemExit(
+                    "[!] --diff takes no run ids (previous vs latest) or two: OLD NEW."
+                )
+            names = args.diff or ["previous", "latest"]
+            old, new = [index.resolve_run(r) for r in names]
+            if not old or not new:
+                raise SystemExit(f"[!] --diff: not in the index: {' '.join(names)}")
+            added, gone = index.diff(old, new, limit=fetch, **filters)
+            ms = (time.perf_counter() - t) * 1000
+            _print_rows(added[:limit or None], args.jsonl, "+ ", "new")
+            _print_rows(gone[:limit or None], args.jsonl, "- ", "gone")
+            if not args.jsonl:
+                print(
+                    f"[=] {old} -> {new}: {len(added[:limit or None])} new, "
+                    f"{len(gone[:limit or None])} gone"
+                    f"{_truncated(max(len(added), len(gone)), limit)} ({ms:.0f} ms)"
+                )
+            return
+
+        if args.run:
+            filters["run_id"] = index.resolve_run(args.run)
+            if not filters["run_id"]:
+                raise SystemExit(f"[!] --run: run '{args.run}' is not in the index.")
+        filters.update(since=since, until=until)
+        if args.group_by:
+            groups = index.counts(args.group_by, **filters)
+            ms = (time.perf_counter() - t) * 1000
+            for value, n in groups[:limit or None]:
+                if args.jsonl:
+                    print(jsoncodec.dumps({args.group_by: value, "findings": n}))
+                else:
+                    print(f"{n:>8}  {value}")
+            if not args.jsonl:
+                print(
+                    f"[=] {len(groups)} {args.group_by} values, "
+                    f"{sum(n for _, n in groups)} findings"
+                    f"{_truncated(len(groups), limit)} ({ms:.0f} ms)"
+                )
+            return
+
+        rows = index.query(limit=fetch, **filters)
+        ms = (time.perf_counter() - t) * 1000
+        _print_rows(rows[:limit or None], args.jsonl)
+        if not args.jsonl:
+            print(
+                f"[=] {len(rows[:limit or None])} findings"
+                f"{_truncated(len(rows), limit)} ({ms:.0f} ms)"
+            )
+    finally:
+        index.close()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+from .config import DD_ID_CACHE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    dd_url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    prod_type_id INTEGER,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (dd_url, name)
+);
+CREATE TABLE IF NOT EXISTS product_types (
+    dd_url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    prod_type_id INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (dd_url, name)
+);
+CREATE TABLE IF NOT EXISTS reimport_targets (
+    dd_url TEXT NOT NULL,
+    product_name TEXT NOT NULL,
+    engagement_id INTEGER NOT NULL,
+    test_id INTEGER,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (dd_url, product_name)
+);
+"""
+
+
+class IdCache:
+    """
+    Persistent DefectDojo name -> ID cache shared across runs (SQLite).
+    Entries are trusted as-is; callers drop them when a write proves them stale.
+    """
+
+    def __init__(self, path: str = str(DD_ID_CACHE_PATH)):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def get_product(self, dd_url: str, name: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT product_id FROM products WHERE dd_url=? AND name=?",
+                (dd_url, name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_product(
+        self, dd_url: str, name: str, product_id: int, prod_type_id: Optional[int]
+    ) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?)",
+                (dd_url, name, product_id, prod_type_id, time.time()),
+            )
+
+    def set_products(
+        self, dd_url: str, rows: Iterable[Tuple[str, int, Optional[int]]]
+    ) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?)",
+                [(dd_url, name, pid, pt_id, now) for name, pid, pt_id in rows],
+            )
+
+    def drop_product(self, dd_url: str, name: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM products WHERE dd_url=? AND name=?", (dd_url, name)
+            )
+
+    def get_product_type(self, dd_url: str, name: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT prod_type_id FROM product_types WHERE dd_url=? AND name=?",
+                (dd_url, name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_product_type(self, dd_url: str, name: str, prod_type_id: int) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO product_types VALUES (?, ?, ?, ?)",
+                (dd_url, name, prod_type_id, time.time()),
+            )
+
+    def drop_product_type(self, dd_url: str, name: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM product_types WHERE dd_url=? AND name=?", (dd_url, name)
+            )
+
+    def get_reimport_target(
+        self, dd_url: str, product_name: str
+    ) -> Optional[Tuple[int, Optional[int]]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT engagement_id, test_id FROM reimport_targets"
+                " WHERE dd_url=? AND product_name=?",
+                (dd_url, product_name),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set_reimport_target(
+        self,
+        dd_url: str,
+        product_name: str,
+        engagement_id: int,
+        test_id: Optional[int],
+    ) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reimport_targets VALUES (?, ?, ?, ?, ?)",
+                (dd_url, product_name, engagement_id, test_id, time.time()),
+            )
+
+    def drop_reimport_target(self, dd_url: str, product_name: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM reimport_targets WHERE dd_url=? AND product_name=?",
+                (dd_url, product_name),
+            )
+
+    def clear(self, dd_url: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM products WHERE dd_url=?", (dd_url,))
+            self._db.execute("DELETE FROM product_types WHERE dd_url=?", (dd_url,))
+            self._db.execute("DELETE FROM reimport_targets WHERE dd_url=?", (dd_url,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
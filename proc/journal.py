@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from .config import RUN_JOURNAL_DIR
+from .utils import now_str
+
+UPLOAD_DONE = ("ok", "skipped")
+
+
+def new_run_id() -> str:
+    return f"{now_str()}_{uuid.uuid4().hex[:6]}"
+
+
+class RunJournal:
+    """
+    Append-only JSONL checkpoint of a list run: the nuclei export, the per-host
+    files split from it and each host's upload status. Replaying the journal
+    gives the state a --resume run continues from. A torn last line (process
+    killed mid-write) is ignored.
+    """
+
+    def __init__(self, run_id: str, run_dir: str = str(RUN_JOURNAL_DIR)):
+        self.run_id = run_id
+        self.run_dir = run_dir
+        self.path = os.path.join(run_dir, f"{run_id}.jsonl")
+        self.export: Optional[str] = None
+        self.hosts: Optional[Dict[str, str]] = None
+        self.fingerprints: Dict[str, str] = {}
+        self.manifest: Dict[str, dict] = {}
+        self.status: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._fh = None
+
+    @classmethod
+    def create(cls, run_dir: str = str(RUN_JOURNAL_DIR)) -> "RunJournal":
+        os.makedirs(run_dir, exist_ok=True)
+        return cls(new_run_id(), run_dir)
+
+    @classmethod
+    def load(cls, run_id: str, run_dir: str = str(RUN_JOURNAL_DIR)) -> "RunJournal":
+        j = cls(run_id, run_dir)
+        if not os.path.exists(j.path):
+            raise FileNotFoundError(
+                f"no journal for run '{run_id}' in {run_dir} (completed runs are removed)"
+            )
+        with open(j.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    ev = json.loads(line)
+                except ValueError:
+                    continue
+                j._apply(ev)
+        return j
+
+    @property
+    def export_path(self) -> str:
+        """Where this run's nuclei export is written, so it survives a crash."""
+        return os.path.join(self.run_dir, f"{self.run_id}_export.json")
+
+    def _apply(self, ev: dict) -> None:
+        kind = ev.get("event")
+        if kind == "export":
+            self.export = ev.get("path")
+        elif kind == "split":
+            self.hosts = dict(ev.get("hosts") or {})
+            self.fingerprints = dict(ev.get("fingerprints") or {})
+            self.manifest = dict(ev.get("manifest") or {})
+        elif kind == "upload":
+            self.status[ev["host"]] = ev.get("status")
+
+    def record(self, event: str, **fields) -> None:
+        ev = {"ts": round(time.time(), 3), "event": event, **fields}
+        with self._lock:
+            self._apply(ev)
+            if self._fh is None:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(json.dumps(ev, ensure_ascii=False) + "\n")
+            self._fh.flush()
+
+    def record_upload(self, host: str, status: str) -> None:
+        self.record("upload", host=host, status=status)
+
+    def pending_hosts(self) -> Dict[str, str]:
+        """Hosts (-> file) that were split but not uploaded or skipped yet."""
+        return {
+            h: fp
+            for h, fp in (self.hosts or {}).items()
+            if self.status.get(h) not in UPLOAD_DONE
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+
+    def discard(self) -> None:
+        """Drop the journal and this run's export (run finished or is not resumable)."""
+        self.close()
+        for p in (self.path, self.export_path):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
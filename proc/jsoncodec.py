@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON codec used on the hot paths (export parsing, host file writing,
+DefectDojo payloads). Uses orjson or msgspec when installed, stdlib json
+otherwise; N2D_JSON_BACKEND=orjson|msgspec|json pins one. All backends
+take str, bytes or any bytes-like buffer (memoryview slices of an mmap)
+and produce bytes, and raise ValueError subclasses on malformed input.
+
+Output bytes differ between backends in whitespace only, so nothing that
+hashes serialized JSON (upload fingerprints) may go through this module.
+"""
+
+import json
+from typing import Any, Union
+
+from .config import JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional dependency
+    msgspec = None
+
+
+def _pick_backend(wanted: str) -> str:
+    available = {"orjson": orjson, "msgspec": msgspec, "json": json}
+    if wanted in available:
+        if available[wanted] is None:
+            print(f"[WRN] JSON backend '{wanted}' is not installed; using stdlib json")
+            return "json"
+        return wanted
+    if wanted != "auto":
+        print(f"[WRN] Unknown JSON backend '{wanted}'; picking automatically")
+    for name in ("orjson", "msgspec"):
+        if available[name] is not None:
+            return name
+    return "json"
+
+
+BACKEND = _pick_backend(JSON_BACKEND)
+
+
+def _std_dumpb(obj: Any, indent: bool, compact: bool) -> bytes:
+    if compact:
+        s = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    else:
+        s = json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+    return s.encode("utf-8")
+
+
+if BACKEND == "orjson":
+
+    def loads(data: Union[bytes, str, memoryview]) -> Any:
+        return orjson.loads(data)
+
+    def dumpb(obj: Any, indent: bool = False, compact: bool = False) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:  # e.g. non-str keys or ints beyond 64 bits
+            return _std_dumpb(obj, indent, compact)
+
+elif BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def loads(data: Union[bytes, str, memoryview]) -> Any:
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+
+    def dumpb(obj: Any, indent: bool = False, compact: bool = False) -> bytes:
+        try:
+            out = _encoder.encode(obj)
+        except (TypeError, OverflowError):
+            return _std_dumpb(obj, indent, compact)
+        return msgspec.json.format(out, indent=2) if indent else out
+
+else:
+
+    def loads(data: Union[bytes, str, memoryview]) -> Any:
+        if not isinstance(data, (str, bytes, bytearray)):
+            data = bytes(data)  # json.loads takes no other buffers
+        return json.loads(data)
+
+    def dumpb(obj: Any, indent: bool = False, compact: bool = False) -> bytes:
+        return _std_dumpb(obj, indent, compact)
+
+
+def dumps(obj: Any, indent: bool = False, compact: bool = False) -> str:
+    return dumpb(obj, indent, compact).decode("utf-8")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROM_PREFIX = "nuclei2dojo"
+
+_ID_RE = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """'GET /products/12/?x=1' -> 'GET /products/{id}/' (bounded label set)."""
+    return f"{method} {_ID_RE.sub('/{id}', path.split('?', 1)[0])}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> dict:
+        cumulative, buckets = 0, {}
+        for le, n in zip(LATENCY_BUCKETS, self.counts):
+            cumulative += n
+            buckets[str(le)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "buckets": buckets,
+        }
+
+
+class RunMetrics:
+    """
+    Process-wide run instrumentation: wall time per stage, DefectDojo request
+    latency histograms per endpoint, byte and event counters, peak RSS.
+    Stages running in parallel threads each add their own wall time, so stage
+    totals can exceed the run's duration. Thread-safe and cheap enough to stay
+    on; it is only written out when a report path is given. In --mode worker
+    the run is the worker process: its jobs overlap, so the report holds
+    totals since the worker started and is rewritten after every job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}  # name -> [seconds, calls]
+        self.requests: Dict[str, _Histogram] = {}
+        self.statuses: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - t)
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            st = self.stages.setdefault(name, [0.0, 0])
+            st[0] += seconds
+            st[1] += 1
+
+    def observe_request(
+        self, method: str, path: str, seconds: float, status: int = 0
+    ) -> None:
+        label = endpoint_label(method, path)
+        with self._lock:
+            hist = self.requests.get(label)
+            if hist is None:
+                hist = self.requests[label] = _Histogram()
+            hist.observe(seconds)
+            key = f"{label} {status or 'error'}"
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def add_bytes(self, kind: str, n: int) -> None:
+        if n:
+            with self._lock:
+                self.bytes[kind] = self.bytes.get(kind, 0) + n
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @staticmethod
+    def _peak_rss() -> Dict[str, int]:
+        if resource is None:
+            return {}
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        unit = 1 if sys.platform == "darwin" else 1024
+        return {
+            "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+            "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit,
+        }
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started,
+                "duration_sec": round(time.perf_counter() - self._t0, 3),
+                "stages": {
+                    k: {"seconds": round(v[0], 6), "calls": v[1]}
+                    for k, v in sorted(self.stages.items())
+                },
+                "dd_requests": {
+                    k: h.to_dict() for k, h in sorted(self.requests.items())
+                },
+                "dd_statuses": dict(sorted(self.statuses.items())),
+                "bytes": dict(sorted(self.bytes.items())),
+                "counters": dict(sorted(self.counters.items())),
+                "peak_rss_bytes": self._peak_rss(),
+            }
+
+    def to_prometheus(self) -> str:
+        rep = self.report()
+        out: List[str] = []
+
+        def family(name: str, kind: str, help_text: str, samples) -> None:
+            out.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+            out.append(f"# TYPE {PROM_PREFIX}_{name} {kind}")
+            for suffix, labels, value in samples:
+                lbl = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lbl = f"{{{lbl}}}" if lbl else ""
+                out.append(f"{PROM_PREFIX}_{name}{suffix}{lbl} {value}")
+
+        family(
+            "run_start_timestamp_seconds",
+            "gauge",
+            "Start time of the last run.",
+            [("", {}, rep["started_at"])],
+        )
+        family(
+            "run_duration_seconds",
+            "gauge",
+            "Wall time of the last run.",
+            [("", {}, rep["duration_sec"])],
+        )
+        stages = rep["stages"].items()
+        family(
+            "stage_seconds",
+            "gauge",
+            "Wall time per stage in the last run (summed over threads).",
+            [("", {"stage": k}, v["seconds"]) for k, v in stages],
+        )
+        family(
+            "stage_calls",
+            "gauge",
+            "Times each stage ran in the last run.",
+            [("", {"stage": k}, v["calls"]) for k, v in stages],
+        )
+        samples = []
+        for ep, h in rep["dd_requests"].items():
+            for le, n in h["buckets"].items():
+                samples.append(("_bucket", {"endpoint": ep, "le": le}, n))
+            samples.append(("_sum", {"endpoint": ep}, h["sum"]))
+            samples.append(("_count", {"endpoint": ep}, h["count"]))
+        family(
+            "dd_request_seconds",
+            "histogram",
+            "DefectDojo API request latency per endpoint.",
+            samples,
+        )
+        family(
+            "bytes",
+            "gauge",
+            "Bytes read, written and uploaded in the last run.",
+            [("", {"kind": k}, v) for k, v in rep["bytes"].items()],
+        )
+        family(
+            "events",
+            "gauge",
+            "Event counters of the last run.",
+            [("", {"name": k}, v) for k, v in rep["counters"].items()],
+        )
+        family(
+            "peak_rss_bytes",
+            "gauge",
+            "Peak resident set size of this process and of its child processes.",
+            [("", {"process": k}, v) for k, v in rep["peak_rss_bytes"].items()],
+        )
+        return "\n".join(out) + "\n"
+
+    def write_json(self, path: str) -> None:
+        _write_atomic(path, json.dumps(self.report(), indent=2) + "\n")
+
+    def write_prometheus(self, path: str) -> None:
+        # node_exporter's textfile collector must never see a half-written file
+        _write_atomic(path, self.to_prometheus())
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+METRICS = RunMetrics()
+_WRITE_LOCK = threading.Lock()  # worker jobs finishing at once share the paths
+
+
+def write_reports(json_path: str = None, prom_path: str = None) -> None:
+    with _WRITE_LOCK:
+        _write_reports(json_path, prom_path)
+
+
+def _write_reports(json_path: str, prom_path: str) -> None:
+    if json_path:
+        METRICS.write_json(json_path)
+        print(f"[+] Run metrics written: {json_path}")
+    if prom_path:
+        METRICS.write_prometheus(prom_path)
+        print(f"[+] Prometheus metrics written: {prom_path}")
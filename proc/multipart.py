@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import gzip
+import io
+import os
+import uuid
+from typing import Dict
+
+
+class MultipartFileBody:
+    """
+    multipart/form-data body (form fields + one file) streamed from disk.
+    File-like with a known length, so requests sends it with Content-Length
+    while reading the file in small blocks instead of loading it whole.
+    With decompress=True a gzip file is sent decompressed; the length is then
+    unknown (length is None) and the body has to be sent chunked.
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        file_field: str,
+        file_path: str,
+        filename: str = None,
+        file_content_type: str = "application/json",
+        decompress: bool = False,
+    ):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.file_path = file_path
+        self.decompress = decompress
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        filename = filename or os.path.basename(file_path)
+        parts.append(
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; '
+            f'filename="{filename}"\r\n'
+            f"Content-Type: {file_content_type}\r\n\r\n"
+        )
+        self._head = "".join(parts).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._size = None if decompress else os.path.getsize(file_path)
+        self._fh = None
+        self.seek(0)
+
+    @property
+    def length(self):
+        if self._size is None:
+            return None
+        return len(self._head) + self._size + len(self._tail)
+
+    def __len__(self) -> int:
+        if self._size is None:
+            raise TypeError("length of a decompressed multipart body is unknown")
+        return self.length
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        # only rewinding is supported (used to resend on retry)
+        if offset != 0 or whence != 0:
+            raise OSError("MultipartFileBody can only be rewound")
+        self.close()
+        opener = gzip.open if self.decompress else open
+        self._fh = opener(self.file_path, "rb")
+        self._segments = [io.BytesIO(self._head), self._fh, io.BytesIO(self._tail)]
+        self._current = 0
+        return 0
+
+    def read(self, size: int = -1) -> bytes:
+        out = bytearray()
+        while self._current < len(self._segments) and (size < 0 or len(out) < size):
+            chunk = self._segments[self._current].read(
+                -1 if size < 0 else size - len(out)
+            )
+            if chunk:
+                out += chunk
+            else:
+                self._current += 1
+        return bytes(out)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,18 +1,169 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import hashlib
+import json
+import os
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
 import uuid
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import sys
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: updates are then not serialized
+    fcntl = None
+
+from . import jsoncodec
+from .config import TEMPLATES_STAMP_PATH, NUCLEI_STATS_INTERVAL
+from .adaptive import AdaptiveController
+from .metrics import METRICS
+from .utils import canonical_host_from_any, merge_nuclei_exports, read_lines
+
+
+_NUCLEI_FOUND = False
 
 
 def ensure_nuclei():
+    # the PATH lookup is only repeated until it succeeds once
+    global _NUCLEI_FOUND
+    if _NUCLEI_FOUND:
+        return
     if shutil.which("nuclei") is None:
         raise RuntimeError(
             "Nuclei not found in PATH. Ensure it can be executed as 'nuclei'."
         )
+    _NUCLEI_FOUND = True
+
+
+def _templates_fresh(stamp_path: str, max_age_sec: float) -> bool:
+    try:
+        return time.time() - os.path.getmtime(stamp_path) < max_age_sec
+    except OSError:
+        return False
+
+
+def update_templates(
+    max_age_sec: float = 0, stamp_path: str = str(TEMPLATES_STAMP_PATH)
+) -> bool:
+    """
+    Run nuclei -ut unless the last successful update (stamp file mtime) is newer
+    than max_age_sec (0 = always update). Concurrent callers serialize on
+    <stamp>.lock; whoever waited re-checks the stamp, so one update is shared.
+    Returns True if an update ran.
+    """
+    if max_age_sec and _templates_fresh(stamp_path, max_age_sec):
+        print("[INF] Nuclei templates updated recently; skipping nuclei -ut.")
+        return False
+    os.makedirs(os.path.dirname(stamp_path) or ".", exist_ok=True)
+    with open(f"{stamp_path}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if max_age_sec and _templates_fresh(stamp_path, max_age_sec):
+                print("[INF] Nuclei templates were just updated by another run.")
+                return False
+            print("[INF] Updating nuclei templates (nuclei -ut)...")
+            with METRICS.stage("templates"):
+                subprocess.run(["nuclei", "-ut"], check=True)
+            with open(stamp_path, "w") as f:
+                f.write(f"{time.time():.0f}\n")
+            print("[INF] Nuclei templates update completed.")
+            return True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _scan_options(
+    severity: Optional[str] = None,
+    include_tags: Optional[str] = None,
+    exclude_tags: Optional[str] = None,
+    exclude_templates: Optional[list] = None,
+    rate_limit: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> list:
+    opts = []
+    if severity:
+        opts.extend(["-severity", severity])
+    if include_tags:
+        opts.extend(["-tags", include_tags])
+    if exclude_tags:
+        opts.extend(["-exclude-tags", exclude_tags])
+    if exclude_templates:
+        for et in exclude_templates:
+            opts.extend(["-exclude-templates", et])
+    if rate_limit:
+        opts.extend(["-rl", str(rate_limit)])
+    if concurrency:
+        opts.extend(["-c", str(concurrency)])
+    return opts
+
+
+def parse_stats_line(line: str) -> Optional[Dict[str, float]]:
+    """Numeric fields of one nuclei -stats-json line (nuclei prints them as strings)."""
+    line = line.strip()
+    if not line.startswith("{"):
+        return None
+    try:
+        raw = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(raw, dict) or "requests" not in raw:
+        return None
+    stats = {}
+    for key, val in raw.items():
+        try:
+            stats[key] = float(val)
+        except (TypeError, ValueError):
+            continue
+    return stats
+
+
+def _run_with_stats(
+    cmd: List[str], timeout_sec: int, on_stats: Callable[[Dict[str, float]], None]
+) -> None:
+    """
+    subprocess.run(cmd, check=True, timeout=...) for a nuclei run with
+    -stats-json: stats lines on stderr go to on_stats, other stderr output is
+    passed through.
+    """
+    cmd = cmd + ["-stats", "-stats-json", "-si", str(NUCLEI_STATS_INTERVAL)]
+    proc = subprocess.Popen(
+        cmd, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="ignore"
+    )
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout_sec, _kill)
+    timer.daemon = True
+    timer.start()
+    try:
+        for line in proc.stderr:
+            stats = parse_stats_line(line)
+            if stats is not None:
+                on_stats(stats)
+            else:
+                sys.stderr.write(line)
+        rc = proc.wait()
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout_sec)
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, cmd)
+
 
 def nuclei_single(
     url: str,
@@ -35,23 +186,18 @@ def nuclei_single(
             f"{tempfile.gettempdir()}/nuclei_single_{uuid.uuid4().hex}.json"
         )
     cmd = ["nuclei", "-u", url, "-json-export", json_export_path]
-    if severity:
-        cmd.extend(["-severity", severity])
-    if include_tags:
-        cmd.extend(["-tags", include_tags])               
-    if exclude_tags:
-        cmd.extend(["-exclude-tags", exclude_tags])      
-    if exclude_templates:
-        for et in exclude_templates:                        
-            cmd.extend(["-exclude-templates", et])
-    if rate_limit:
-        cmd.extend(["-rl", str(rate_limit)])
-    if concurrency:
-        cmd.extend(["-c", str(concurrency)])
+    cmd += _scan_options(
+        severity,
+        include_tags,
+        exclude_tags,
+        exclude_templates,
+        rate_limit,
+        concurrency,
+    )
 
-    
     print(f"[+] Nuclei single: {' '.join(cmd)}")
-    subprocess.run(cmd, check=True, timeout=timeout_sec)
+    with METRICS.stage("nuclei"):
+        subprocess.run(cmd, check=True, timeout=timeout_sec)
     return json_export_path
 
 
@@ -65,9 +211,11 @@ def nuclei_list(
     exclude_templates: Optional[list] = None,
     rate_limit: Optional[int] = None,
     concurrency: Optional[int] = None,
+    on_stats: Optional[Callable[[Dict[str, float]], None]] = None,
 ) -> str:
     """
     Run nuclei -list <file> [-severity <sev>] -json-export <path>
+    With on_stats, nuclei also reports -stats-json records to that callback.
     """
     ensure_nuclei()
     if json_export_path is None:
@@ -75,21 +223,197 @@ def nuclei_list(
             f"{tempfile.gettempdir()}/nuclei_list_{uuid.uuid4().hex}.json"
         )
     cmd = ["nuclei", "-list", list_file, "-json-export", json_export_path]
-
-    if severity:
-        cmd.extend(["-severity", severity])
-    if include_tags:
-        cmd.extend(["-tags", include_tags])            
-    if exclude_tags:
-        cmd.extend(["-exclude-tags", exclude_tags])        
-    if exclude_templates:
-        for et in exclude_templates:                      
-            cmd.extend(["-exclude-templates", et])
-    if rate_limit:
-        cmd.extend(["-rl", str(rate_limit)])
-    if concurrency:
-        cmd.extend(["-c", str(concurrency)])
+    cmd += _scan_options(
+        severity,
+        include_tags,
+        exclude_tags,
+        exclude_templates,
+        rate_limit,
+        concurrency,
+    )
 
     print(f"[+] Nuclei list: {' '.join(cmd)}")
-    subprocess.run(cmd, check=True, timeout=timeout_sec)
+    with METRICS.stage("nuclei"):
+        if on_stats is None:
+            subprocess.run(cmd, check=True, timeout=timeout_sec)
+        else:
+            _run_with_stats(cmd, timeout_sec, on_stats)
+    return json_export_path
+
+
+def _shard_index(target: str, shards: int) -> int:
+    digest = hashlib.sha1(canonical_host_from_any(target).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shards
+
+
+def partition_targets(
+    list_file: str, shards: int, out_dir: str, by_host: bool = False
+) -> List[str]:
+    """
+    Split a target list into `shards` list files (round-robin, or hash-stable by
+    canonical host so a host always lands in the same shard). Empty shards are dropped.
+    """
+    buckets: List[List[str]] = [[] for _ in range(shards)]
+    for i, t in enumerate(read_lines(list_file)):
+        buckets[_shard_index(t, shards) if by_host else i % shards].append(t)
+    paths = []
+    for bucket in buckets:
+        if not bucket:
+            continue
+        path = os.path.join(out_dir, f"shard_{len(paths) + 1}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(bucket) + "\n")
+        paths.append(path)
+    return paths
+
+
+def nuclei_list_sharded(
+    list_file: str,
+    shards: int,
+    json_export_path: Optional[str] = None,
+    by_host: bool = False,
+    timeout_sec: int = 3600,
+    rate_limit: Optional[int] = None,
+    on_shard_ok: Optional[Callable[[str], None]] = None,
+    parallel: Optional[int] = None,
+    controller: Optional[AdaptiveController] = None,
+    **scan_opts,
+) -> str:
+    """
+    Run one nuclei -list process per target shard, `parallel` at a time (default:
+    all at once); the global rate limit is split across the parallel ones.
+    A failed or timed-out shard is reported and skipped; the exports of
+    completed shards are merged (JSONL) into json_export_path. on_shard_ok is
+    called with each completed shard's target list. With a controller, each
+    shard's -rl/-c come from it and its -stats-json results are fed back.
+    """
+    ensure_nuclei()
+    if json_export_path is None:
+        json_export_path = (
+            f"{tempfile.gettempdir()}/nuclei_list_{uuid.uuid4().hex}.jsonl"
+        )
+    work_dir = tempfile.mkdtemp(prefix="nuclei_shards_")
+    shard_lists = partition_targets(list_file, shards, work_dir, by_host=by_host)
+    n = len(shard_lists)
+    parallel = max(1, min(parallel or n, n)) if n else 1
+    shard_rl = max(1, rate_limit // parallel) if rate_limit else rate_limit
+    if controller is not None:
+        print(f"[+] Nuclei sharded: {n} shards, {parallel} at a time (adaptive -rl/-c)")
+    else:
+        print(
+            f"[+] Nuclei sharded: {n} shards, {parallel} at a time "
+            f"(rate limit per shard: {shard_rl or '-'})"
+        )
+
+    def _run(idx: int, shard_list: str) -> Optional[str]:
+        export = os.path.join(work_dir, f"shard_{idx}.json")
+        started = time.monotonic()
+        opts = dict(scan_opts, rate_limit=shard_rl)
+        last_stats: Dict[str, float] = {}
+        if controller is not None:
+            opts["rate_limit"], opts["concurrency"] = controller.next_params()
+            opts["on_stats"] = last_stats.update
+        try:
+            nuclei_list(
+                shard_list,
+                json_export_path=export,
+                timeout_sec=timeout_sec,
+                **opts,
+            )
+        except subprocess.TimeoutExpired:
+            print(f"[ERR] Shard {idx}/{n}: timed out after {timeout_sec}s")
+            return None
+        except subprocess.CalledProcessError as e:
+            print(f"[ERR] Shard {idx}/{n}: nuclei exited with {e.returncode}")
+            return None
+        except Exception as e:
+            print(f"[ERR] Shard {idx}/{n}: {e}")
+            return None
+        finally:
+            if controller is not None:
+                controller.release(opts["rate_limit"])
+            if controller is not None and last_stats:
+                controller.observe(
+                    f"shard {idx}/{n}",
+                    opts["rate_limit"],
+                    opts["concurrency"],
+                    last_stats,
+                )
+        print(f"[OK] Shard {idx}/{n} finished in {time.monotonic() - started:.0f}s")
+        if on_shard_ok:
+            on_shard_ok(shard_list)
+        return export if os.path.exists(export) else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            results = list(pool.map(_run, range(1, n + 1), shard_lists))
+        done = [r for r in results if r]
+        print(f"[+] Shards completed: {len(done)}/{n}")
+        if n and not done:
+            raise RuntimeError("All nuclei shards failed.")
+        merge_nuclei_exports(done, json_export_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
     return json_export_path
+
+
+def nuclei_list_stream(
+    list_file: str,
+    timeout_sec: int = 3600,
+    severity: Optional[str] = None,
+    include_tags: Optional[str] = None,
+    exclude_tags: Optional[str] = None,
+    exclude_templates: Optional[list] = None,
+    rate_limit: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> Iterable[dict]:
+    """
+    Run nuclei -list <file> -jsonl and yield findings as nuclei prints them.
+    Raises CalledProcessError / TimeoutExpired like nuclei_list once the
+    stream ends.
+    """
+    ensure_nuclei()
+    cmd = ["nuclei", "-list", list_file, "-jsonl"]
+    cmd += _scan_options(
+        severity,
+        include_tags,
+        exclude_tags,
+        exclude_templates,
+        rate_limit,
+        concurrency,
+    )
+
+    print(f"[+] Nuclei list (streaming): {' '.join(cmd)}")
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, text=True, encoding="utf-8", errors="ignore"
+    )
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout_sec, _kill)
+    timer.daemon = True
+    timer.start()
+    try:
+        for line in proc.stdout:
+            line = line.strip()
+            if not line.startswith("{"):
+                continue
+            try:
+                rec = jsoncodec.loads(line)
+            except ValueError:
+                continue
+            if isinstance(rec, dict):
+                yield rec
+        rc = proc.wait()
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout_sec)
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, cmd)
@@ -1,42 +1,202 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import json
 import os
 import shutil
 import argparse
 import requests
-import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
 
-from .config import DEFECTDOJO_URL, API_KEY, DEFAULT_OUT_DIR, SCAN_PROFILES
+from .config import (
+    DEFECTDOJO_URL,
+    API_KEY,
+    DEFAULT_OUT_DIR,
+    SCAN_PROFILES,
+    DD_PREFETCH_MIN_HOSTS,
+    CHUNK_MAX_BYTES,
+    CHUNK_MAX_RECORDS,
+)
 from .utils import (
     now_str,
     slugify,
     split_by_host_to_json_arrays,
     count_findings_from_file,
     canonical_host_from_any,
+    read_lines,
+    is_gzip_file,
+    iter_record_chunks,
+    iter_nuclei_records,
+    PayloadOptions,
+)
+from .targets import ScanLedger, preprocess_targets
+from .nuclei_runner import (
+    nuclei_list,
+    nuclei_list_sharded,
+    nuclei_list_stream,
+    nuclei_single,
+    update_templates,
 )
-from .nuclei_runner import nuclei_list, nuclei_single
+from .stream_upload import StreamingUploader
 from .dojo_client import (
-    dd_ensure_product,
-    dd_create_engagement,
+    dd_ensure_product_engagement,
+    dd_prefetch_products,
+    dd_uncached_products,
     dd_import_scan,
+    dd_reimport_product_scan,
+    dd_reimport_scan,
+    dd_configure,
     extract_findings_count,
+    extract_test_id,
 )
+from .id_cache import IdCache
+from .upload_state import FingerprintStore
+from .journal import RunJournal, new_run_id
+from .findings_index import FindingsIndex
+from .adaptive import AdaptiveController, parse_bounds
+from .metrics import METRICS
+
+_ID_CACHE = None
+_SCAN_LEDGER = None
+_FINDINGS_INDEX = None
+_FP_STORE = None
 
 
 def product_name_from_target(target: str) -> str:
     return canonical_host_from_any(target)
 
 
-def handle_import_for_hostfile(dd_url: str, token: str, host: str, host_file: str):
+def _import_in_chunks(
+    dd_url: str,
+    token: str,
+    host: str,
+    host_file: str,
+    reimport: bool,
+    max_bytes: int,
+    max_records: int,
+) -> int:
+    """
+    Upload a host file in bounded chunks: the first through import (or the
+    --reimport target), the rest reimported into the test the first one created.
+    """
+    total, part, test_id = 0, 0, None
+    for chunk, n in iter_record_chunks(host_file, max_bytes, max_records):
+        part += 1
+        try:
+            if part == 1 and reimport:
+                _, test_id = dd_reimport_product_scan(dd_url, token, host, chunk)
+            elif part == 1:
+                _, eng = dd_ensure_product_engagement(
+                    dd_url, token, host, f"Scan {now_str()}"
+                )
+                res = dd_import_scan(dd_url, token, chunk, eng.get("id"))
+                test_id = extract_test_id(res)
+            elif test_id is None:
+                raise RuntimeError(
+                    "import response has no test id; "
+                    f"{part - 1} chunk(s) imported, rest skipped"
+                )
+            else:
+                dd_reimport_scan(dd_url, token, chunk, test_id)
+        finally:
+            os.remove(chunk)
+        total += n
+    if part > 1:
+        print(f"[INF] '{host}' uploaded in {part} chunks")
+    return total
+
+
+def _needs_chunking(
+    host_file: str, max_bytes: int, max_records: int, records: Optional[int]
+) -> Tuple[bool, Optional[int]]:
+    """Whether host_file goes up in chunks, and its record count if it had to be counted."""
+    if not max_bytes:
+        return False, records
+    if os.path.getsize(host_file) > max_bytes or is_gzip_file(host_file):
+        return True, records
+    if not max_records:
+        return False, records
+    if records is None:
+        records = count_findings_from_file(host_file)
+    return records > max_records, records
+
+
+def handle_import_for_hostfile(
+    dd_url: str,
+    token: str,
+    host: str,
+    host_file: str,
+    reimport: bool = False,
+    chunk_max_bytes: int = CHUNK_MAX_BYTES,
+    chunk_max_records: int = CHUNK_MAX_RECORDS,
+    records: Optional[int] = None,
+):
+    """
+    Upload one host file; returns its findings count. `records` is the count
+    from the split manifest when known, so the file is never parsed just to
+    count it (and at most once otherwise).
+    """
     product_name = host
-    prod = dd_ensure_product(dd_url, token, product_name)
-    eng = dd_create_engagement(dd_url, token, prod.get("id"), name=f"Scan {now_str()}")
-    res = dd_import_scan(dd_url, token, host_file, eng.get("id"))
+    chunked, records = _needs_chunking(
+        host_file, chunk_max_bytes, chunk_max_records, records
+    )
+    if chunked:
+        return _import_in_chunks(
+            dd_url,
+            token,
+            product_name,
+            host_file,
+            reimport,
+            chunk_max_bytes,
+            chunk_max_records or CHUNK_MAX_RECORDS,
+        )
+    if reimport:
+        res, _ = dd_reimport_product_scan(dd_url, token, product_name, host_file)
+    else:
+        _, eng = dd_ensure_product_engagement(
+            dd_url, token, product_name, f"Scan {now_str()}"
+        )
+        res = dd_import_scan(dd_url, token, host_file, eng.get("id"))
     findings = extract_findings_count(res)
     if findings is None or findings == 0:
-        findings = count_findings_from_file(host_file) or "?"
-    print(f"[OK] Upload '{product_name}' (findings: {findings})")
+        if records is None:
+            records = count_findings_from_file(host_file)
+        findings = records or "?"
+    return findings
+
+
+def _upload_hostfile(
+    dd_url: str,
+    token: str,
+    host: str,
+    fp: str,
+    keep_file: bool,
+    keep_failed: bool = False,
+    **import_opts,
+):
+    """
+    Upload one host file; returns (ok, report line). Never raises.
+    With keep_failed the file is only removed once its upload succeeded.
+    """
+    ok = False
+    try:
+        findings = handle_import_for_hostfile(dd_url, token, host, fp, **import_opts)
+        ok = True
+        return True, f"[OK] Upload '{host}' (findings: {findings})"
+    except requests.HTTPError as e:
+        return (
+            False,
+            f"[ERR] {host}: HTTP {e.response.status_code} -> {e.response.text[:500]}",
+        )
+    except Exception as e:
+        return False, f"[ERR] {host}: {e}"
+    finally:
+        if not keep_file and (ok or not keep_failed):
+            try:
+                os.remove(fp)
+            except Exception:
+                pass
 
 
 def _profile_params(profile_name: str):
@@ -48,74 +208,446 @@ def _profile_params(profile_name: str):
     )
 
 
-def _maybe_update_templates(args):
-    if getattr(args, "update_templates", False):
-        print("[INF] Updating nuclei templates (nuclei -ut)...")
-        subprocess.run(["nuclei", "-ut"], check=True)
-        print("[INF] Nuclei templates update completed.")
+def _configure_dojo(args, dd_url: str):
+    global _ID_CACHE
+    if _ID_CACHE is None:
+        _ID_CACHE = IdCache()
+    if args.refresh_cache:
+        print("[INF] Dropping cached DefectDojo IDs for this instance")
+        _ID_CACHE.clear(dd_url.rstrip("/"))
+    dd_configure(
+        pool_size=max(args.dd_pool_size, args.upload_workers or 1),
+        retries=args.dd_retries,
+        rate_limit=args.dd_rate_limit,
+        id_cache=_ID_CACHE,
+    )
 
 
-def run_mode_list(args: argparse.Namespace):
-    _maybe_update_templates(args)
-    dd_url = args.dd_url or DEFECTDOJO_URL
-    token = args.dd_token or API_KEY
-    include_tags, exclude_tags, exclude_templates = _profile_params(args.scan_profile)
-    if not token:
-        raise SystemExit("[!] DD token is required. Use --dd-token or ENV DD_TOKEN.")
+def _maybe_update_templates(args) -> Optional[Future]:
+    """
+    Run the throttled template update; with --update-templates-background it
+    runs in a thread and the returned future is waited on right before nuclei starts.
+    """
+    if not getattr(args, "update_templates", False):
+        return None
+    max_age = (getattr(args, "templates_max_age", 0) or 0) * 3600
+    if not getattr(args, "update_templates_background", False):
+        update_templates(max_age)
+        return None
+    pool = ThreadPoolExecutor(max_workers=1)
+    fut = pool.submit(update_templates, max_age)
+    pool.shutdown(wait=False)
+    return fut
 
-    out_dir = args.out_dir or str(DEFAULT_OUT_DIR)
-    os.makedirs(out_dir, exist_ok=True)
 
-    tmp_json = nuclei_list(
-        args.targets,
-        severity=args.severity,
-        include_tags=include_tags,
-        exclude_tags=exclude_tags,
-        exclude_templates=exclude_templates,
-        rate_limit=args.rate_limit,
+def _wait_templates(update: Optional[Future]) -> None:
+    if update is not None:
+        update.result()
+
+
+def _payload_options(args) -> PayloadOptions:
+    return PayloadOptions(
+        compact=args.compact_json,
+        max_raw_bytes=args.max_raw_bytes,
+        drop_raw=args.drop_raw,
+        gzip_files=args.gzip_host_files,
+    )
+
+
+def _import_options(args) -> dict:
+    return dict(
+        reimport=args.reimport,
+        chunk_max_bytes=args.chunk_max_mb * 1024 * 1024,
+        chunk_max_records=args.chunk_max_records,
+    )
+
+
+def _adaptive_controller(args) -> Optional[AdaptiveController]:
+    if not args.adaptive:
+        return None
+    try:
+        rl_bounds = parse_bounds(args.adaptive_rl)
+        c_bounds = parse_bounds(args.adaptive_c)
+    except ValueError as e:
+        raise SystemExit(f"[!] --adaptive-rl/--adaptive-c: {e}")
+    parallel = max(1, min(args.shard_parallel or args.shards, args.shards))
+    return AdaptiveController(
+        rl_bounds,
+        c_bounds,
+        rate_limit=args.rate_limit // parallel if args.rate_limit else None,
         concurrency=args.concurrency,
+        budget=args.rate_limit,
     )
 
-    host_files = split_by_host_to_json_arrays(tmp_json, out_dir)
+
+def _scan_ledger() -> ScanLedger:
+    global _SCAN_LEDGER
+    if _SCAN_LEDGER is None:
+        _SCAN_LEDGER = ScanLedger()
+    return _SCAN_LEDGER
+
+
+def _list_hosts(list_file: str) -> set:
+    return {canonical_host_from_any(t) for t in read_lines(list_file)}
+
+
+def _mark_scanned(scanned: set, failed) -> None:
+    """
+    Record hosts in the scan ledger once their findings reached DefectDojo:
+    hosts whose upload failed are left out, so --skip-scanned-within
+    scans them again instead of losing their findings.
+    """
+    _scan_ledger().mark_scanned(scanned - set(failed))
+
+
+def _fingerprint_store() -> FingerprintStore:
+    global _FP_STORE
+    if _FP_STORE is None:
+        _FP_STORE = FingerprintStore()
+    return _FP_STORE
+
+
+def _findings_index() -> FindingsIndex:
+    global _FINDINGS_INDEX
+    if _FINDINGS_INDEX is None:
+        _FINDINGS_INDEX = FindingsIndex()
+    return _FINDINGS_INDEX
+
+
+def _index_writer(run_id: str, mode: str, targets: Optional[str]):
+    """An IndexWriter for this run (--index), or None if the index can't be opened."""
+    try:
+        return _findings_index().writer(run_id, mode, targets)
+    except Exception as e:
+        print(f"[WRN] Findings index not updated: {e}")
+        return None
+
+
+def _close_index(index) -> None:
+    """Record the run an IndexWriter was filled for; never raises."""
+    try:
+        findings, hosts = index.close()
+        METRICS.incr("findings_indexed", findings)
+        print(
+            f"[INF] Indexed {findings} findings of {hosts} hosts (run {index.run_id})"
+        )
+    except Exception as e:
+        print(f"[WRN] Findings index not updated: {e}")
+
+
+def _index_export(run_id: str, export: str, mode: str, targets: Optional[str]):
+    """Add an export's findings to the findings index (--index); never raises."""
+    index = _index_writer(run_id, mode, targets)
+    if index:
+        with METRICS.stage("index"):
+            for rec in iter_nuclei_records(export):
+                index.add(rec)
+        _close_index(index)
+
+
+def _run_list_pipelined(
+    args, targets: str, dd_url: str, token: str, out_dir: str, scan_kwargs
+):
+    uploader = StreamingUploader(
+        dd_url,
+        token,
+        out_dir,
+        workers=args.upload_workers,
+        flush_records=args.flush_records,
+        flush_idle=args.flush_idle,
+        keep_files=args.save_json,
+        reimport=args.reimport,
+        payload=_payload_options(args),
+    )
+    combined = None
+    if args.save_json:
+        final_json = os.path.join(out_dir, f"nuclei_list_{now_str()}.jsonl")
+        combined = open(final_json, "w", encoding="utf-8")
+    index = None
+    if args.index:
+        index = _index_writer(new_run_id(), "pipeline", os.path.abspath(args.targets))
+    total, scanned = 0, None
+    try:
+        with METRICS.stage("scan"):
+            for rec in nuclei_list_stream(targets, **scan_kwargs):
+                total += 1
+                uploader.add(rec)
+                if combined:
+                    combined.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                if index:
+                    index.add(rec)
+        scanned = _list_hosts(targets)
+    finally:
+        if combined:
+            combined.close()
+            print(f"[+] Combined JSONL saved: {final_json}")
+        if index:
+            _close_index(index)
+        success, hosts = uploader.close()
+        if scanned is not None:
+            _mark_scanned(
+                scanned, (h for h, st in uploader.hosts.items() if st.failed)
+            )
+        METRICS.incr("hosts_uploaded", success)
+        METRICS.incr("hosts_failed", hosts - success)
+        print(f"[+] Findings: {total} | Unique hosts: {hosts}")
+        print(f"[=] Done: {success}/{hosts} hosts uploaded.")
+
+
+def _split_export(args, journal: RunJournal, export: str, out_dir: str, dd_url: str):
+    """Split the export into host files, journal them and drop unchanged hosts."""
+    fingerprints, manifest = {}, {}
+    index = None
+    if args.index:
+        targets = os.path.abspath(args.targets) if args.targets else None
+        index = _index_writer(journal.run_id, "list", targets)
+    host_files = split_by_host_to_json_arrays(
+        export,
+        out_dir,
+        stream=args.stream_split,
+        max_open_files=args.split_max_open_files,
+        max_buffer_mb=args.split_memory_mb,
+        fingerprints=fingerprints,
+        payload=_payload_options(args),
+        manifest=manifest,
+        workers=args.split_workers,
+        index=index,
+    )
+    journal.record(
+        "split",
+        hosts={h: os.path.abspath(fp) for h, fp in host_files.items()},
+        fingerprints=fingerprints,
+        manifest=manifest,
+    )
+    if index:
+        _close_index(index)
 
     if args.save_json:
         ts = now_str()
         final_json = os.path.join(out_dir, f"nuclei_list_{ts}.json")
-        shutil.copy2(tmp_json, final_json)
+        shutil.copy2(export, final_json)
         print(f"[+] Combined JSON copied: {final_json}")
     try:
-        if not args.save_json:
-            os.remove(tmp_json)
+        os.remove(export)
     except Exception:
         pass
 
-    success, total = 0, len(host_files)
-    for host, fp in host_files.items():
-        try:
-            handle_import_for_hostfile(dd_url, token, host, fp)
-            success += 1
-        except requests.HTTPError as e:
-            print(
-                f"[ERR] {host}: HTTP {e.response.status_code} -> {e.response.text[:500]}"
-            )
-        except Exception as e:
-            print(f"[ERR] {host}: {e}")
-        finally:
+    if not args.force_upload:
+        fp_store = _fingerprint_store()
+        unchanged = [
+            h for h in host_files if fp_store.get(dd_url, h) == fingerprints[h]
+        ]
+        for h in unchanged:
+            fp = host_files.pop(h)
+            journal.record_upload(h, "skipped")
+            METRICS.incr("hosts_skipped")
             if not args.save_json:
                 try:
                     os.remove(fp)
                 except Exception:
                     pass
+        if unchanged:
+            print(
+                f"[INF] Skipping {len(unchanged)} hosts with unchanged findings (--force-upload to send anyway)"
+            )
+
+
+def _upload_host_files(
+    args,
+    journal: RunJournal,
+    dd_url: str,
+    token: str,
+    host_files: dict,
+    scanned: Optional[set] = None,
+):
+    """
+    Upload the host files, then mark `scanned` (the scan's target hosts;
+    on --resume, the hosts uploaded now) in the scan ledger, minus failures.
+    """
+    uncached = dd_uncached_products(dd_url, token, list(host_files))
+    if len(uncached) >= DD_PREFETCH_MIN_HOSTS:
+        try:
+            with METRICS.stage("dd_prefetch"):
+                n = dd_prefetch_products(dd_url, token)
+            print(f"[INF] Prefetched {n} DefectDojo products")
+        except Exception as e:
+            print(f"[WRN] Product prefetch failed, using per-host lookups: {e}")
+
+    workers = max(1, args.upload_workers or 1)
+    if workers > 1:
+        print(f"[INF] Uploading with {workers} workers")
+
+    def _journaled(host, fut):
+        ok, _ = fut.result()
+        journal.record_upload(host, "ok" if ok else "failed")
+
+    fp_store = _fingerprint_store()
+    success, total, failed = 0, len(host_files), set()
+    try:
+        with METRICS.stage("upload"), ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for host, fp in host_files.items():
+                fut = pool.submit(
+                    _upload_hostfile,
+                    dd_url,
+                    token,
+                    host,
+                    fp,
+                    args.save_json,
+                    keep_failed=True,
+                    records=journal.manifest.get(host, {}).get("records"),
+                    **_import_options(args),
+                )
+                fut.add_done_callback(lambda f, h=host: _journaled(h, f))
+                futures[host] = fut
+            # report in host order, whatever order the uploads finish in
+            for host, fut in futures.items():
+                ok, line = fut.result()
+                if ok:
+                    success += 1
+                    fp_store.set(dd_url, host, journal.fingerprints[host])
+                else:
+                    failed.add(host)
+                print(line)
+    finally:
+        fp_store.save()
+        journal.close()
+        METRICS.incr("hosts_uploaded", success)
+        METRICS.incr("hosts_failed", total - success)
+    _mark_scanned(set(host_files) if scanned is None else scanned, failed)
     print(f"[=] Done: {success}/{total} hosts uploaded.")
+    if success == total:
+        journal.discard()
+    else:
+        print(
+            f"[INF] {total - success} hosts failed; their files are kept. "
+            f"Retry them with --resume {journal.run_id}"
+        )
+
+
+def _resume_list(args, dd_url: str, token: str, out_dir: str):
+    journal = RunJournal.load(args.resume)
+    if journal.hosts is None:
+        if not journal.export or not os.path.exists(journal.export):
+            journal.discard()
+            raise SystemExit(
+                f"[!] Run {journal.run_id} did not finish scanning; nothing to resume."
+            )
+        print(f"[INF] Resuming run {journal.run_id} from its nuclei export")
+        _split_export(args, journal, journal.export, out_dir, dd_url)
+
+    pending = journal.pending_hosts()
+    for host, fp in list(pending.items()):
+        if not os.path.exists(fp):
+            print(f"[ERR] {host}: host file {fp} is gone, cannot resume it")
+            journal.record_upload(host, "lost")
+            pending.pop(host)
+    print(
+        f"[INF] Resuming run {journal.run_id}: "
+        f"{len(pending)}/{len(journal.hosts)} hosts left to upload"
+    )
+    _upload_host_files(args, journal, dd_url, token, pending)
+
+
+def run_mode_list(args: argparse.Namespace):
+    dd_url = args.dd_url or DEFECTDOJO_URL
+    token = args.dd_token or API_KEY
+    include_tags, exclude_tags, exclude_templates = _profile_params(args.scan_profile)
+    if not token:
+        raise SystemExit("[!] DD token is required. Use --dd-token or ENV DD_TOKEN.")
+    _configure_dojo(args, dd_url)
+
+    out_dir = args.out_dir or str(DEFAULT_OUT_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    if args.resume:
+        _resume_list(args, dd_url, token, out_dir)
+        return
+
+    templates_update = _maybe_update_templates(args)
+    scan_kwargs = dict(
+        severity=args.severity,
+        include_tags=include_tags,
+        exclude_tags=exclude_tags,
+        exclude_templates=exclude_templates,
+        rate_limit=args.rate_limit,
+        concurrency=args.concurrency,
+    )
+    targets = args.targets
+    if args.dedupe_targets or args.skip_scanned_within:
+        targets, kept = preprocess_targets(
+            args.targets,
+            dedupe=args.dedupe_targets,
+            skip_within_sec=(args.skip_scanned_within or 0) * 3600,
+            ledger=_scan_ledger(),
+        )
+        if not kept:
+            os.remove(targets)
+            _wait_templates(templates_update)
+            print("[=] Done: nothing left to scan.")
+            return
+    try:
+        _wait_templates(templates_update)
+        if args.pipeline:
+            if args.shards > 1:
+                print("[WRN] --shards is ignored with --pipeline.")
+            _run_list_pipelined(args, targets, dd_url, token, out_dir, scan_kwargs)
+            return
+
+        journal = RunJournal.create()
+        print(f"[INF] Run id: {journal.run_id} (journal: {journal.path})")
+        journal.record("start", targets=os.path.abspath(args.targets))
+        scanned = set()
+        try:
+            with METRICS.stage("scan"):
+                if args.shards > 1:
+                    tmp_json = nuclei_list_sharded(
+                        targets,
+                        args.shards,
+                        json_export_path=journal.export_path,
+                        by_host=args.shard_by_host,
+                        timeout_sec=args.shard_timeout,
+                        on_shard_ok=lambda shard: scanned.update(
+                            _list_hosts(shard)
+                        ),
+                        parallel=args.shard_parallel,
+                        controller=_adaptive_controller(args),
+                        **scan_kwargs,
+                    )
+                else:
+                    if args.adaptive:
+                        print(
+                            "[WRN] --adaptive needs --shards > 1; static -rl/-c used."
+                        )
+                    tmp_json = nuclei_list(
+                        targets, json_export_path=journal.export_path, **scan_kwargs
+                    )
+                    scanned = _list_hosts(targets)
+        except BaseException:
+            journal.discard()
+            raise
+        journal.record("export", path=os.path.abspath(tmp_json))
+    finally:
+        if targets != args.targets:
+            try:
+                os.remove(targets)
+            except Exception:
+                pass
+
+    _split_export(args, journal, tmp_json, out_dir, dd_url)
+    _upload_host_files(
+        args, journal, dd_url, token, journal.pending_hosts(), scanned=scanned
+    )
 
 
 def run_mode_single(args: argparse.Namespace):
-    _maybe_update_templates(args)
+    templates_update = _maybe_update_templates(args)
     dd_url = args.dd_url or DEFECTDOJO_URL
     token = args.dd_token or API_KEY
     include_tags, exclude_tags, exclude_templates = _profile_params(args.scan_profile)
     if not token:
         raise SystemExit("[!] DD token is required. Use --dd-token or ENV DD_TOKEN.")
+    _configure_dojo(args, dd_url)
 
     target = args.target
     if not target:
@@ -124,29 +656,29 @@ def run_mode_single(args: argparse.Namespace):
     out_dir = args.out_dir or str(DEFAULT_OUT_DIR)
     os.makedirs(out_dir, exist_ok=True)
 
+    _wait_templates(templates_update)
     print(f"\n[+] Starting single-target scan: {target}")
     try:
-        tmp_json = nuclei_single(
-            target,
-            severity=args.severity,
-            include_tags=include_tags,
-            exclude_tags=exclude_tags,
-            exclude_templates=exclude_templates,
-            rate_limit=args.rate_limit,
-            concurrency=args.concurrency,
-        )
+        with METRICS.stage("scan"):
+            tmp_json = nuclei_single(
+                target,
+                severity=args.severity,
+                include_tags=include_tags,
+                exclude_tags=exclude_tags,
+                exclude_templates=exclude_templates,
+                rate_limit=args.rate_limit,
+                concurrency=args.concurrency,
+            )
 
         host = product_name_from_target(target)
         safe_host = slugify(host)
+        if args.index:
+            _index_export(new_run_id(), tmp_json, "single", target)
 
-        product = dd_ensure_product(dd_url, token, host)
-        eng = dd_create_engagement(
-            dd_url, token, product.get("id"), name=f"Scan {now_str()}"
-        )
-        res = dd_import_scan(dd_url, token, tmp_json, eng.get("id"))
-        findings = extract_findings_count(res)
-        if findings is None or findings == 0:
-            findings = count_findings_from_file(tmp_json) or "?"
+        with METRICS.stage("upload"):
+            findings = handle_import_for_hostfile(
+                dd_url, token, host, tmp_json, **_import_options(args)
+            )
         print(f"[OK] Upload '{host}' (findings: {findings})")
 
         if args.save_json:
@@ -160,7 +692,10 @@ def run_mode_single(args: argparse.Namespace):
             except Exception:
                 pass
 
+    # SystemExit: exit status 1 on the CLI, the job's error in --mode worker
     except requests.HTTPError as e:
-        print(f"[ERR] HTTP {e.response.status_code} -> {e.response.text[:500]}")
+        raise SystemExit(
+            f"[ERR] HTTP {e.response.status_code} -> {e.response.text[:500]}"
+        )
     except Exception as e:
-        print(f"[ERR] {e}")
+        raise SystemExit(f"[ERR] {e}")
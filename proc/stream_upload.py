@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import requests
+
+from .utils import (
+    PayloadOptions,
+    extract_host_from_record,
+    now_str,
+    open_binary,
+    slugify,
+)
+from .dojo_client import (
+    dd_ensure_product_engagement,
+    dd_import_scan,
+    dd_reimport_scan,
+    dd_reimport_product_scan,
+    extract_test_id,
+)
+
+
+class _HostState:
+    def __init__(self):
+        self.records: List[dict] = []
+        self.last_seen = time.monotonic()
+        self.parts = 0
+        self.prev: Optional[Future] = None
+        self.engagement_id = None
+        self.test_id = None
+        self.uploaded = 0
+        self.failed = False
+
+
+class StreamingUploader:
+    """
+    Groups streamed nuclei records by host and uploads them while the scan runs.
+    A host's first batch goes through import-scan (new engagement), later batches
+    are reimported into the same test. A host is flushed once it has
+    `flush_records` pending records, after `flush_idle` seconds without new
+    records (nuclei does not announce per-host completion), and at the end.
+    Batches of one host are uploaded in order; hosts upload in parallel.
+    With reimport=True the first batch also goes to the product's stable
+    reimport engagement/test instead of a new engagement.
+    """
+
+    def __init__(
+        self,
+        dd_url: str,
+        token: str,
+        out_dir: str,
+        workers: int = 1,
+        flush_records: int = 500,
+        flush_idle: float = 120.0,
+        keep_files: bool = False,
+        reimport: bool = False,
+        payload: Optional[PayloadOptions] = None,
+    ):
+        self.dd_url = dd_url
+        self.token = token
+        self.out_dir = out_dir
+        self.flush_records = max(1, flush_records)
+        self.flush_idle = flush_idle
+        self.keep_files = keep_files
+        self.reimport = reimport
+        self.payload = payload or PayloadOptions()
+        self.ts = now_str()
+        self.hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._futures: List[Future] = []
+        self._stop = threading.Event()
+        self._ticker = threading.Thread(target=self._tick, daemon=True)
+        self._ticker.start()
+
+    def add(self, rec: dict) -> None:
+        host = extract_host_from_record(rec)
+        with self._lock:
+            st = self.hosts.get(host)
+            if st is None:
+                st = self.hosts[host] = _HostState()
+            st.records.append(rec)
+            st.last_seen = time.monotonic()
+            if len(st.records) >= self.flush_records:
+                self._flush(host, st)
+
+    def _tick(self) -> None:
+        while not self._stop.wait(1.0):
+            now = time.monotonic()
+            with self._lock:
+                for host, st in self.hosts.items():
+                    if st.records and now - st.last_seen >= self.flush_idle:
+                        self._flush(host, st)
+
+    def _flush(self, host: str, st: _HostState) -> None:
+        # called with self._lock held
+        records, st.records = st.records, []
+        st.parts += 1
+        name = f"nuclei_{slugify(host)}_{self.ts}_part{st.parts}{self.payload.suffix}"
+        path = os.path.join(self.out_dir, name)
+        with open_binary(path, "w") as f:
+            f.write(self.payload.dumpb([self.payload.shrink(r) for r in records]))
+        fut = self._pool.submit(
+            self._upload, host, st, path, len(records), st.parts, st.prev
+        )
+        st.prev = fut
+        self._futures.append(fut)
+
+    def _upload(
+        self,
+        host: str,
+        st: _HostState,
+        path: str,
+        n: int,
+        part: int,
+        prev: Optional[Future],
+    ) -> None:
+        if prev is not None:
+            wait([prev])
+        try:
+            if st.test_id is not None:
+                dd_reimport_scan(self.dd_url, self.token, path, st.test_id)
+            elif self.reimport:
+                _, st.test_id = dd_reimport_product_scan(
+                    self.dd_url, self.token, host, path
+                )
+            else:
+                if st.engagement_id is None:
+                    _, eng = dd_ensure_product_engagement(
+                        self.dd_url, self.token, host, f"Scan {self.ts}"
+                    )
+                    st.engagement_id = eng.get("id")
+                res = dd_import_scan(self.dd_url, self.token, path, st.engagement_id)
+                st.test_id = extract_test_id(res)
+            st.uploaded += n
+            print(f"[OK] Upload '{host}' batch {part} (findings: {n})")
+        except requests.HTTPError as e:
+            st.failed = True
+            print(
+                f"[ERR] {host} batch {part}: HTTP {e.response.status_code} -> {e.response.text[:500]}"
+            )
+        except Exception as e:
+            st.failed = True
+            print(f"[ERR] {host} batch {part}: {e}")
+        finally:
+            if not self.keep_files:
+                try:
+                    os.remove(path)
+                except Exception:
+                    pass
+
+    def close(self):
+        """Flush every pending host, wait for all uploads; returns (success, total)."""
+        self._stop.set()
+        self._ticker.join()
+        with self._lock:
+            for host, st in self.hosts.items():
+                if st.records:
+                    self._flush(host, st)
+        wait(self._futures)
+        self._pool.shutdown()
+        total = len(self.hosts)
+        success = sum(1 for st in self.hosts.values() if not st.failed)
+        return success, total
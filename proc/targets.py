@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .config import SCAN_LEDGER_PATH
+from .utils import canonical_host_from_any, read_lines
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_SCHEME_BY_PORT = {80: "http", 443: "https"}
+
+
+class ScanLedger:
+    """Local record of when each canonical host was last scanned successfully (SQLite)."""
+
+    def __init__(self, path: str = str(SCAN_LEDGER_PATH)):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scans (host TEXT PRIMARY KEY, last_ok REAL NOT NULL)"
+        )
+
+    def recently_scanned(self, hosts: Iterable[str], within_sec: float) -> set:
+        cutoff = time.time() - within_sec
+        hosts = list(hosts)
+        found = set()
+        with self._lock:
+            for i in range(0, len(hosts), 500):
+                chunk = hosts[i : i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT host FROM scans WHERE last_ok >= ? AND host IN ({marks})",
+                    [cutoff, *chunk],
+                )
+                found.update(r[0] for r in rows)
+        return found
+
+    def mark_scanned(self, hosts: Iterable[str]) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO scans VALUES (?, ?)",
+                [(h, now) for h in set(hosts)],
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def target_key(target: str) -> Tuple[str, str, Optional[int]]:
+    """
+    (host, scheme, port) used for deduplication. A missing scheme is inferred
+    from well-known ports and vice versa; otherwise it stays "" / None.
+    """
+    s = target.strip()
+    p = urlparse(s if "://" in s else "dummy://" + s)
+    scheme = p.scheme.lower() if "://" in s else ""
+    try:
+        port = p.port
+    except ValueError:
+        port = None
+    if port is None and scheme:
+        port = _DEFAULT_PORTS.get(scheme)
+    if not scheme and port is not None:
+        scheme = _SCHEME_BY_PORT.get(port, "")
+    return canonical_host_from_any(s), scheme, port
+
+
+def preprocess_targets(
+    list_file: str,
+    dedupe: bool = True,
+    skip_within_sec: Optional[float] = None,
+    ledger: Optional[ScanLedger] = None,
+) -> Tuple[str, List[str]]:
+    """
+    Dedupe targets by canonical host + scheme + port and drop hosts scanned
+    successfully within skip_within_sec. A target without a scheme is also a
+    duplicate when the same host is listed with one: on the same port if it
+    has a port, else on that scheme's default port (a.com is covered by
+    https://a.com, not by a.com:8080 or http://a.com:8080).
+    Writes the kept targets, in input order, to a temp list;
+    returns (path, kept canonical hosts).
+    """
+    raw = read_lines(list_file)
+    invalid = 0
+    entries = []
+    default_port_hosts, explicit_ports = set(), set()
+    for t in raw:
+        key = target_key(t)
+        host, scheme, port = key
+        if not any(ch.isalnum() for ch in host) or host == "unknown":
+            invalid += 1
+            continue
+        entries.append((t, key))
+        if scheme:
+            explicit_ports.add((host, port))
+            if port == _DEFAULT_PORTS.get(scheme):
+                default_port_hosts.add(host)
+
+    dupes = 0
+    seen = set()
+    kept = []
+    for t, key in entries:
+        host, scheme, port = key
+        covered = not scheme and (
+            (host, port) in explicit_ports
+            if port is not None
+            else host in default_port_hosts
+        )
+        if dedupe and (key in seen or covered):
+            dupes += 1
+            continue
+        seen.add(key)
+        kept.append((t, host))
+
+    recent = 0
+    if skip_within_sec and ledger is not None:
+        skip = ledger.recently_scanned({h for _, h in kept}, skip_within_sec)
+        recent = sum(1 for _, h in kept if h in skip)
+        kept = [(t, h) for t, h in kept if h not in skip]
+
+    out_path = os.path.join(
+        tempfile.gettempdir(), f"nuclei_targets_{uuid.uuid4().hex}.txt"
+    )
+    with open(out_path, "w", encoding="utf-8") as f:
+        for t, _ in kept:
+            f.write(t + "\n")
+    print(
+        f"[+] Targets: {len(raw)} read, {len(kept)} kept | dropped: {dupes} duplicate, "
+        f"{recent} recently scanned, {invalid} invalid"
+    )
+    return out_path, [h for _, h in kept]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: saves are then not serialized
+    fcntl = None
+
+from .config import UPLOAD_STATE_PATH
+
+
+class FingerprintStore:
+    """
+    Per-host fingerprint of the last successful upload, keyed by DefectDojo URL
+    + host, kept in a small JSON state file. One store is shared per process;
+    save() merges this process's changes into the file's current contents
+    under <path>.lock, so concurrent runs/workers do not drop each other's.
+    """
+
+    def __init__(self, path: str = str(UPLOAD_STATE_PATH)):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, str] = self._load()
+        self._changed: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return {k: v for k, v in data.items() if isinstance(v, str)}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"[WRN] Ignoring unreadable upload state {self.path}: {e}")
+        return {}
+
+    @staticmethod
+    def _key(dd_url: str, host: str) -> str:
+        return f"{dd_url.rstrip('/')}|{host}"
+
+    def get(self, dd_url: str, host: str) -> Optional[str]:
+        with self._lock:
+            return self._data.get(self._key(dd_url, host))
+
+    def set(self, dd_url: str, host: str, fingerprint: str) -> None:
+        with self._lock:
+            key = self._key(dd_url, host)
+            self._data[key] = fingerprint
+            self._changed[key] = fingerprint
+
+    def save(self) -> None:
+        with self._lock, open(f"{self.path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                data = self._load()
+                data.update(self._changed)
+                fd, tmp = tempfile.mkstemp(
+                    prefix=os.path.basename(self.path) + ".",
+                    suffix=".tmp",
+                    dir=os.path.dirname(self.path) or ".",
+                )
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2, sort_keys=True)
+                os.replace(tmp, self.path)
+                self._data, self._changed = data, {}
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
@@ -1,13 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import gzip
+import hashlib
+import io
 import json
+import mmap
 import re
 import os
+import shutil
 import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from urllib.parse import urlparse
-from typing import Dict, List, Iterable
+from typing import Dict, List, Iterable, Optional, Set, Tuple
+
+from . import jsoncodec
+from .config import HOST_CACHE_SIZE, SPLIT_PARALLEL_MIN_MB
+from .metrics import METRICS
+
+STREAM_CHUNK_SIZE = 1 << 20  # 1 MiB per read
+STREAM_MAX_RECORD_BYTES = 256 << 20  # give up on a single value larger than this
 
 
 def show_banner(title_line: str = "Nuclei2Dojo", ascii_only: bool = False) -> None:
@@ -33,10 +48,18 @@ def utc_today() -> str:
     return datetime.now(timezone.utc).date().isoformat()
 
 
+_SLUG_INVALID_RE = re.compile(r"[^a-z0-9\-_.]+")
+_SLUG_DASHES_RE = re.compile(r"-{2,}")
+_BRACKETED_NETLOC_RE = re.compile(r"^\[(?P<h>.+)\](?::\d+)?$")  # [IPv6]:port?
+_PORT_SUFFIX_RE = re.compile(r":\d+$")
+# values canonical_host_from_any() would return unchanged (bare lowercase host)
+_CANONICAL_HOST_RE = re.compile(r"[a-z0-9][a-z0-9._-]*\Z")
+
+
 def slugify(text: str) -> str:
     text = (text or "").strip().lower()
-    text = re.sub(r"[^a-z0-9\-_.]+", "-", text)
-    text = re.sub(r"-{2,}", "-", text).strip("-")
+    text = _SLUG_INVALID_RE.sub("-", text)
+    text = _SLUG_DASHES_RE.sub("-", text).strip("-")
     return text or "unknown"
 
 
@@ -44,16 +67,15 @@ def _strip_port_from_netloc(netloc: str) -> str:
     if not netloc:
         return ""
     netloc = netloc.strip()
-    m = re.match(r"^\[(?P<h>.+)\](?::\d+)?$", netloc)  # [IPv6]:port?
+    m = _BRACKETED_NETLOC_RE.match(netloc)
     if m:
         return m.group("h")
-    return re.sub(r":\d+$", "", netloc)
+    return _PORT_SUFFIX_RE.sub("", netloc)
 
 
-def canonical_host_from_any(s: str) -> str:
-    if not s:
-        return "unknown"
-    s = str(s).strip()
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def _canonical_host(s: str) -> str:
+    s = s.strip()
     if "://" in s:
         p = urlparse(s)
         base = p.netloc or p.path or s
@@ -66,66 +88,378 @@ def canonical_host_from_any(s: str) -> str:
     return host.lower()
 
 
+def canonical_host_from_any(s: str) -> str:
+    """
+    Bare lowercase host of a URL, host:port or [IPv6]:port string. Results
+    are memoized (HOST_CACHE_SIZE entries): a scan repeats the same few
+    thousand hosts and URLs across all of its findings.
+    """
+    if not s:
+        return "unknown"
+    return _canonical_host(str(s))
+
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def is_gzip_file(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(2) == _GZIP_MAGIC
+
+
+def open_text(path: str, mode: str = "r"):
+    """open() for nuclei exports / host files that may be gzip-compressed."""
+    gz = is_gzip_file(path) if "r" in mode else path.endswith(".gz")
+    if gz:
+        return gzip.open(path, mode + "t", encoding="utf-8", errors="ignore")
+    return open(path, mode, encoding="utf-8", errors="ignore")
+
+
+def open_binary(path: str, mode: str = "r"):
+    """Binary counterpart of open_text, for bytes from/to jsoncodec."""
+    gz = is_gzip_file(path) if "r" in mode else path.endswith(".gz")
+    if gz:
+        return gzip.open(path, mode + "b")
+    return open(path, mode + "b")
+
+
+class PayloadOptions:
+    """
+    How per-host upload files are written: compact separators, raw
+    request/response bodies truncated above max_raw_bytes or dropped
+    (a <field>-sha256 of the full value is kept for traceability), gzip on disk.
+    The defaults reproduce the plain indented JSON.
+    """
+
+    RAW_FIELDS = ("request", "response")
+
+    def __init__(
+        self,
+        compact: bool = False,
+        max_raw_bytes: Optional[int] = None,
+        drop_raw: bool = False,
+        gzip_files: bool = False,
+    ):
+        self.compact = compact
+        self.max_raw_bytes = max_raw_bytes
+        self.drop_raw = drop_raw
+        self.gzip_files = gzip_files
+
+    @property
+    def suffix(self) -> str:
+        return ".json.gz" if self.gzip_files else ".json"
+
+    def dumpb(self, obj, indent: Optional[int] = None) -> bytes:
+        return jsoncodec.dumpb(
+            obj, indent=bool(indent) and not self.compact, compact=self.compact
+        )
+
+    def shrink(self, rec: dict) -> dict:
+        if not self.drop_raw and self.max_raw_bytes is None:
+            return rec
+        out = None
+        for key in self.RAW_FIELDS:
+            val = rec.get(key)
+            if not isinstance(val, str):
+                continue
+            raw = val.encode("utf-8", errors="ignore")
+            if not self.drop_raw and len(raw) <= self.max_raw_bytes:
+                continue
+            if out is None:
+                out = dict(rec)
+            out[f"{key}-sha256"] = hashlib.sha256(raw).hexdigest()
+            if self.drop_raw:
+                del out[key]
+            else:
+                cut = raw[: self.max_raw_bytes].decode("utf-8", errors="ignore")
+                dropped = len(raw) - self.max_raw_bytes
+                out[key] = f"{cut}\n[... truncated {dropped} bytes]"
+        return out if out is not None else rec
+
+
 def read_lines(file_path: str) -> List[str]:
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
         return [ln.strip() for ln in f if ln.strip()]
 
 
+def sniff_export_format(path: str) -> str:
+    """
+    "array" (-json-export) or "stream" (JSONL / concatenated objects) from the
+    first non-whitespace character; "" for an empty file.
+    """
+    with open_text(path) as f:
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                return ""
+            head = chunk.lstrip("\ufeff \t\r\n")
+            if head:
+                return "array" if head[0] == "[" else "stream"
+
+
 def iter_nuclei_records(path: str) -> Iterable[dict]:
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        data = f.read().strip()
-    if not data:
-        return
-    # try full JSON (dict or list)
-    try:
-        obj = json.loads(data)
-        if isinstance(obj, dict):
-            yield obj
-            return
-        elif isinstance(obj, list):
-            for rec in obj:
-                if isinstance(rec, dict):
-                    yield rec
+    """
+    Records of a nuclei export, streamed (see iter_nuclei_records_stream)
+    so memory stays at about one record. Only a gzip'd array is decoded in
+    one jsoncodec.loads; a truncated one (nuclei killed mid-export) is then
+    parsed again, incrementally, to salvage its records.
+    """
+    if is_gzip_file(path) and sniff_export_format(path) == "array":
+        try:
+            with open_binary(path) as f:
+                obj = jsoncodec.loads(f.read())
+        except ValueError:
+            pass
+        else:
+            yield from _records_from_value(obj)
             return
-    except json.JSONDecodeError:
-        pass
-    # fallback: jsonl lines or mixed
-    for line in data.splitlines():
-        line = line.strip()
-        if not line:
-            continue
+    yield from iter_nuclei_records_stream(path)
+
+
+_LINE_TAIL = " \t\r,"
+_WS_RE = re.compile(r"\s*")
+_WS_COMMA_RE = re.compile(r"[\s,]*")
+
+
+def _records_from_value(obj) -> Iterable[dict]:
+    if isinstance(obj, dict):
+        yield obj
+    elif isinstance(obj, list):
+        for rec in obj:
+            if isinstance(rec, dict):
+                yield rec
+
+
+def iter_nuclei_records_stream(
+    path: str,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    max_record_bytes: int = STREAM_MAX_RECORD_BYTES,
+) -> Iterable[dict]:
+    """
+    Records of a nuclei export with only the current record in memory:
+    mmap-based for plain JSONL, incremental text parsing for arrays and
+    gzip'd files.
+    """
+    if is_gzip_file(path):
+        return _iter_records_text(path, chunk_size, max_record_bytes)
+    return _iter_records_mmap(path, chunk_size, max_record_bytes)
+
+
+_WS_BYTES = frozenset(b" \t\r\n")
+_UTF8_BOM = b"\xef\xbb\xbf"
+_NON_WS_RE = re.compile(rb"\S")
+_LBRACE, _LBRACKET = ord("{"), ord("[")
+# drop pages already parsed from our RSS every this many bytes
+_MMAP_RELEASE_BYTES = 16 * 1024 * 1024
+
+
+def _iter_records_mmap(
+    path: str, chunk_size: int, max_record_bytes: int
+) -> Iterable[dict]:
+    """
+    Zero-copy JSONL reader: the file is mapped and each line is handed to
+    jsoncodec.loads as a memoryview slice of the mapping, without decoding
+    the file to str first. Arrays, and anything from the first line that
+    is not a whole value (multi-line or concatenated objects, a truncated
+    last record), go through _iter_records_text from that line's offset.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
         try:
-            obj = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        if isinstance(obj, dict):
-            yield obj
-        elif isinstance(obj, list):
-            for rec in obj:
-                if isinstance(rec, dict):
-                    yield rec
+            advise = getattr(mm, "madvise", None)  # Unix, Python 3.8+
+            if advise and hasattr(mmap, "MADV_SEQUENTIAL"):
+                advise(mmap.MADV_SEQUENTIAL)
+            release = advise if hasattr(mmap, "MADV_DONTNEED") else None
+            bom = len(_UTF8_BOM) if mm[:3] == _UTF8_BOM else 0
+            first = _NON_WS_RE.search(mm, bom)
+            if first is None:
+                return
+            pos, size, released = first.start(), len(mm), 0
+            if mm[pos] != _LBRACKET:
+                while pos < size:
+                    nl = mm.find(b"\n", pos)
+                    if nl == -1:
+                        nl = size
+                    while pos < nl and mm[pos] in _WS_BYTES:
+                        pos += 1
+                    if pos < nl and mm[pos] in (_LBRACE, _LBRACKET):
+                        with view[pos:nl] as rec_view:
+                            try:
+                                obj = jsoncodec.loads(rec_view)
+                            except ValueError:
+                                break  # not line-delimited from here on
+                        yield from _records_from_value(obj)
+                    pos = nl + 1
+                    if release and pos - released >= _MMAP_RELEASE_BYTES:
+                        end = pos - pos % mmap.PAGESIZE
+                        release(mmap.MADV_DONTNEED, released, end - released)
+                        released = end
+                else:
+                    return
+        finally:
+            view.release()
+    yield from _iter_records_text(path, chunk_size, max_record_bytes, offset=pos)
+
+
+def _open_text_at(path: str, offset: int):
+    """open_text() of a plain file, positioned at a byte offset."""
+    f = open(path, "rb")
+    f.seek(offset)
+    return io.TextIOWrapper(f, encoding="utf-8", errors="ignore")
+
+
+def _iter_records_text(
+    path: str, chunk_size: int, max_record_bytes: int, offset: int = 0
+) -> Iterable[dict]:
+    """
+    Incremental text parser for the -json-export array format (iterative
+    array parser), JSONL and concatenated objects; handles gzip and garbage.
+    A plain file can be read from a byte offset on (a line start).
+    """
+    decoder = json.JSONDecoder()
+    with _open_text_at(path, offset) if offset else open_text(path) as f:
+        buf = f.read(chunk_size)
+        pos, eof = (1 if buf[:1] == "\ufeff" else 0), not buf  # skip a UTF-8 BOM
+        in_array = False
+
+        def _fill(min_size: int) -> bool:
+            nonlocal buf, pos, eof
+            more = f.read(max(chunk_size, min_size))
+            if not more:
+                eof = True
+                return False
+            buf = buf[pos:] + more
+            pos = 0
+            return True
+
+        while True:
+            ws = _WS_COMMA_RE if in_array else _WS_RE
+            pos = ws.match(buf, pos).end()
+            if pos >= len(buf):
+                if eof or not _fill(0):
+                    return
+                continue
+            c = buf[pos]
+            if c == "[" and not in_array:
+                in_array = True
+                pos += 1
+                continue
+            if c == "]" and in_array:
+                in_array = False
+                pos += 1
+                continue
+            if in_array or c == "{":
+                # fast path: a whole record on its own line (JSONL, -json-export)
+                nl = buf.find("\n", pos)
+                if nl != -1:
+                    line = buf[pos:nl].rstrip(_LINE_TAIL)
+                    if line.endswith("}"):
+                        try:
+                            obj = jsoncodec.loads(line)
+                        except ValueError:
+                            pass
+                        else:
+                            pos = nl + 1
+                            yield from _records_from_value(obj)
+                            continue
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # most likely a record cut by the read boundary: grow and retry
+                    if not eof and len(buf) - pos < max_record_bytes:
+                        if _fill(len(buf) - pos):
+                            continue
+                else:
+                    pos = end
+                    yield from _records_from_value(obj)
+                    continue
+            # garbage (or an undecodable record): skip the rest of the line
+            nl = buf.find("\n", pos)
+            while nl == -1 and not eof:
+                scanned = len(buf) - pos
+                if not _fill(0):
+                    break
+                nl = buf.find("\n", scanned)
+            if nl == -1:
+                return
+            pos = nl + 1
+
+
+def merge_nuclei_exports(paths: List[str], out_path: str) -> int:
+    """Concatenate several nuclei exports into one JSONL file (streamed); returns record count."""
+    total = 0
+    with METRICS.stage("merge"), open(out_path, "wb") as out:
+        for path in paths:
+            for rec in iter_nuclei_records_stream(path):
+                out.write(jsoncodec.dumpb(rec, compact=True))
+                out.write(b"\n")
+                total += 1
+    return total
+
+
+def iter_record_chunks(
+    path: str, max_bytes: int, max_records: int
+) -> Iterable[Tuple[str, int]]:
+    """
+    Re-split an export into JSON array files of at most max_records records and
+    about max_bytes bytes each, next to the source file. Streaming: a chunk is
+    written, yielded as (path, records), and the next one is only written once
+    the caller resumes, so the caller should upload/delete it in between.
+    """
+    base = os.path.basename(path)
+    for ext in (".gz", ".json"):
+        if base.endswith(ext):
+            base = base[: -len(ext)]
+    out_dir = os.path.dirname(path) or "."
+    part, n, size = 0, 0, 0
+    chunk_path, fh = None, None
+    try:
+        for rec in iter_nuclei_records_stream(path):
+            s = jsoncodec.dumpb(rec, compact=True)
+            if fh and (n >= max_records or size + len(s) > max_bytes):
+                fh.write(b"\n]\n")
+                fh.close()
+                fh = None
+                yield chunk_path, n
+            if fh is None:
+                part += 1
+                chunk_path = os.path.join(out_dir, f"{base}_chunk{part}.json")
+                fh = open(chunk_path, "wb")
+                fh.write(b"[\n")
+                n, size = 0, 2
+            else:
+                fh.write(b",\n")
+            fh.write(s)
+            n += 1
+            size += len(s) + 2
+        if fh:
+            fh.write(b"\n]\n")
+            fh.close()
+            fh = None
+            yield chunk_path, n
+    finally:
+        if fh:
+            fh.close()
 
 
 def count_findings_from_file(json_path: str) -> int:
+    """
+    Record count of an export / host file. Files written by the split already
+    have theirs in the split manifest; this is for anything else.
+    """
     try:
-        with open(json_path, "r", encoding="utf-8", errors="ignore") as f:
-            data = f.read().strip()
-        if not data:
-            return 0
-        try:
-            obj = json.loads(data)
-            if isinstance(obj, list):
-                return len([x for x in obj if isinstance(x, dict)])
-            if isinstance(obj, dict):
-                return 1
-        except json.JSONDecodeError:
-            pass
         return sum(1 for _ in iter_nuclei_records(json_path))
     except Exception:
         return 0
 
 
 def extract_host_from_record(rec: dict) -> str:
+    # fast path: nuclei usually reports "host" already bare
+    val = rec.get("host")
+    if isinstance(val, str) and _CANONICAL_HOST_RE.match(val) and val != "unknown":
+        return val
     for key in ("host", "ip", "url", "matched-at"):
         val = rec.get(key)
         if val:
@@ -142,24 +476,521 @@ def extract_host_from_record(rec: dict) -> str:
     return "unknown"
 
 
-def split_by_host_to_json_arrays(src_json_path: str, out_dir: str) -> Dict[str, str]:
+_FINGERPRINT_FIELDS = ("template-id", "matched-at", "matcher-name", "extracted-results")
+
+
+class HostFingerprint:
+    """
+    Order-independent digest of a host's findings. Only the identifying fields
+    (template-id, matched-at, matcher-name, extracted-results) count, so
+    timestamps and request/response bodies never change it. Per-record
+    SHA-256 values are summed mod 2**256: constant memory, any record order.
+    """
+
+    _MOD = 1 << 256
+
+    def __init__(self):
+        self.value = 0
+
+    def add(self, rec: dict) -> None:
+        key = [rec.get(k) for k in _FINGERPRINT_FIELDS]
+        if isinstance(key[3], list):
+            key[3] = sorted(str(x) for x in key[3])
+        # stdlib on purpose: the digest must not depend on the jsoncodec backend
+        blob = json.dumps(key, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        digest = hashlib.sha256(blob).digest()
+        self.value = (self.value + int.from_bytes(digest, "big")) % self._MOD
+
+    def merge(self, other: "HostFingerprint") -> None:
+        self.value = (self.value + other.value) % self._MOD
+
+    def hexdigest(self) -> str:
+        return f"{self.value:064x}"
+
+
+class HostManifest:
+    """
+    Per-host summary gathered while splitting: record count and severity
+    histogram, plus the written file's size once it is closed. Uploads use
+    it instead of re-parsing the host file to count its findings.
+    """
+
+    __slots__ = ("records", "severity")
+
+    def __init__(self):
+        self.records = 0
+        self.severity: Dict[str, int] = {}
+
+    def add(self, rec: dict) -> None:
+        self.records += 1
+        info = rec.get("info")
+        sev = info.get("severity") if isinstance(info, dict) else None
+        sev = str(sev).lower() if sev else "unknown"
+        self.severity[sev] = self.severity.get(sev, 0) + 1
+
+    def merge(self, other: "HostManifest") -> None:
+        self.records += other.records
+        for sev, n in other.severity.items():
+            self.severity[sev] = self.severity.get(sev, 0) + n
+
+    def to_dict(self, path: str) -> dict:
+        return {
+            "records": self.records,
+            "bytes": os.path.getsize(path),
+            "severity": dict(sorted(self.severity.items())),
+        }
+
+
+def _host_file_path(
+    out_dir: str, host: str, ts: str, suffix: str, taken: Set[str]
+) -> str:
+    """
+    nuclei_<host>_<ts><suffix>, numbered when two hosts slugify alike; the
+    path is added to the caller's set of paths already handed out.
+    """
+    base = f"nuclei_{slugify(host)}_{ts}"
+    path = os.path.join(out_dir, f"{base}{suffix}")
+    n = 1
+    while path in taken:
+        n += 1
+        path = os.path.join(out_dir, f"{base}_{n}{suffix}")
+    taken.add(path)
+    return path
+
+
+class _HostArrayWriter:
+    """
+    Writes one JSON array per host as records arrive.
+    Serialized records are buffered up to max_buffer_bytes, and at most
+    max_open_files host files are kept open at once (LRU).
+    """
+
+    def __init__(
+        self,
+        out_dir: str,
+        ts: str,
+        max_open_files: int,
+        max_buffer_bytes: int,
+        payload: PayloadOptions,
+    ):
+        self.out_dir = out_dir
+        self.ts = ts
+        self.payload = payload
+        self.max_open_files = max(1, max_open_files)
+        self.max_buffer_bytes = max(1, max_buffer_bytes)
+        self.paths: Dict[str, str] = {}
+        self.counts: Dict[str, int] = {}
+        self._taken: Set[str] = set()
+        self._started: Dict[str, bool] = {}
+        self._pending: Dict[str, List[bytes]] = {}
+        self._pending_bytes = 0
+        self._handles: "OrderedDict[str, object]" = OrderedDict()
+
+    def _path_for(self, host: str) -> str:
+        path = self.paths.get(host)
+        if path:
+            return path
+        path = _host_file_path(
+            self.out_dir, host, self.ts, self.payload.suffix, self._taken
+        )
+        self.paths[host] = path
+        return path
+
+    def _handle(self, host: str):
+        fh = self._handles.get(host)
+        if fh is not None:
+            self._handles.move_to_end(host)
+            return fh
+        while len(self._handles) >= self.max_open_files:
+            _, old = self._handles.popitem(last=False)
+            old.close()
+        # gzip appends become extra gzip members, which readers concatenate
+        mode = "a" if self._started.get(host) else "w"
+        fh = open_binary(self._path_for(host), mode)
+        self._handles[host] = fh
+        return fh
+
+    def add(self, host: str, rec: dict) -> None:
+        s = self.payload.dumpb(self.payload.shrink(rec))
+        self._pending.setdefault(host, []).append(s)
+        self._pending_bytes += len(s)
+        self.counts[host] = self.counts.get(host, 0) + 1
+        if self._pending_bytes >= self.max_buffer_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        for host, chunks in self._pending.items():
+            fh = self._handle(host)
+            for s in chunks:
+                fh.write(b",\n" if self._started.get(host) else b"[\n")
+                self._started[host] = True
+                fh.write(s)
+        self._pending.clear()
+        self._pending_bytes = 0
+
+    def close(self) -> None:
+        self.flush()
+        for fh in self._handles.values():
+            fh.close()
+        self._handles.clear()
+        for host, path in self.paths.items():
+            with open_binary(path, "a") as fh:
+                fh.write(b"\n]\n")
+
+
+def _split_by_host_streaming(
+    src_json_path: str,
+    out_dir: str,
+    max_open_files: int,
+    max_buffer_mb: int,
+    fps: Optional[Dict[str, HostFingerprint]],
+    mans: Optional[Dict[str, HostManifest]],
+    payload: PayloadOptions,
+    index=None,
+) -> Dict[str, str]:
+    writer = _HostArrayWriter(
+        out_dir, now_str(), max_open_files, max_buffer_mb * 1024 * 1024, payload
+    )
+    total = 0
+    try:
+        for rec in iter_nuclei_records_stream(src_json_path):
+            total += 1
+            host = extract_host_from_record(rec)
+            writer.add(host, rec)
+            if fps is not None:
+                fps.setdefault(host, HostFingerprint()).add(rec)
+            if mans is not None:
+                mans.setdefault(host, HostManifest()).add(rec)
+            if index is not None:
+                index.add(rec)
+    finally:
+        writer.close()
+    METRICS.incr("findings", total)
+    print(f"[+] Findings: {total} | Unique hosts: {len(writer.paths)}")
+    for host, out_path in writer.paths.items():
+        print(f"    - {host}: {writer.counts.get(host, 0)} → {out_path}")
+    return dict(writer.paths)
+
+
+def _can_split_parallel(path: str) -> bool:
+    if is_gzip_file(path) or sniff_export_format(path) != "stream":
+        print("[INF] Parallel split needs an uncompressed JSONL export; splitting serially")
+        return False
+    if os.path.getsize(path) < SPLIT_PARALLEL_MIN_MB * 1024 * 1024:
+        return False
+    return True
+
+
+def _line_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Split a file into up to `parts` byte ranges that start on a line."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(bounds[-1], size * i // parts))
+            f.readline()
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _rest_is_blank(f) -> bool:
+    """True if only whitespace is left in binary file f after its position."""
+    while True:
+        chunk = f.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            return True
+        if chunk.strip():
+            return False
+
+
+def _split_range(
+    src_json_path: str,
+    start: int,
+    end: int,
+    part_dir: str,
+    max_open_files: int,
+    max_buffer_bytes: int,
+    payload: PayloadOptions,
+    want_fps: bool,
+    want_mans: bool,
+    index_part=None,
+):
+    """
+    Worker of _split_by_host_parallel: host-bucket the lines in [start, end)
+    into plain partial array files, adding the records to index_part (an
+    IndexPart) if given. Returns None as soon as a record does not fit on one
+    line (multi-line JSON), which only the serial parsers handle. An
+    undecodable last line (an export cut off mid-write) is skipped, as the
+    serial parsers do.
+    """
+    os.makedirs(part_dir, exist_ok=True)
+    writer = _HostArrayWriter(
+        part_dir, "part", max_open_files, max_buffer_bytes, payload
+    )
+    fps: Dict[str, HostFingerprint] = {}
+    mans: Dict[str, HostManifest] = {}
+    total = 0
+    try:
+        with open(src_json_path, "rb") as f:
+            f.seek(start)
+            pos = start
+            if start == 0:  # skip a UTF-8 BOM, as the serial readers do
+                if f.read(len(_UTF8_BOM)) == _UTF8_BOM:
+                    pos = len(_UTF8_BOM)
+                else:
+                    f.seek(0)
+            while pos < end:
+                line = f.readline()
+                if not line:
+                    break
+                pos += len(line)
+                line = line.strip()
+                if line[:1] not in (b"{", b"["):
+                    continue  # the serial parsers skip non-JSON lines too
+                try:
+                    obj = jsoncodec.loads(line)
+                except ValueError:
+                    if _rest_is_blank(f):
+                        break
+                    return None
+                for rec in _records_from_value(obj):
+                    total += 1
+                    host = extract_host_from_record(rec)
+                    writer.add(host, rec)
+                    if want_fps:
+                        fps.setdefault(host, HostFingerprint()).add(rec)
+                    if want_mans:
+                        mans.setdefault(host, HostManifest()).add(rec)
+                    if index_part is not None:
+                        index_part.add(rec)
+    finally:
+        writer.close()
+        indexed = index_part.close() if index_part is not None else None
+    return dict(writer.paths), dict(writer.counts), fps, mans, total, indexed
+
+
+def _append_array_body(out, part_path: str) -> None:
+    """Copy the records of a partial array file ("[\\n" ... "\\n]\\n") into out."""
+    left = os.path.getsize(part_path) - 5
+    with open(part_path, "rb") as src:
+        src.seek(2)
+        while left > 0:
+            chunk = src.read(min(left, STREAM_CHUNK_SIZE))
+            if not chunk:
+                break
+            out.write(chunk)
+            left -= len(chunk)
+
+
+def _split_by_host_parallel(
+    src_json_path: str,
+    out_dir: str,
+    workers: int,
+    max_open_files: int,
+    max_buffer_mb: int,
+    fps: Optional[Dict[str, HostFingerprint]],
+    mans: Optional[Dict[str, HostManifest]],
+    payload: PayloadOptions,
+    index=None,
+) -> Optional[Dict[str, str]]:
+    """
+    Split a JSONL export with a process per newline-aligned byte range. Each
+    worker writes partial per-host files; they are then concatenated per host
+    in range order, so records, host order and file names come out exactly as
+    from _split_by_host_streaming. Returns None (nothing written) if the file
+    turns out not to be one record per line.
+    """
+    ranges = _line_ranges(src_json_path, workers)
+    # workers write plain partials; compression happens once, in the merge
+    part_payload = PayloadOptions(
+        compact=payload.compact,
+        max_raw_bytes=payload.max_raw_bytes,
+        drop_raw=payload.drop_raw,
+    )
+    part_root = tempfile.mkdtemp(prefix=".split-", dir=out_dir)
+    try:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [
+                pool.submit(
+                    _split_range,
+                    src_json_path,
+                    start,
+                    end,
+                    os.path.join(part_root, str(i)),
+                    max_open_files,  # a per-process fd limit
+                    max(1, max_buffer_mb * 1024 * 1024 // len(ranges)),
+                    part_payload,
+                    fps is not None,
+                    mans is not None,
+                    index.part() if index is not None else None,
+                )
+                for i, (start, end) in enumerate(ranges)
+            ]
+            parts = [f.result() for f in futures]
+        if any(p is None for p in parts):
+            print("[INF] Export is not one record per line; splitting serially")
+            if index is not None:
+                index.reset()  # the serial split indexes every record again
+            return None
+        print(f"[INF] Split {len(ranges)} byte ranges in parallel")
+
+        counts: Dict[str, int] = {}
+        for _, part_counts, _, _, _, _ in parts:
+            for host, n in part_counts.items():
+                counts[host] = counts.get(host, 0) + n
+        ts = now_str()
+        host_files: Dict[str, str] = {}
+        taken: Set[str] = set()
+        for host in counts:  # first-appearance order, as in the serial split
+            path = _host_file_path(out_dir, host, ts, payload.suffix, taken)
+            host_parts = [p[0][host] for p in parts if host in p[0]]
+            if payload.gzip_files:
+                with open_binary(path, "w") as out:
+                    out.write(b"[\n")
+                    for i, part in enumerate(host_parts):
+                        if i:
+                            out.write(b",\n")
+                        _append_array_body(out, part)
+                    out.write(b"\n]\n")
+            else:
+                # extend the first partial in place: only later ranges are copied
+                with open(host_parts[0], "r+b") as out:
+                    out.seek(-3, os.SEEK_END)
+                    out.truncate()
+                    for part in host_parts[1:]:
+                        out.write(b",\n")
+                        _append_array_body(out, part)
+                    out.write(b"\n]\n")
+                os.replace(host_parts[0], path)
+            host_files[host] = path
+    finally:
+        shutil.rmtree(part_root, ignore_errors=True)
+
+    total = 0
+    for _, _, part_fps, part_mans, part_total, indexed in parts:
+        total += part_total
+        if index is not None:
+            index.merge(*indexed)
+        if fps is not None:
+            for host, fp in part_fps.items():
+                fps.setdefault(host, HostFingerprint()).merge(fp)
+        if mans is not None:
+            for host, m in part_mans.items():
+                mans.setdefault(host, HostManifest()).merge(m)
+    METRICS.incr("findings", total)
+    print(f"[+] Findings: {total} | Unique hosts: {len(host_files)}")
+    for host, out_path in host_files.items():
+        print(f"    - {host}: {counts[host]} → {out_path}")
+    return host_files
+
+
+def split_by_host_to_json_arrays(
+    src_json_path: str,
+    out_dir: str,
+    stream: bool = False,
+    max_open_files: int = 64,
+    max_buffer_mb: int = 64,
+    fingerprints: Optional[Dict[str, str]] = None,
+    payload: Optional[PayloadOptions] = None,
+    manifest: Optional[Dict[str, dict]] = None,
+    workers: int = 1,
+    index=None,
+) -> Dict[str, str]:
+    """
+    Write one JSON array file per host; returns {host: path}.
+    If a `fingerprints` dict is given, it is filled with each host's
+    HostFingerprint hexdigest in the same pass; a `manifest` dict likewise
+    gets each host's HostManifest (records, bytes, severity histogram), and
+    an `index` (a findings_index.IndexWriter) every record.
+    `payload` controls how the files are written (see PayloadOptions).
+    With workers > 1 (0 = one per CPU) an uncompressed JSONL export is split
+    by that many processes (see _split_by_host_parallel).
+    """
     os.makedirs(out_dir, exist_ok=True)
+    payload = payload or PayloadOptions()
+    fps: Optional[Dict[str, HostFingerprint]] = (
+        {} if fingerprints is not None else None
+    )
+    mans: Optional[Dict[str, HostManifest]] = {} if manifest is not None else None
+    METRICS.add_bytes("export_read", os.path.getsize(src_json_path))
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    with METRICS.stage("split"):
+        host_files = None
+        if workers > 1 and _can_split_parallel(src_json_path):
+            host_files = _split_by_host_parallel(
+                src_json_path,
+                out_dir,
+                workers,
+                max_open_files,
+                max_buffer_mb,
+                fps,
+                mans,
+                payload,
+                index,
+            )  # None: not line-delimited after all
+        if host_files is None and stream:
+            host_files = _split_by_host_streaming(
+                src_json_path,
+                out_dir,
+                max_open_files,
+                max_buffer_mb,
+                fps,
+                mans,
+                payload,
+                index,
+            )
+        elif host_files is None:
+            host_files = _split_by_host_buffered(
+                src_json_path, out_dir, fps, mans, payload, index
+            )
+    METRICS.add_bytes(
+        "host_files_written", sum(os.path.getsize(p) for p in host_files.values())
+    )
+    METRICS.incr("hosts_split", len(host_files))
+    if fingerprints is not None:
+        fingerprints.update((h, fp.hexdigest()) for h, fp in fps.items())
+    if manifest is not None:
+        manifest.update((h, m.to_dict(host_files[h])) for h, m in mans.items())
+    return host_files
+
+
+def _split_by_host_buffered(
+    src_json_path: str,
+    out_dir: str,
+    fps: Optional[Dict[str, HostFingerprint]],
+    mans: Optional[Dict[str, HostManifest]],
+    payload: PayloadOptions,
+    index=None,
+) -> Dict[str, str]:
     buckets: Dict[str, List[dict]] = {}
     total = 0
-    for rec in iter_nuclei_records(src_json_path):
-        total += 1
-        if not isinstance(rec, dict):
-            continue
-        host = extract_host_from_record(rec)
-        buckets.setdefault(host, []).append(rec)
+    with METRICS.stage("parse"):
+        for rec in iter_nuclei_records(src_json_path):
+            total += 1
+            if not isinstance(rec, dict):
+                continue
+            host = extract_host_from_record(rec)
+            buckets.setdefault(host, []).append(rec)
+            if fps is not None:
+                fps.setdefault(host, HostFingerprint()).add(rec)
+            if mans is not None:
+                mans.setdefault(host, HostManifest()).add(rec)
+            if index is not None:
+                index.add(rec)
+    METRICS.incr("findings", total)
     print(f"[+] Findings: {total} | Unique hosts: {len(buckets)}")
     host_files: Dict[str, str] = {}
     ts = now_str()
     for host, records in buckets.items():
         safe_host = slugify(host)
-        out_path = os.path.join(out_dir, f"nuclei_{safe_host}_{ts}.json")
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(records, f, ensure_ascii=False, indent=2)
+        out_path = os.path.join(out_dir, f"nuclei_{safe_host}_{ts}{payload.suffix}")
+        with open_binary(out_path, "w") as f:
+            f.write(payload.dumpb([payload.shrink(r) for r in records], indent=2))
         host_files[host] = out_path
         print(f"    - {host}: {len(records)} → {out_path}")
     return host_files
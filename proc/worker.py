@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from .config import (
+    DEFECTDOJO_URL,
+    API_KEY,
+    DEFAULT_OUT_DIR,
+    WORKER_SPOOL_DIR,
+    WORKER_LEASE_SEC,
+)
+from .metrics import METRICS, write_reports
+from .nuclei_runner import ensure_nuclei
+from .pipeline import (
+    run_mode_list,
+    run_mode_single,
+    _configure_dojo,
+    _maybe_update_templates,
+    _wait_templates,
+    _scan_ledger,
+    _fingerprint_store,
+)
+from .utils import now_str
+
+# job keys that may override the worker's own CLI options
+JOB_OPTIONS = (
+    "scan_profile",
+    "severity",
+    "rate_limit",
+    "concurrency",
+    "reimport",
+    "force_upload",
+    "dedupe_targets",
+    "skip_scanned_within",
+    "shards",
+    "save_json",
+    "index",
+)
+
+
+class Spool:
+    """
+    Directory job queue: producers drop <id>.json files into incoming/, a worker
+    claims one by renaming it into running/ (atomic, so several workers may share
+    a spool) and moves it to done/ or failed/ when finished. The mtime of a
+    running job is its lease: the worker running it touches it every poll,
+    and only jobs whose lease expired (their worker died) are requeued.
+    """
+
+    STATES = ("incoming", "running", "done", "failed")
+
+    def __init__(self, root: str = str(WORKER_SPOOL_DIR)):
+        self.root = root
+        for state in self.STATES:
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    def _path(self, state: str, name: str = "") -> str:
+        return os.path.join(self.root, state, name)
+
+    def submit(self, job: dict) -> str:
+        """Enqueue a job; returns its id."""
+        job_id = f"{now_str()}_{uuid.uuid4().hex[:8]}"
+        tmp = self._path("incoming", f".{job_id}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp, self._path("incoming", f"{job_id}.json"))
+        return job_id
+
+    def heartbeat(self, job_ids) -> None:
+        """Renew the lease of jobs this worker is running."""
+        for job_id in job_ids:
+            try:
+                os.utime(self._path("running", f"{job_id}.json"))
+            except FileNotFoundError:
+                pass
+
+    def requeue_stale(self, lease_sec: float) -> int:
+        """Put back running jobs whose lease expired: their worker died."""
+        cutoff = time.time() - lease_sec
+        n = 0
+        for name in os.listdir(self._path("running")):
+            if not name.endswith(".json"):
+                continue
+            path = self._path("running", name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                os.replace(path, self._path("incoming", name))
+            except FileNotFoundError:
+                continue  # finished or requeued by another worker meanwhile
+            n += 1
+        return n
+
+    def claim(self) -> Optional[Tuple[str, dict]]:
+        """Oldest pending job as (job_id, job), or None if the queue is empty."""
+        names = sorted(
+            n for n in os.listdir(self._path("incoming")) if n.endswith(".json")
+        )
+        for name in names:
+            try:
+                os.rename(self._path("incoming", name), self._path("running", name))
+                os.utime(self._path("running", name))  # start of the lease
+            except FileNotFoundError:
+                continue  # claimed by another worker
+            job_id = name[: -len(".json")]
+            try:
+                with open(self._path("running", name), "r", encoding="utf-8") as f:
+                    job = json.load(f)
+                if not isinstance(job, dict):
+                    raise ValueError("job must be a JSON object")
+            except (OSError, ValueError) as e:
+                self.finish(job_id, {"error": f"unreadable job: {e}"}, ok=False)
+                continue
+            return job_id, job
+        return None
+
+    def finish(self, job_id: str, job: dict, ok: bool) -> None:
+        state = "done" if ok else "failed"
+        with open(self._path(state, f"{job_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2)
+        try:
+            os.remove(self._path("running", f"{job_id}.json"))
+        except FileNotFoundError:
+            pass
+
+
+def _job_out_dir(args: argparse.Namespace, job_id: str) -> str:
+    return os.path.join(args.out_dir or str(DEFAULT_OUT_DIR), "jobs", job_id)
+
+
+def _job_args(args: argparse.Namespace, spool: Spool, job_id: str, job: dict):
+    """CLI namespace for one job: the worker's options, overridden by the job's."""
+    jargs = argparse.Namespace(**vars(args))
+    # done once at worker start, not per job
+    jargs.update_templates = False
+    jargs.refresh_cache = False
+    jargs.resume = None
+    # host files are named by host and second; concurrent jobs must not share them
+    jargs.out_dir = _job_out_dir(args, job_id)
+    if args.rate_limit and args.worker_jobs > 1:
+        # the worker's rate limit is a budget shared by its concurrent jobs
+        jargs.rate_limit = max(1, args.rate_limit // args.worker_jobs)
+    for key in JOB_OPTIONS:
+        if key in job:
+            setattr(jargs, key, job[key])
+    targets = job.get("targets")
+    if isinstance(targets, list):
+        path = spool._path("running", f"{job_id}.targets.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(str(t) for t in targets) + "\n")
+        targets = path
+    jargs.targets = targets
+    jargs.target = job.get("target")
+    if jargs.target:
+        jargs.mode = "single"
+    elif jargs.targets:
+        jargs.mode = "list"
+    else:
+        raise ValueError("job needs 'target' or 'targets'")
+    return jargs
+
+
+def _run_job(args: argparse.Namespace, spool: Spool, job_id: str, job: dict) -> None:
+    started = time.monotonic()
+    print(f"[+] Job {job_id}: started")
+    ok = False
+    try:
+        jargs = _job_args(args, spool, job_id, job)
+        if jargs.mode == "single":
+            run_mode_single(jargs)
+        else:
+            run_mode_list(jargs)
+        ok = True
+    except BaseException as e:
+        job["error"] = str(e) or type(e).__name__
+        if not isinstance(e, SystemExit):
+            traceback.print_exc()
+    finally:
+        targets_tmp = spool._path("running", f"{job_id}.targets.txt")
+        if os.path.exists(targets_tmp):
+            os.remove(targets_tmp)
+        try:
+            os.rmdir(_job_out_dir(args, job_id))  # only if nothing was kept
+        except OSError:
+            pass
+        job["duration_sec"] = round(time.monotonic() - started, 1)
+        spool.finish(job_id, job, ok)
+        METRICS.incr("worker_jobs_ok" if ok else "worker_jobs_failed")
+    print(f"[{'OK' if ok else 'ERR'}] Job {job_id}: finished in {job['duration_sec']}s")
+    # totals since the worker started; jobs overlap, so there is no per-job slice
+    try:
+        write_reports(args.metrics_json, args.metrics_prom)
+    except OSError as e:
+        print(f"[WRN] Run metrics not written: {e}")
+
+
+def run_mode_worker(args: argparse.Namespace):
+    """
+    Long-running mode: serve scan jobs from a spool directory, at most
+    --worker-jobs at a time, with DefectDojo clients/caches kept warm between jobs.
+    """
+    dd_url = args.dd_url or DEFECTDOJO_URL
+    if not (args.dd_token or API_KEY):
+        raise SystemExit("[!] DD token is required. Use --dd-token or ENV DD_TOKEN.")
+    ensure_nuclei()
+    _wait_templates(_maybe_update_templates(args))
+    # shared state is created once here so concurrent jobs don't race to open it
+    _configure_dojo(args, dd_url)
+    _scan_ledger()
+    _fingerprint_store()
+
+    spool = Spool(args.spool or str(WORKER_SPOOL_DIR))
+    # several polls must fit in a lease, or live jobs would look abandoned
+    lease = max(WORKER_LEASE_SEC, 5 * args.poll_interval)
+    budget = max(1, args.worker_jobs)
+    print(f"[+] Worker: spool {spool.root} | up to {budget} concurrent jobs")
+
+    with ThreadPoolExecutor(max_workers=budget) as pool:
+        running = {}  # future -> job id
+        while True:
+            running = {f: j for f, j in running.items() if not f.done()}
+            spool.heartbeat(running.values())
+            n = spool.requeue_stale(lease)
+            if n:
+                print(f"[INF] Requeued {n} jobs of a worker that stopped")
+            while len(running) < budget:
+                claimed = spool.claim()
+                if claimed is None:
+                    break
+                running[pool.submit(_run_job, args, spool, *claimed)] = claimed[0]
+            if args.exit_when_idle and not running:
+                break
+            time.sleep(args.poll_interval)
+    print("[=] Worker: queue empty, exiting.")